@@ -0,0 +1,343 @@
+"""Typed, validated access to ``variables.json``.
+
+The file is parsed once per process and region and the resulting
+``AppConfig`` is shared by ``app.py`` and every stack. When a
+``variables.<region>.json`` file exists next to ``variables.json`` its keys
+are merged over the base file, so one checkout can synth several regions.
+"""
+import functools
+import ipaddress
+import json
+import os
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from app_cdk.tuning_profiles import PROFILES as TUNING_PROFILES
+
+CONFIG_DIR = os.path.dirname(os.path.realpath(__file__))
+BASE_CONFIG_FILE = "variables.json"
+
+# variables.json key -> AppConfig field
+_KEYS = {
+    "KEY_NAME": "key_name",
+    "AZS": "azs",
+    "VPC_CIDR": "vpc_cidr",
+    "PUBLIC_SUBNET_AZ1_CIDR": "public_subnet_az1_cidr",
+    "PUBLIC_SUBNET_AZ2_CIDR": "public_subnet_az2_cidr",
+    "PRIVATE_SUBNET_AZ1_CIDR": "private_subnet_az1_cidr",
+    "PRIVATE_SUBNET_AZ2_CIDR": "private_subnet_az2_cidr",
+    "CUSTOMER_VPC_CIDR": "customer_vpc_cidr",
+}
+
+# Optional keys and the values used when they are absent.
+_OPTIONAL_KEYS = {
+    # Matches the single node group the stack created before profiles existed.
+    "NODE_GROUPS": [
+        {"name": "nf", "instance_type": "c5.2xlarge", "min_size": 1, "desired_size": 1, "max_size": 1,
+         "labels": {"cnf": "xyz"}},
+    ],
+    # Dedicated subnets of the multus-nodegroup-stack's data-plane ENIs, all in
+    # MULTUS_AZ (the first of AZS when unset).
+    "N3_SUBNET_CIDR": "10.1.50.0/24",
+    "N6_SUBNET_CIDR": "10.1.60.0/24",
+    "MULTUS_AZ": None,
+    # Site-to-Site VPN connections from the customer gateway to the Transit
+    # Gateway. Each has two tunnels, whose inside /30s are handed out in order
+    # from VPN_INSIDE_CIDR_POOL.
+    "VPN_CONNECTIONS": 1,
+    "VPN_INSIDE_CIDR_POOL": "169.254.10.0/24",
+    # UERANSIM release the pipeline builds into a tarball once, and the
+    # number of RAN instances (one gNB each) that fetch and run it.
+    "UERANSIM_VERSION": "v3.2.6",
+    "RAN_FLEET_SIZE": 1,
+}
+
+# Data-plane networks a node group can list in multus_networks, and the
+# variables.json key of each one's subnet.
+MULTUS_NETWORKS = {"n3": "N3_SUBNET_CIDR", "n6": "N6_SUBNET_CIDR"}
+
+VPN_TUNNELS_PER_CONNECTION = 2
+# Keeps the VpnConnections SSM parameter under the 4 KB of a standard parameter.
+MAX_VPN_CONNECTIONS = 10
+# Tunnel inside CIDRs must be /30s in 169.254.0.0/16, and AWS rejects these.
+VPN_INSIDE_RANGE = ipaddress.ip_network("169.254.0.0/16")
+VPN_RESERVED_INSIDE_CIDRS = tuple(ipaddress.ip_network(cidr) for cidr in (
+    "169.254.0.0/30", "169.254.1.0/30", "169.254.2.0/30", "169.254.3.0/30",
+    "169.254.4.0/30", "169.254.5.0/30", "169.254.169.252/30"))
+
+MAX_RAN_FLEET_SIZE = 16
+_UERANSIM_VERSION = re.compile(r"^v\d+\.\d+\.\d+$")
+
+_TAINT_EFFECTS = ("NoSchedule", "PreferNoSchedule", "NoExecute")
+_INSTANCE_TYPE = re.compile(r"^[a-z][a-z0-9-]*\.[a-z0-9]+$")
+_NODE_GROUP_NAME = re.compile(r"^[a-z][a-z0-9-]*$")
+
+
+class ConfigError(ValueError):
+    """Raised when variables.json is missing keys or holds inconsistent values."""
+
+
+@dataclass(frozen=True)
+class Taint:
+    key: str
+    value: str
+    effect: str
+
+
+@dataclass(frozen=True)
+class NodeGroupProfile:
+    name: str
+    instance_type: str
+    min_size: int
+    desired_size: int
+    max_size: int
+    azs: Tuple[str, ...]
+    labels: Tuple[Tuple[str, str], ...] = ()
+    taints: Tuple[Taint, ...] = ()
+    tuning_profile: str = "default"
+    multus_networks: Tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class AppConfig:
+    key_name: str
+    azs: Tuple[str, ...]
+    vpc_cidr: str
+    public_subnet_az1_cidr: str
+    public_subnet_az2_cidr: str
+    private_subnet_az1_cidr: str
+    private_subnet_az2_cidr: str
+    customer_vpc_cidr: str
+    node_groups: Tuple[NodeGroupProfile, ...]
+    n3_subnet_cidr: str
+    n6_subnet_cidr: str
+    multus_az: str
+    vpn_connections: int
+    vpn_inside_cidr_pool: str
+    ueransim_version: str
+    ran_fleet_size: int
+
+    @property
+    def region(self) -> str:
+        return self.azs[0][:-1]
+
+    @property
+    def subnet_cidrs(self) -> Tuple[str, ...]:
+        return (
+            self.public_subnet_az1_cidr,
+            self.public_subnet_az2_cidr,
+            self.private_subnet_az1_cidr,
+            self.private_subnet_az2_cidr,
+        )
+
+    @property
+    def multus_subnet_cidrs(self) -> Dict[str, str]:
+        return {"n3": self.n3_subnet_cidr, "n6": self.n6_subnet_cidr}
+
+    @property
+    def vpn_tunnel_inside_cidrs(self) -> Tuple[Tuple[str, ...], ...]:
+        """The inside CIDRs of each VPN connection's tunnels, e.g. ``(("169.254.10.0/30", "169.254.10.4/30"),)``."""
+        cidrs = _tunnel_inside_cidrs(self.vpn_inside_cidr_pool, self.vpn_connections)
+        return tuple(tuple(cidrs[i:i + VPN_TUNNELS_PER_CONNECTION])
+                     for i in range(0, len(cidrs), VPN_TUNNELS_PER_CONNECTION))
+
+
+def _read_json(path):
+    try:
+        with open(path, 'r') as config_file:
+            return json.load(config_file)
+    except json.JSONDecodeError as e:
+        raise ConfigError(f"{path}: invalid JSON ({e})") from e
+
+
+def _network(key, value):
+    try:
+        return ipaddress.ip_network(value)
+    except (TypeError, ValueError) as e:
+        raise ConfigError(f"{key}: {value!r} is not a valid CIDR ({e})") from e
+
+
+def _tunnel_inside_cidrs(pool, connections) -> List[str]:
+    """The first ``connections`` x 2 /30s of ``pool`` that AWS does not reserve."""
+    wanted = connections * VPN_TUNNELS_PER_CONNECTION
+    cidrs = []
+    for block in ipaddress.ip_network(pool).subnets(new_prefix=30):
+        if len(cidrs) == wanted:
+            break
+        if not any(block.overlaps(reserved) for reserved in VPN_RESERVED_INSIDE_CIDRS):
+            cidrs.append(str(block))
+    if len(cidrs) < wanted:
+        raise ConfigError(f"VPN_INSIDE_CIDR_POOL {pool} has {len(cidrs)} usable /30s; "
+                          f"VPN_CONNECTIONS {connections} needs {wanted}")
+    return cidrs
+
+
+def _node_group(index, raw, azs):
+    where = f"NODE_GROUPS[{index}]"
+    if not isinstance(raw, dict):
+        raise ConfigError(f"{where} must be an object, got {raw!r}")
+    required = {"name", "instance_type", "min_size", "desired_size", "max_size"}
+    known = required | {"azs", "labels", "taints", "tuning_profile", "multus_networks"}
+    unknown = sorted(set(raw) - known)
+    if unknown:
+        raise ConfigError(f"unknown keys in {where}: {', '.join(unknown)}")
+    missing = sorted(required - set(raw))
+    if missing:
+        raise ConfigError(f"missing keys in {where}: {', '.join(missing)}")
+
+    name = raw["name"]
+    if not isinstance(name, str) or not _NODE_GROUP_NAME.match(name):
+        raise ConfigError(f"{where}.name {name!r} must be lower-case letters, digits and dashes")
+    if not isinstance(raw["instance_type"], str) or not _INSTANCE_TYPE.match(raw["instance_type"]):
+        raise ConfigError(f"{where}.instance_type {raw['instance_type']!r} is not an EC2 instance type")
+    sizes = [raw[key] for key in ("min_size", "desired_size", "max_size")]
+    if not all(isinstance(size, int) and size >= 0 for size in sizes) or not sizes[0] <= sizes[1] <= sizes[2] or sizes[2] < 1:
+        raise ConfigError(f"{where} needs 0 <= min_size <= desired_size <= max_size and max_size >= 1, got {sizes}")
+
+    group_azs = tuple(raw.get("azs", azs))
+    if not group_azs or not set(group_azs) <= set(azs):
+        raise ConfigError(f"{where}.azs {list(group_azs)} must be a non-empty subset of AZS {azs}")
+
+    labels = raw.get("labels", {})
+    if not isinstance(labels, dict) or not all(isinstance(v, str) for v in labels.values()):
+        raise ConfigError(f"{where}.labels must map label names to strings")
+
+    taints = []
+    for taint in raw.get("taints", []):
+        if not isinstance(taint, dict) or set(taint) != {"key", "value", "effect"}:
+            raise ConfigError(f"{where}.taints entries need exactly key, value and effect, got {taint!r}")
+        if taint["effect"] not in _TAINT_EFFECTS:
+            raise ConfigError(f"{where} taint effect {taint['effect']!r} must be one of {', '.join(_TAINT_EFFECTS)}")
+        taints.append(Taint(taint["key"], taint["value"], taint["effect"]))
+
+    tuning_profile = raw.get("tuning_profile", "default")
+    if tuning_profile not in TUNING_PROFILES:
+        raise ConfigError(
+            f"{where}.tuning_profile {tuning_profile!r} must be one of {', '.join(TUNING_PROFILES)}")
+
+    multus_networks = raw.get("multus_networks", [])
+    if not isinstance(multus_networks, list) or not set(multus_networks) <= set(MULTUS_NETWORKS):
+        raise ConfigError(f"{where}.multus_networks {multus_networks!r} must list some of {', '.join(MULTUS_NETWORKS)}")
+
+    return NodeGroupProfile(
+        name=name,
+        instance_type=raw["instance_type"],
+        min_size=sizes[0],
+        desired_size=sizes[1],
+        max_size=sizes[2],
+        azs=group_azs,
+        labels=tuple(sorted(labels.items())),
+        taints=tuple(taints),
+        tuning_profile=tuning_profile,
+        multus_networks=tuple(sorted(set(multus_networks))),
+    )
+
+
+def _node_groups(raw, azs):
+    if not isinstance(raw, list) or not raw:
+        raise ConfigError("NODE_GROUPS must be a non-empty list")
+    groups = tuple(_node_group(index, group, azs) for index, group in enumerate(raw))
+    names = [group.name for group in groups]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ConfigError(f"duplicate NODE_GROUPS names: {', '.join(duplicates)}")
+    return groups
+
+
+def _validate(raw, region):
+    unknown = sorted(set(raw) - set(_KEYS) - set(_OPTIONAL_KEYS))
+    if unknown:
+        raise ConfigError(f"unknown keys in {BASE_CONFIG_FILE}: {', '.join(unknown)}")
+    missing = sorted(set(_KEYS) - set(raw))
+    if missing:
+        raise ConfigError(f"missing keys in {BASE_CONFIG_FILE}: {', '.join(missing)}")
+
+    azs = raw["AZS"]
+    if not isinstance(azs, list) or len(azs) != 2 or not all(isinstance(az, str) for az in azs):
+        raise ConfigError(f"AZS must list exactly two availability zones, got {azs!r}")
+    if azs[0][:-1] != azs[1][:-1]:
+        raise ConfigError(f"AZS {azs} are not in the same region")
+    if region and not all(az.startswith(region) for az in azs):
+        raise ConfigError(
+            f"AZS {azs} do not belong to region {region}. "
+            "Make sure the az you set and the region in aws configure match.")
+
+    vpc = _network("VPC_CIDR", raw["VPC_CIDR"])
+    subnets = []
+    for key in ("PUBLIC_SUBNET_AZ1_CIDR", "PUBLIC_SUBNET_AZ2_CIDR",
+                "PRIVATE_SUBNET_AZ1_CIDR", "PRIVATE_SUBNET_AZ2_CIDR", *MULTUS_NETWORKS.values()):
+        subnet = _network(key, raw[key])
+        if not subnet.subnet_of(vpc):
+            raise ConfigError(f"{key} {subnet} is not inside VPC_CIDR {vpc}")
+        for other_key, other in subnets:
+            if subnet.overlaps(other):
+                raise ConfigError(f"{key} {subnet} overlaps {other_key} {other}")
+        subnets.append((key, subnet))
+
+    for key in MULTUS_NETWORKS.values():
+        # The upper half of the subnet is reserved for pod addresses; it needs at least a /28.
+        if _network(key, raw[key]).prefixlen > 27:
+            raise ConfigError(f"{key} {raw[key]} must be a /27 or larger")
+    if raw["MULTUS_AZ"] is not None and raw["MULTUS_AZ"] not in azs:
+        raise ConfigError(f"MULTUS_AZ {raw['MULTUS_AZ']!r} must be one of AZS {azs}")
+
+    customer_vpc = _network("CUSTOMER_VPC_CIDR", raw["CUSTOMER_VPC_CIDR"])
+    if customer_vpc.overlaps(vpc):
+        raise ConfigError(f"CUSTOMER_VPC_CIDR {customer_vpc} overlaps VPC_CIDR {vpc}")
+
+    connections = raw["VPN_CONNECTIONS"]
+    if not isinstance(connections, int) or not 1 <= connections <= MAX_VPN_CONNECTIONS:
+        raise ConfigError(f"VPN_CONNECTIONS must be an integer from 1 to {MAX_VPN_CONNECTIONS}, got {connections!r}")
+    pool = _network("VPN_INSIDE_CIDR_POOL", raw["VPN_INSIDE_CIDR_POOL"])
+    if not pool.subnet_of(VPN_INSIDE_RANGE) or pool.prefixlen > 30:
+        raise ConfigError(f"VPN_INSIDE_CIDR_POOL {pool} must be a /30 or larger inside {VPN_INSIDE_RANGE}")
+    _tunnel_inside_cidrs(pool, connections)
+
+    version = raw["UERANSIM_VERSION"]
+    if not isinstance(version, str) or not _UERANSIM_VERSION.match(version):
+        raise ConfigError(f"UERANSIM_VERSION must be a release tag such as v3.2.6, got {version!r}")
+    fleet_size = raw["RAN_FLEET_SIZE"]
+    if not isinstance(fleet_size, int) or not 1 <= fleet_size <= MAX_RAN_FLEET_SIZE:
+        raise ConfigError(f"RAN_FLEET_SIZE must be an integer from 1 to {MAX_RAN_FLEET_SIZE}, got {fleet_size!r}")
+
+
+@functools.lru_cache(maxsize=None)
+def _load(region, config_dir):
+    raw = _read_json(os.path.join(config_dir, BASE_CONFIG_FILE))
+    if region:
+        overlay_path = os.path.join(config_dir, f"variables.{region}.json")
+        if os.path.exists(overlay_path):
+            raw.update(_read_json(overlay_path))
+
+    for key, default in _OPTIONAL_KEYS.items():
+        raw.setdefault(key, default)
+
+    _validate(raw, region)
+
+    values = {field: raw[key] for key, field in _KEYS.items()}
+    values["azs"] = tuple(values["azs"])
+    values["node_groups"] = _node_groups(raw["NODE_GROUPS"], values["azs"])
+    values["n3_subnet_cidr"] = raw["N3_SUBNET_CIDR"]
+    values["n6_subnet_cidr"] = raw["N6_SUBNET_CIDR"]
+    values["multus_az"] = raw["MULTUS_AZ"] or values["azs"][0]
+    values["vpn_connections"] = raw["VPN_CONNECTIONS"]
+    values["vpn_inside_cidr_pool"] = raw["VPN_INSIDE_CIDR_POOL"]
+    values["ueransim_version"] = raw["UERANSIM_VERSION"]
+    values["ran_fleet_size"] = raw["RAN_FLEET_SIZE"]
+    for group in values["node_groups"]:
+        # The data-plane subnets exist in one AZ only, so must the group's nodes.
+        if group.multus_networks and values["multus_az"] not in group.azs:
+            raise ConfigError(f"node group {group.name!r} has multus_networks but is not in MULTUS_AZ {values['multus_az']}")
+    return AppConfig(**values)
+
+
+def load_config(region: Optional[str] = None, config_dir: str = CONFIG_DIR) -> AppConfig:
+    """Return the validated configuration for ``region``.
+
+    ``region`` defaults to ``CDK_DEFAULT_REGION``. Results are memoized, so
+    every stack in the app shares a single parse of the config files.
+    """
+    if region is None:
+        region = os.getenv('CDK_DEFAULT_REGION')
+    return _load(region, config_dir)
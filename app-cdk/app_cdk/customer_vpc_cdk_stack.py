@@ -1,5 +1,4 @@
 import os
-import json
 
 from constructs import Construct
 from aws_cdk import (
@@ -7,29 +6,104 @@ from aws_cdk import (
     aws_ec2 as ec2,
     aws_iam as iam,
     aws_eks as eks,
+    aws_s3_assets as s3_assets,
     aws_ssm as ssm,
     CfnTag,
     Fn,
     CfnOutput
 )
 
-script_dir = os.path.dirname(os.path.realpath(__file__))
-config_path = os.path.join(script_dir, 'config', 'variables.json')
+from app_cdk.config import load_config
+from app_cdk.shared import VPN_PSK_TAG, ueransim_artifact_key
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), os.pardir, os.pardir)
+RANLOAD_DIR = os.path.join(REPO_DIR, "loadtest", "ranload")
+HELM_VALUES = os.path.join(REPO_DIR, "helm_chart", "open5gs-helm-charts_nomultus", "values.yaml")
+# ranload finds the chart's values.yaml relative to itself, so both keep the repo layout.
+RAN_INSTALL_DIR = "/opt/private5g"
+# The pipeline publishes the UERANSIM tarball on its first run; RAN instances
+# launched before that wait this long for it.
+UERANSIM_WAIT_ATTEMPTS = 120
+UERANSIM_WAIT_SECONDS = 30
+# Kept out of functions/, which is the Lambda asset of the node group stacks.
+CUSTOMER_GATEWAY_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), os.pardir, "customer_gateway")
+CUSTOMER_GATEWAY_INSTALL_DIR = "/opt/private5g"
+
+
+def ran_instance_id(index):
+    """The first RAN instance keeps the id it had before RAN_FLEET_SIZE existed."""
+    return "CustomerRANInstance" if index == 0 else f"CustomerRANInstance{index + 1}"
 
-class CustomerVpcCdkStack(Stack):
 
+def ueransim_commands(version, region, bucket):
+    """Fetch, verify and unpack the pipeline's UERANSIM tarball in ``bucket`` into /opt/UERANSIM."""
+    key = ueransim_artifact_key(version)
+    return [
+        "rm -f /tmp/ueransim.tar.gz.sha256",
+        f"for attempt in $(seq {UERANSIM_WAIT_ATTEMPTS}); do",
+        f'  aws s3 cp --region {region} "s3://{bucket}/{key}.sha256" /tmp/ueransim.tar.gz.sha256 && break',
+        f"  sleep {UERANSIM_WAIT_SECONDS}",
+        "done",
+        "if [ ! -s /tmp/ueransim.tar.gz.sha256 ]; then",
+        f'  echo "UERANSIM {version} is not published; has pipeline-cdk-stack run Ueransim-Build?" >&2',
+        "  exit 1",
+        "fi",
+        f'aws s3 cp --region {region} "s3://{bucket}/{key}" /tmp/ueransim.tar.gz &&',
+        '  echo "$(cat /tmp/ueransim.tar.gz.sha256)  /tmp/ueransim.tar.gz" | sha256sum -c &&',
+        "  tar -xzf /tmp/ueransim.tar.gz -C /opt || exit 1",
+        # Where the README's steps expect it.
+        "ln -sfn /opt/UERANSIM /root/UERANSIM",
+        "ln -sfn /opt/UERANSIM /home/ubuntu/UERANSIM",
+    ]
 
-    def load_config(self, file_path):
-        with open(file_path, 'r') as config_file:
-            self.config = json.load(config_file)
-            self.key_name = self.config.get("KEY_NAME")
-            self.eks_vpc_cidr = self.config.get("VPC_CIDR")
-            self.customer_vpc_cidr = self.config.get("CUSTOMER_VPC_CIDR")
+
+def gnb_service_commands(index, fleet_size, version):
+    """``ran-start AMF_ADDRESS...`` renders this gNB's configs with ranload and (re)starts nr-gnb."""
+    return [
+        "mkdir -p /etc/ueransim",
+        "cat > /etc/ueransim/fleet.env <<'EOF'",
+        f"GNB_INDEX={index}",
+        f"RAN_FLEET_SIZE={fleet_size}",
+        f"UERANSIM_VERSION={version}",
+        "EOF",
+        "cat > /usr/local/bin/ran-start <<'EOF'",
+        "#!/bin/bash",
+        "# usage: ran-start AMF_ADDRESS [AMF_ADDRESS...]",
+        "set -e",
+        ". /etc/ueransim/fleet.env",
+        "args=()",
+        'for amf in "$@"; do args+=(--amf-address "$amf"); done',
+        f"cd {RAN_INSTALL_DIR}/loadtest",
+        'python3 -m ranload render --gnb-index "$GNB_INDEX" --out /etc/ueransim "${args[@]}"',
+        "systemctl restart ueransim-gnb",
+        "EOF",
+        "chmod 755 /usr/local/bin/ran-start",
+        "cat > /etc/systemd/system/ueransim-gnb.service <<'EOF'",
+        "[Unit]",
+        "Description=UERANSIM gNB (configured by ran-start)",
+        "After=network-online.target",
+        "ConditionPathExists=/etc/ueransim/gnb.yaml",
+        "",
+        "[Service]",
+        "ExecStart=/opt/UERANSIM/build/nr-gnb -c /etc/ueransim/gnb.yaml",
+        "Restart=on-failure",
+        "",
+        "[Install]",
+        "WantedBy=multi-user.target",
+        "EOF",
+        "systemctl daemon-reload",
+        "systemctl enable ueransim-gnb",
+    ]
+
+class CustomerVpcCdkStack(Stack):
 
     def __init__(self, scope: Construct, id: str, **kwargs) -> None:
         super().__init__(scope, id, **kwargs)
 
-        self.load_config(config_path)
+        self.config = load_config()
+        self.key_name = self.config.key_name
+        self.eks_vpc_cidr = self.config.vpc_cidr
+        self.customer_vpc_cidr = self.config.customer_vpc_cidr
 
         # Create customer VPC with subnets
         customer_vpc = ec2.Vpc(
@@ -75,51 +149,87 @@ class CustomerVpcCdkStack(Stack):
           parameter_name='/aws/service/canonical/ubuntu/server/22.04/stable/current/amd64/hvm/ebs-gp2/ami-id'
 )
 
-        ransim_user_data = """#!/bin/bash
-            sudo apt update -y
-            sudo apt upgrade -y
-            sudo apt install git -y
+        # UERANSIM comes pre-built from the pipeline (buildspec_ueransim.yaml) and
+        # ranload with the chart's values from this app, so a RAN instance only
+        # installs runtime packages. Each one runs one gNB with its own gNB ID.
+        ranload = s3_assets.Asset(self, "RanloadPackage", path=RANLOAD_DIR, exclude=["**/__pycache__"])
+        helm_values = s3_assets.Asset(self, "HelmValues", path=HELM_VALUES)
+        # Resolved by CloudFormation at deploy time, so deploy pipeline-cdk-stack first.
+        ueransim_bucket = ssm.StringParameter.value_for_string_parameter(self, "UeransimArtifactBucket")
 
-            cd ~
-            git clone https://github.com/aligungr/UERANSIM
-
-            sudo apt install make -y
-            sudo apt install gcc -y
-            sudo apt install g++ -y
+        fleet_size = self.config.ran_fleet_size
+        version = self.config.ueransim_version
+        for index in range(fleet_size):
+            ran_user_data = ec2.UserData.for_linux()
+            ran_user_data.add_commands(
+                "export DEBIAN_FRONTEND=noninteractive PATH=$PATH:/snap/bin",
+                "apt-get update -y",
+                # libsctp1 for nr-gnb/nr-ue; python3-yaml and iperf3 for ranload (run / throughput)
+                "apt-get install -y libsctp1 iproute2 python3-yaml iperf3 unzip",
+                "snap install aws-cli --classic",
+                *ueransim_commands(version, self.region, ueransim_bucket),
+            )
+            ranload_zip = ran_user_data.add_s3_download_command(
+                bucket=ranload.bucket, bucket_key=ranload.s3_object_key, region=self.region)
+            values_file = ran_user_data.add_s3_download_command(
+                bucket=helm_values.bucket, bucket_key=helm_values.s3_object_key, region=self.region)
+            ran_user_data.add_commands(
+                f"mkdir -p {RAN_INSTALL_DIR}/loadtest/ranload",
+                f"unzip -o {ranload_zip} -d {RAN_INSTALL_DIR}/loadtest/ranload",
+                f"install -D -m 644 {values_file} "
+                f"{RAN_INSTALL_DIR}/helm_chart/open5gs-helm-charts_nomultus/values.yaml",
+                *gnb_service_commands(index, fleet_size, version),
+            )
 
-            sudo apt install libsctp-dev lksctp-tools -y
+            # Create EC2 instance for customer RAN
+            ran_instance = ec2.Instance(
+                self,
+                ran_instance_id(index),
+                vpc=customer_vpc,
+                instance_type=ec2.InstanceType.of(
+                    ec2.InstanceClass.C5,
+                    ec2.InstanceSize.LARGE
+                ),
+                machine_image=ubuntu_machine_image,
+                allow_all_outbound=True,
+                key_name=self.key_name,
+                user_data=ran_user_data,
+                vpc_subnets=ec2.SubnetSelection(
+                    subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS
+                ),
+                security_group=customer_ran_sg,
+            )
+            ran_instance.add_to_role_policy(iam.PolicyStatement(
+                actions=["s3:GetObject"],
+                resources=[f"arn:{self.partition}:s3:::{ueransim_bucket}/ueransim/{version}/*"],
+            ))
+            ranload.grant_read(ran_instance.role)
+            helm_values.grant_read(ran_instance.role)
 
-            sudo apt install iproute2 -y
-            sudo snap install cmake --classic
-
-            cd ~/UERANSIM
-            make -j2
-        """
-        # Create EC2 instance for customer RAN
-        ec2.Instance(
-            self,
-            'CustomerRANInstance',
-            vpc=customer_vpc,
-            instance_type=ec2.InstanceType.of(
-                ec2.InstanceClass.C5,
-                ec2.InstanceSize.LARGE
-            ),
-            machine_image=ubuntu_machine_image,
-            allow_all_outbound=True,
-            key_name=self.key_name,
-            user_data=ec2.UserData.custom(ransim_user_data),
-            vpc_subnets=ec2.SubnetSelection(
-                subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS
-            ),
-            security_group=customer_ran_sg,
-        )
+        # The customer_gateway package renders the strongSwan/Quagga configuration
+        # once tgw-vpn-cdk-stack exists: run `sudo cgw-configure` on the instance.
+        customer_gateway = s3_assets.Asset(self, "CustomerGatewayPackage",
+                                           path=CUSTOMER_GATEWAY_DIR, exclude=["**/__pycache__"])
 
         # Create user data script for GW instance
-        gw_user_data = """#!/bin/bash
-        sudo amazon-linux-extras install epel -y
-        sudo yum install strongswan -y
-        sudo yum install quagga -y
-        """
+        gw_user_data = ec2.UserData.for_linux()
+        gw_user_data.add_commands(
+            "amazon-linux-extras install epel -y",
+            "yum install strongswan quagga python3 unzip -y",
+        )
+        package_zip = gw_user_data.add_s3_download_command(
+            bucket=customer_gateway.bucket,
+            bucket_key=customer_gateway.s3_object_key,
+        )
+        gw_user_data.add_commands(
+            f"mkdir -p {CUSTOMER_GATEWAY_INSTALL_DIR}/customer_gateway",
+            f"unzip -o {package_zip} -d {CUSTOMER_GATEWAY_INSTALL_DIR}/customer_gateway",
+            "cat > /usr/local/bin/cgw-configure <<'EOF'",
+            "#!/bin/bash",
+            f'cd {CUSTOMER_GATEWAY_INSTALL_DIR} && exec python3 -m customer_gateway configure "$@"',
+            "EOF",
+            "chmod 755 /usr/local/bin/cgw-configure",
+        )
 
         # Create security group for customer GW
         customer_gw_sg = ec2.SecurityGroup(
@@ -175,12 +285,27 @@ class CustomerVpcCdkStack(Stack):
             ),
             allow_all_outbound=True,
             key_name=self.key_name,
-            user_data=ec2.UserData.custom(gw_user_data),
+            user_data=gw_user_data,
             vpc_subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PUBLIC),
             security_group=customer_gw_sg,
             source_dest_check=False
         )
 
+        customer_gateway.grant_read(gw_instance.role)
+        gw_instance.add_to_role_policy(iam.PolicyStatement(
+            actions=["ssm:GetParameter"],
+            resources=[self.format_arn(service="ssm", resource="parameter", resource_name="VpnConnections")],
+        ))
+        gw_instance.add_to_role_policy(iam.PolicyStatement(
+            actions=["ec2:DescribeVpnConnections"],
+            resources=["*"],
+        ))
+        gw_instance.add_to_role_policy(iam.PolicyStatement(
+            actions=["secretsmanager:GetSecretValue"],
+            resources=["*"],
+            conditions={"StringEquals": {f"secretsmanager:ResourceTag/{VPN_PSK_TAG}": "true"}},
+        ))
+
         # Allocate an Elastic IP
         eip = ec2.CfnEIP(self, "CustomerGWInstanceEIP")
 
@@ -5,6 +5,7 @@ from aws_cdk import (
     aws_ssm as ssm,
     RemovalPolicy,
     CfnOutput,
+    Duration,
 )
 
 class EcrCdkStack(Stack):
@@ -12,6 +13,12 @@ class EcrCdkStack(Stack):
         super().__init__(scope, id, **kwargs)
         
         ecr_repository = ecr.Repository(self, 'my-open5gs', removal_policy=RemovalPolicy.DESTROY)
+        # Each CodeBuild run re-tags the BuildKit registry cache (buildcache), leaving the previous one untagged.
+        ecr_repository.add_lifecycle_rule(
+            description="Expire untagged images and build caches",
+            tag_status=ecr.TagStatus.UNTAGGED,
+            max_image_age=Duration.days(14),
+        )
 
         ssm.StringParameter(self, "SSMEcrRepositoryUri", parameter_name="EcrRepositoryUri", string_value=ecr_repository.repository_uri)
 
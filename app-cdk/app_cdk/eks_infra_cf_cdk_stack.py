@@ -1,6 +1,3 @@
-import os
-import json
-
 from constructs import Construct
 from aws_cdk import (
     Stack,
@@ -12,24 +9,19 @@ from aws_cdk import (
     CfnOutput
 )
 
-
-script_dir = os.path.dirname(os.path.realpath(__file__))
-config_path = os.path.join(script_dir, 'config', 'variables.json')
+from app_cdk import lookups
+from app_cdk.config import load_config
 
 class EksInfraCFStack(Stack):
-    
-    def load_config(self, file_path):
-        with open(file_path, 'r') as config_file:
-            self.config = json.load(config_file)
-            self.key_name = self.config.get("KEY_NAME")
 
     def __init__(self, scope: Construct, id: str, **kwargs) -> None:
         super().__init__(scope, id, **kwargs)
         
-        self.load_config(config_path)
+        self.config = load_config()
+        self.key_name = self.config.key_name
 
-        eks_vpc_id = ssm.StringParameter.value_from_lookup(self, "EksVpcId")
-        eks_vpc = ec2.Vpc.from_lookup(self,"lookupVPC",vpc_id=eks_vpc_id)
+        eks_vpc_id = lookups.string_parameter(self, "EksVpcId")
+        eks_vpc = lookups.vpc(self, "lookupVPC", vpc_id=eks_vpc_id)
 
         # EKSIamRole
         eks_iam_role = iam.Role(self, "EKSIamRole", assumed_by=iam.ServicePrincipal("eks.amazonaws.com"))
@@ -1,5 +1,3 @@
-import os
-import json
 from constructs import Construct
 from aws_cdk import (
     Stack,
@@ -11,26 +9,21 @@ from aws_cdk import (
     CfnOutput
 )
 
-script_dir = os.path.dirname(os.path.realpath(__file__))
-config_path = os.path.join(script_dir, 'config', 'variables.json')
+from app_cdk.config import load_config
 
 class EksVpcCdkStack(Stack):
 
-    def load_config(self, file_path):
-        with open(file_path, 'r') as config_file:
-            self.config = json.load(config_file)
-            self.vpc_cidr = self.config.get("VPC_CIDR")
-            self.public_subnet_az1_cidr = self.config.get("PUBLIC_SUBNET_AZ1_CIDR")
-            self.public_subnet_az2_cidr = self.config.get("PUBLIC_SUBNET_AZ2_CIDR")
-            self.private_subnet_az1_cidr = self.config.get("PRIVATE_SUBNET_AZ1_CIDR")
-            self.private_subnet_az2_cidr = self.config.get("PRIVATE_SUBNET_AZ2_CIDR")
-            self.azs = self.config.get("AZS")
-            self.key_name = self.config.get("KEY_NAME")
-        
     def __init__(self, scope: Construct, id: str, **kwargs) -> None:
         super().__init__(scope, id, **kwargs)
 
-        self.load_config(config_path)
+        self.config = load_config()
+        self.vpc_cidr = self.config.vpc_cidr
+        self.public_subnet_az1_cidr = self.config.public_subnet_az1_cidr
+        self.public_subnet_az2_cidr = self.config.public_subnet_az2_cidr
+        self.private_subnet_az1_cidr = self.config.private_subnet_az1_cidr
+        self.private_subnet_az2_cidr = self.config.private_subnet_az2_cidr
+        self.azs = list(self.config.azs)
+        self.key_name = self.config.key_name
 
         # Create VPC
         self.vpc = ec2.CfnVPC(
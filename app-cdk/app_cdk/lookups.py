@@ -0,0 +1,191 @@
+"""SSM parameter and VPC lookups shared by the stacks.
+
+Online, the stacks resolve cross-stack values through CDK context lookups,
+which the CDK CLI answers one missing key at a time. Running
+
+    python -m app_cdk.lookups prefetch
+
+first resolves every parameter the app needs in batched ``GetParameters``
+calls and stores them in ``cdk.context.json``, so ``cdk synth`` finds all of
+them on its first pass. The prefetched values are refreshed once their TTL
+has expired.
+
+Offline (``cdk synth -c offline=true`` or ``PRIVATE5G_OFFLINE=1``), every
+lookup is answered from ``config/lookup_stub.json`` and no AWS call is made.
+"""
+import argparse
+import functools
+import json
+import os
+import sys
+import time
+
+from aws_cdk import (
+    Annotations,
+    Environment,
+    Stack,
+    aws_ec2 as ec2,
+    aws_ssm as ssm,
+)
+
+from app_cdk import registry
+from app_cdk.config import CONFIG_DIR, load_config
+
+OFFLINE_CONTEXT_KEY = "offline"
+OFFLINE_ENV = "PRIVATE5G_OFFLINE"
+STUB_PATH = os.path.join(CONFIG_DIR, "lookup_stub.json")
+CONTEXT_PATH = os.path.normpath(os.path.join(CONFIG_DIR, os.pardir, os.pardir, "cdk.context.json"))
+DEFAULT_TTL_SECONDS = 3600
+
+# GetParameters accepts at most 10 names per call.
+_BATCH_SIZE = 10
+
+# Every parameter the stacks read through string_parameter().
+PARAMETER_NAMES = registry.consumed_parameters()
+
+
+def _truthy(value) -> bool:
+    return str(value).lower() in ("1", "true", "yes")
+
+
+def is_offline(scope) -> bool:
+    return _truthy(scope.node.try_get_context(OFFLINE_CONTEXT_KEY)) or _truthy(os.getenv(OFFLINE_ENV))
+
+
+@functools.lru_cache(maxsize=None)
+def load_stub(path: str = STUB_PATH) -> dict:
+    with open(path, 'r') as stub_file:
+        return json.load(stub_file)
+
+
+def ssm_context_key(account: str, region: str, name: str) -> str:
+    return f"ssm:account={account}:parameterName={name}:region={region}"
+
+
+def prefetch_context_key(account: str, region: str) -> str:
+    return f"private5g:ssm-prefetch:account={account}:region={region}"
+
+
+def offline_environment() -> Environment:
+    """The environment offline synths run in: the stub account and the configured region."""
+    return Environment(account=load_stub()["account"], region=load_config().region)
+
+
+def prime_offline_context(app, env: Environment) -> None:
+    """Answer the context lookups CDK makes on its own (availability zones) from the config.
+
+    Must be called before any stack is added to ``app``.
+    """
+    app.node.set_context(
+        f"availability-zones:account={env.account}:region={env.region}",
+        list(load_config(env.region).azs))
+
+
+def string_parameter(scope, name: str) -> str:
+    if is_offline(scope):
+        return load_stub()["parameters"][name]
+
+    stack = Stack.of(scope)
+    marker = scope.node.try_get_context(prefetch_context_key(stack.account, stack.region))
+    if marker and time.time() > marker["fetchedAt"] + marker["ttlSeconds"]:
+        Annotations.of(scope).add_warning(
+            f"Prefetched SSM context is older than {marker['ttlSeconds']}s; "
+            "run 'python -m app_cdk.lookups prefetch' to refresh it.")
+    return ssm.StringParameter.value_from_lookup(scope, name)
+
+
+def vpc(scope, id: str, vpc_id: str) -> ec2.IVpc:
+    if not is_offline(scope):
+        return ec2.Vpc.from_lookup(scope, id, vpc_id=vpc_id)
+
+    attributes = load_stub()["vpcs"][vpc_id]
+    return ec2.Vpc.from_vpc_attributes(
+        scope, id,
+        vpc_id=vpc_id,
+        availability_zones=list(load_config().azs),
+        **attributes,
+    )
+
+
+def _read_context(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as context_file:
+        return json.load(context_file)
+
+
+def prefetch(account: str, region: str, names=PARAMETER_NAMES, context_path: str = CONTEXT_PATH,
+             ttl_seconds: int = DEFAULT_TTL_SECONDS, force: bool = False, client=None) -> dict:
+    """Resolve ``names`` in batches and write them to ``context_path``.
+
+    Returns the parameters that were written; an empty dict means the
+    existing context was still fresh. Parameters that do not exist yet
+    (their stack is not deployed) are left for the CDK CLI to report.
+    """
+    context = _read_context(context_path)
+    marker_key = prefetch_context_key(account, region)
+    marker = context.get(marker_key)
+    if (not force and marker
+            and set(names) <= set(marker["parameters"])
+            and time.time() <= marker["fetchedAt"] + marker["ttlSeconds"]):
+        return {}
+
+    if client is None:
+        import boto3
+        client = boto3.client("ssm", region_name=region)
+
+    names = list(names)
+    resolved = {}
+    for start in range(0, len(names), _BATCH_SIZE):
+        response = client.get_parameters(Names=names[start:start + _BATCH_SIZE])
+        for parameter in response["Parameters"]:
+            resolved[parameter["Name"]] = parameter["Value"]
+
+    for name, value in resolved.items():
+        context[ssm_context_key(account, region, name)] = value
+    context[marker_key] = {
+        "fetchedAt": int(time.time()),
+        "ttlSeconds": ttl_seconds,
+        "parameters": sorted(resolved),
+    }
+
+    with open(context_path, 'w') as context_file:
+        json.dump(context, context_file, indent=2, sort_keys=True)
+        context_file.write("\n")
+    return resolved
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app_cdk.lookups")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    prefetch_parser = subparsers.add_parser("prefetch", help="batch-resolve SSM parameters into cdk.context.json")
+    prefetch_parser.add_argument("--account", default=os.getenv('CDK_DEFAULT_ACCOUNT'))
+    prefetch_parser.add_argument("--region", default=os.getenv('CDK_DEFAULT_REGION'))
+    prefetch_parser.add_argument("--ttl", type=int, default=DEFAULT_TTL_SECONDS, help="seconds before values are refetched")
+    prefetch_parser.add_argument("--force", action="store_true", help="refetch even if the context is fresh")
+    prefetch_parser.add_argument("--context-file", default=CONTEXT_PATH)
+    prefetch_parser.add_argument("--stacks", help="comma-separated stacks to prefetch for (default: all)")
+    args = parser.parse_args(argv)
+
+    names = PARAMETER_NAMES
+    if args.stacks:
+        names = registry.consumed_parameters(registry.resolve(args.stacks.split(",")))
+
+    region = args.region or load_config().region
+    account = args.account
+    if account is None:
+        import boto3
+        account = boto3.client("sts", region_name=region).get_caller_identity()["Account"]
+
+    resolved = prefetch(account, region, names=names, context_path=args.context_file,
+                        ttl_seconds=args.ttl, force=args.force)
+    if not resolved:
+        print("SSM context is fresh, nothing to do.")
+        return 0
+    for name in names:
+        print(f"{name}: {resolved.get(name, '<not found>')}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""Data-plane networks of the multus-nodegroup-stack.
+
+Node groups listing ``multus_networks`` in ``NODE_GROUPS`` get one extra ENI
+per network, created in that network's dedicated subnet (``N3_SUBNET_CIDR``,
+``N6_SUBNET_CIDR``) by the node's user data before kubelet starts. The ENIs
+are tagged ``node.k8s.amazonaws.com/no_manage`` so the VPC CNI never takes
+them over for pod IPs, and they come up as fixed devices (``eth1`` for N3,
+``eth2`` for N6), so GTP-U and N6 traffic leave the primary interface.
+
+Pods reach the ENIs through Multus with an ipvlan NetworkAttachmentDefinition
+per network. whereabouts hands out addresses from the upper half of each
+subnet, which the stack reserves (an explicit subnet CIDR reservation) so
+EC2 never gives those addresses to an ENI. The VPC only delivers addresses
+assigned to an ENI; the UPF claims its pod addresses on the node's ENI at
+start (``upf-claim-ips`` in my_open5gs/upf). Render the definitions with
+
+    python -m app_cdk.multus nads | kubectl apply -f -
+"""
+import argparse
+import ipaddress
+import json
+import sys
+from dataclasses import dataclass
+from typing import Dict, Mapping
+
+import yaml
+
+from app_cdk.config import load_config
+
+# Tag the VPC CNI reads to leave an ENI alone.
+NO_MANAGE_TAG = "node.k8s.amazonaws.com/no_manage"
+NAD_NAMESPACE = "open5gs"
+
+
+@dataclass(frozen=True)
+class DataPlaneNetwork:
+    name: str
+    device_index: int
+    description: str
+
+    @property
+    def device(self) -> str:
+        """Interface name on Amazon Linux 2, which names ENIs after their device index."""
+        return f"eth{self.device_index}"
+
+
+NETWORKS = {
+    "n3": DataPlaneNetwork("n3", 1, "N3 GTP-U between the gNBs and the UPF"),
+    "n6": DataPlaneNetwork("n6", 2, "N6 between the UPF and the data network"),
+}
+
+
+def pod_range(cidr: str) -> str:
+    """The upper half of ``cidr``: reserved in the VPC and allocated to pods by whereabouts."""
+    return str(list(ipaddress.ip_network(cidr).subnets())[1])
+
+
+def gateway(cidr: str) -> str:
+    """The VPC router, the first host of every subnet."""
+    return str(ipaddress.ip_network(cidr).network_address + 1)
+
+
+def render_attach_script(networks, subnet_ids: Mapping[str, str], security_group_id: str, region: str) -> str:
+    """Bash that creates and attaches one ENI per network to this instance.
+
+    Runs from the node's user data (before the interface wait, which then also
+    waits for these ENIs). The ENIs are deleted with the instance.
+    """
+    lines = [
+        "instance_id=$(imds instance-id)",
+        "attach_eni() {",
+        "  local eni attachment",
+        f"  eni=$(aws ec2 create-network-interface --region {region} --subnet-id $2 --groups {security_group_id} \\",
+        '      --description "$NODE_GROUP $1" \\',
+        f'      --tag-specifications "ResourceType=network-interface,Tags=[{{Key={NO_MANAGE_TAG},Value=true}},'
+        '{Key=Name,Value=$NODE_GROUP-$1},{Key=private5g:network,Value=$1}]" \\',
+        "      --query NetworkInterface.NetworkInterfaceId --output text) || return 1",
+        f"  attachment=$(aws ec2 attach-network-interface --region {region} --network-interface-id $eni \\",
+        "      --instance-id $instance_id --device-index $3 --query AttachmentId --output text) || return 1",
+        f"  aws ec2 modify-network-interface-attribute --region {region} --network-interface-id $eni \\",
+        "      --attachment AttachmentId=$attachment,DeleteOnTermination=true",
+        '  echo "private5g-bootstrap attached $eni ($1) as device $3"',
+        "}",
+    ]
+    for name in sorted(networks, key=lambda name: NETWORKS[name].device_index):
+        network = NETWORKS[name]
+        lines.append(f"attach_eni {network.name} {subnet_ids[name]} {network.device_index} "
+                     f'|| echo "private5g-bootstrap could not attach the {network.name} ENI"')
+    return "\n".join(lines)
+
+
+def network_attachment(network: DataPlaneNetwork, cidr: str, namespace: str = NAD_NAMESPACE) -> dict:
+    pods = ipaddress.ip_network(pod_range(cidr))
+    config = {
+        "cniVersion": "0.3.1",
+        "type": "ipvlan",
+        "master": network.device,
+        "mode": "l2",
+        "ipam": {
+            "type": "whereabouts",
+            "range": cidr,
+            "range_start": str(pods.network_address),
+            # The subnet's broadcast address is reserved by the VPC too.
+            "range_end": str(pods.broadcast_address - 1),
+            "gateway": gateway(cidr),
+        },
+    }
+    return {
+        "apiVersion": "k8s.cni.cncf.io/v1",
+        "kind": "NetworkAttachmentDefinition",
+        "metadata": {"name": network.name, "namespace": namespace},
+        "spec": {"config": json.dumps(config, indent=2)},
+    }
+
+
+def network_attachments(cidrs: Mapping[str, str], namespace: str = NAD_NAMESPACE) -> Dict[str, dict]:
+    return {name: network_attachment(NETWORKS[name], cidr, namespace) for name, cidr in sorted(cidrs.items())}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app_cdk.multus")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    nads_parser = subparsers.add_parser("nads", help="print the NetworkAttachmentDefinitions of the data-plane subnets")
+    nads_parser.add_argument("--namespace", default=NAD_NAMESPACE)
+    nads_parser.add_argument("--region", help="region whose variables.<region>.json applies (default: CDK_DEFAULT_REGION)")
+    args = parser.parse_args(argv)
+
+    attachments = network_attachments(load_config(args.region).multus_subnet_cidrs, args.namespace)
+    yaml.safe_dump_all(attachments.values(), sys.stdout, sort_keys=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
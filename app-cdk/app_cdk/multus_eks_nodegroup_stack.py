@@ -0,0 +1,100 @@
+from constructs import Construct
+from aws_cdk import (
+    aws_ec2 as ec2,
+    CfnOutput,
+    CfnResource,
+    CfnTag,
+)
+
+from app_cdk import multus
+from app_cdk.nomultus_eks_nodegroup_stack import NoMultusNodeGroupStack, REGION
+
+
+class MultusNodeGroupStack(NoMultusNodeGroupStack):
+    """``NoMultusNodeGroupStack`` with dedicated N3/N6 ENIs for the data plane.
+
+    Deploy one of the two node group stacks, not both. See ``app_cdk.multus``
+    for how the ENIs reach the UPF pods.
+    """
+
+    def __init__(self, scope: Construct, id: str, **kwargs) -> None:
+        self.data_plane_subnets = {}
+        super().__init__(scope, id, **kwargs)
+
+    def add_data_plane_networks(self, eks_vpc, eks_vpc_id):
+        az = self.config.multus_az
+        # Same route table as the AZ's private subnet: the NAT gateway for N6 and
+        # whatever routes to the RAN (vpn-route-cdk-stack) for N3.
+        route_table_id = next(subnet.route_table.route_table_id for subnet in eks_vpc.private_subnets
+                              if subnet.availability_zone == az)
+
+        for name, cidr in self.config.multus_subnet_cidrs.items():
+            network = multus.NETWORKS[name]
+            prefix = name.upper()
+            subnet = ec2.CfnSubnet(self, f"{prefix}Subnet",
+                availability_zone=az,
+                cidr_block=cidr,
+                vpc_id=eks_vpc_id,
+                tags=[
+                    CfnTag(key="Name", value=f"{name}-{self.stack_name}"),
+                    # Keeps Vpc.from_lookup from counting the subnet among the private
+                    # subnets the node groups and vpn-route-cdk-stack pick from.
+                    CfnTag(key="aws-cdk:subnet-type", value="Isolated"),
+                    CfnTag(key="aws-cdk:subnet-name", value=name),
+                ],
+            )
+            ec2.CfnSubnetRouteTableAssociation(self, f"{prefix}SubnetRtAssoc",
+                route_table_id=route_table_id,
+                subnet_id=subnet.ref,
+            )
+            # EC2 never assigns these addresses to an ENI; whereabouts gives them to pods.
+            CfnResource(self, f"{prefix}PodCidrReservation",
+                type="AWS::EC2::SubnetCidrReservation",
+                properties={
+                    "SubnetId": subnet.ref,
+                    "Cidr": multus.pod_range(cidr),
+                    "ReservationType": "explicit",
+                    "Description": f"{network.description}: pod addresses",
+                },
+            )
+            self.data_plane_subnets[name] = subnet
+            CfnOutput(self, f"{prefix}SubnetIdOutput", value=subnet.ref)
+
+        self.data_plane_security_group = ec2.CfnSecurityGroup(self, "DataPlaneSecurityGroup",
+            group_description="N3/N6 interfaces of the data-plane nodes",
+            vpc_id=eks_vpc_id,
+        )
+        ec2.CfnSecurityGroupIngress(
+            self, "DataPlaneGtpuIngress",
+            description="Allow GTP-U from the gNBs",
+            from_port=2152,
+            group_id=self.data_plane_security_group.ref,
+            ip_protocol="udp",
+            to_port=2152,
+            cidr_ip="0.0.0.0/0"
+        )
+        ec2.CfnSecurityGroupIngress(
+            self, "DataPlaneIcmpIngress",
+            description="Allow ICMP",
+            from_port=-1,
+            group_id=self.data_plane_security_group.ref,
+            ip_protocol="icmp",
+            to_port=-1,
+            cidr_ip="0.0.0.0/0"
+        )
+
+    def node_group_subnets(self, eks_vpc, profile):
+        if not profile.multus_networks:
+            return super().node_group_subnets(eks_vpc, profile)
+        # An ENI can only be attached in its subnet's AZ.
+        return [subnet for subnet in eks_vpc.private_subnets if subnet.availability_zone == self.config.multus_az]
+
+    def attach_interfaces_script(self, profile):
+        if not profile.multus_networks:
+            return ""
+        return multus.render_attach_script(
+            profile.multus_networks,
+            {name: self.data_plane_subnets[name].ref for name in profile.multus_networks},
+            self.data_plane_security_group.ref,
+            REGION,
+        )
@@ -0,0 +1,106 @@
+"""User data for the EKS worker node launch templates.
+
+Instead of sleeping for a fixed time before touching the network, the script
+polls until every ENI listed in the instance metadata shows up in
+``/sys/class/net``, giving up after ``interface_timeout`` seconds. Each phase
+is timed. The timings are logged (cloud-init copies them to
+``/var/log/cloud-init-output.log`` and the console), and once the node has
+signalled CloudFormation they are written as one CloudWatch embedded metric
+format line to ``METRICS_LOG_PATH``.
+
+``attach_interfaces``, when given, runs in its own phase before the wait, so
+ENIs the node attaches to itself (see ``multus.render_attach_script``) are
+waited for as well.
+"""
+from app_cdk import tuning_profiles
+from app_cdk.tuning_profiles import TuningProfile
+
+METRIC_NAMESPACE = "Private5G/NodeBootstrap"
+METRICS_LOG_PATH = "/var/log/private5g/bootstrap-metrics.log"
+INTERFACE_TIMEOUT_SECONDS = 60
+
+# Phase timing and the embedded metric format line, for bash 4.2 (Amazon Linux 2).
+_TIMING_FUNCTIONS = """now_ms() { echo $(( $(date +%s%N) / 1000000 )); }
+script_start=$(now_ms)
+metric_defs=""
+metric_values=""
+phase_begin() { phase_start=$(now_ms); echo "private5g-bootstrap phase=$1 begin"; }
+phase_end() {
+  local ms=$(( $(now_ms) - phase_start ))
+  echo "private5g-bootstrap phase=$1 ms=$ms"
+  metric_defs+="{\\"Name\\":\\"$1\\",\\"Unit\\":\\"Milliseconds\\"},"
+  metric_values+="\\"$1\\":$ms,"
+}
+emit_metrics() {
+  local total=$(( $(now_ms) - script_start ))
+  mkdir -p $(dirname $METRICS_LOG)
+  echo "{\\"_aws\\":{\\"Timestamp\\":$(now_ms),\\"CloudWatchMetrics\\":[{\\"Namespace\\":\\"$METRIC_NAMESPACE\\",\\"Dimensions\\":[[\\"ClusterName\\",\\"NodeGroup\\"]],\\"Metrics\\":[${metric_defs}{\\"Name\\":\\"Total\\",\\"Unit\\":\\"Milliseconds\\"}]}]},\\"ClusterName\\":\\"$CLUSTER_NAME\\",\\"NodeGroup\\":\\"$NODE_GROUP\\",${metric_values}\\"Total\\":$total,\\"InterfacesReady\\":$interfaces_ready}" | tee -a $METRICS_LOG
+}"""
+
+# Number of ENIs attached to this instance according to IMDSv2 (0 if IMDS is unreachable).
+_IMDS_FUNCTIONS = """imds() {
+  local token
+  token=$(curl -sf -X PUT http://169.254.169.254/latest/api/token -H 'X-aws-ec2-metadata-token-ttl-seconds: 60') || return 1
+  curl -sf -H "X-aws-ec2-metadata-token: $token" http://169.254.169.254/latest/meta-data/$1
+}
+attached_enis() { imds network/interfaces/macs/ | grep -c /; }"""
+
+
+def render(cluster_name: str, bootstrap_arguments: str, stack_name: str, resource: str, region: str,
+           tuning: TuningProfile, node_group: str = "", interface_timeout: int = INTERFACE_TIMEOUT_SECONDS,
+           attach_interfaces: str = "") -> str:
+    attach_phase = f"""
+phase_begin InterfaceAttach
+{attach_interfaces}
+phase_end InterfaceAttach
+""" if attach_interfaces else ""
+    return f"""#!/bin/bash
+set -o xtrace
+CLUSTER_NAME={cluster_name}
+NODE_GROUP={node_group or resource}
+METRIC_NAMESPACE={METRIC_NAMESPACE}
+METRICS_LOG={METRICS_LOG_PATH}
+{_TIMING_FUNCTIONS}
+{_IMDS_FUNCTIONS}
+
+phase_begin Sysctl
+{tuning_profiles.render_sysctl(tuning)}
+phase_end Sysctl
+{attach_phase}
+# Wait until every attached ENI has a network device, for at most {interface_timeout}s.
+phase_begin InterfaceWait
+interfaces_ready=0
+deadline=$(( SECONDS + {interface_timeout} ))
+while :; do
+  expected=$(attached_enis); (( expected > 0 )) || expected=1
+  present=$(ls /sys/class/net | grep -c '^eth')
+  if (( present >= expected )); then interfaces_ready=1; break; fi
+  if (( SECONDS >= deadline )); then echo "private5g-bootstrap timed out waiting for $expected interfaces, $present present"; break; fi
+  sleep 0.5
+done
+udevadm settle --timeout=10
+ls /sys/class/net/ > /tmp/ethList;cat /tmp/ethList |while read line ; do sudo ifconfig $line up; done
+grep eth /tmp/ethList |while read line ; do echo "ifconfig $line up" >> /etc/rc.d/rc.local; done
+systemctl enable rc-local
+chmod +x /etc/rc.d/rc.local
+phase_end InterfaceWait
+
+phase_begin InterfaceTuning
+{tuning_profiles.render_interface_tuning(tuning)}
+phase_end InterfaceTuning
+
+phase_begin Bootstrap
+{tuning_profiles.render_kubelet_cpu_args(tuning)}
+/etc/eks/bootstrap.sh {cluster_name} {bootstrap_arguments}
+bootstrap_status=$?
+phase_end Bootstrap
+
+phase_begin CfnSignal
+/opt/aws/bin/cfn-signal --exit-code $bootstrap_status \\
+         --stack  {stack_name} \\
+         --resource {resource}  \\
+         --region {region}
+phase_end CfnSignal
+emit_metrics
+exit $bootstrap_status
+"""
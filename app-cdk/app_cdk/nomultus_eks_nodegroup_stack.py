@@ -1,5 +1,4 @@
 import os
-import json
 
 from constructs import Construct
 from aws_cdk import (
@@ -8,52 +7,73 @@ from aws_cdk import (
     aws_iam as iam,
     aws_eks as eks,
     aws_ssm as ssm,
-    aws_autoscaling as autoscaling,
     aws_route53 as route53,
     Duration,
     CfnTag,
     Fn,
-    CfnUpdatePolicy,
     CfnOutput,
     aws_lambda as _lambda,
-    custom_resources as custom,
     aws_events as events,
     aws_events_targets as targets,
-    CustomResource
-    
 )
 
+from app_cdk import lookups, node_user_data
+from app_cdk.config import load_config
+from app_cdk.tuning_profiles import PROFILES as TUNING_PROFILES
+
 # Constants
 PARAMETER_NAME = "/aws/service/eks/optimized-ami/1.27/amazon-linux-2/recommended/image_id"
-INSTANCE_TYPE = "c5.2xlarge"
-BOOTSTRAP_ARGUMENTS = "--kubelet-extra-args '--node-labels=cnf=xyz'" 
-NODE_AUTOSCALINGGROUP_DESIRED_CAPACITY = 1
-NODE_AUTOSCALINGGROUP_MAX_SIZE = 1
-NODE_AUTOSCALINGGROUP_MIN_SIZE = 1
 REGION = os.getenv('CDK_DEFAULT_REGION')
+FUNCTIONS_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), os.pardir, "functions")
 
-script_dir = os.path.dirname(os.path.realpath(__file__))
-config_path = os.path.join(script_dir, 'config', 'variables.json')
+# Namespace the helm chart is installed into, and the pods whose IPs the zones publish.
+# amf.open5gs.service gets one address per ready AMF instance (amf.instances).
+OPEN5GS_NAMESPACE = "open5gs"
+AMF_POD_LABELS = {"epc-nf": "amf"}
+UPF_POD_LABELS = {"epc-mode": "upf"}
+# Each invocation follows the pod watch for this long; the next one starts a minute after.
+ROUTE53_SYNC_WATCH_SECONDS = 50
+
+TAINT_EFFECTS = {
+    "NoSchedule": eks.TaintEffect.NO_SCHEDULE,
+    "PreferNoSchedule": eks.TaintEffect.PREFER_NO_SCHEDULE,
+    "NoExecute": eks.TaintEffect.NO_EXECUTE,
+}
 
-class NoMultusNodeGroupStack(Stack):
 
+def construct_prefix(profile):
+    """``upf`` -> ``Upf``, ``nf-control`` -> ``NfControl``."""
+    return "".join(part.capitalize() for part in profile.name.split("-"))
 
-    def load_config(self, file_path):
-        with open(file_path, 'r') as config_file:
-            self.config = json.load(config_file)
-            self.key_name = self.config.get("KEY_NAME")
+
+def bootstrap_arguments(profile):
+    # The launch template sets a custom AMI, so EKS does not apply the node
+    # group's labels and taints itself; kubelet has to register them.
+    # $kubelet_cpu_args is set in the user data from the tuning profile.
+    kubelet_args = []
+    if profile.labels:
+        kubelet_args.append("--node-labels=" + ",".join(f"{key}={value}" for key, value in profile.labels))
+    if profile.taints:
+        kubelet_args.append("--register-with-taints=" + ",".join(
+            f"{taint.key}={taint.value}:{taint.effect}" for taint in profile.taints))
+    if TUNING_PROFILES[profile.tuning_profile].cpu_manager_static:
+        kubelet_args.append("$kubelet_cpu_args")
+    return '--kubelet-extra-args "' + " ".join(kubelet_args) + '"'
+
+class NoMultusNodeGroupStack(Stack):
 
     def __init__(self, scope: Construct, id: str, **kwargs) -> None:
         super().__init__(scope, id, **kwargs)
 
-        self.load_config(config_path)
+        self.config = load_config()
+        self.key_name = self.config.key_name
 
         # Lookup VPC
-        eks_vpc_id = ssm.StringParameter.value_from_lookup(self, "EksVpcId")
-        cluster_name = ssm.StringParameter.value_from_lookup(self, "EKSClusterName")
-        cluster_cp_sg = ssm.StringParameter.value_from_lookup(self, "EKSClusterControlSGId")
+        eks_vpc_id = lookups.string_parameter(self, "EksVpcId")
+        cluster_name = lookups.string_parameter(self, "EKSClusterName")
+        cluster_cp_sg = lookups.string_parameter(self, "EKSClusterControlSGId")
         
-        eks_vpc = ec2.Vpc.from_lookup(self,"lookupVPC",vpc_id=eks_vpc_id)
+        eks_vpc = lookups.vpc(self, "lookupVPC", vpc_id=eks_vpc_id)
         eks_cluster = eks.Cluster.from_cluster_attributes(self, "eks-cluster",
                                                           cluster_name=cluster_name,
                                                           vpc=eks_vpc)
@@ -78,6 +98,7 @@ class NoMultusNodeGroupStack(Stack):
         node_instance_role.add_managed_policy(iam.ManagedPolicy.from_aws_managed_policy_name("AmazonEKS_CNI_Policy"))
         node_instance_role.add_managed_policy(iam.ManagedPolicy.from_aws_managed_policy_name("AmazonEC2ContainerRegistryReadOnly"))
         node_instance_role.add_managed_policy(iam.ManagedPolicy.from_aws_managed_policy_name("AWSCloudFormationFullAccess"))
+        node_instance_role.add_managed_policy(iam.ManagedPolicy.from_aws_managed_policy_name("service-role/AmazonEBSCSIDriverPolicy"))
 
         # Define IAM Instance Profile for NodeGroup
         cfn_instance_profile = iam.CfnInstanceProfile(self, "NodeInstanceProfile",roles=[node_instance_role.role_name],path="/")
@@ -178,80 +199,147 @@ class NoMultusNodeGroupStack(Stack):
             cidr_ip="0.0.0.0/0"
         )
 
+        self.add_data_plane_networks(eks_vpc, eks_vpc_id)
+
         # Fetch the node image ID from the SSM Parameter Store   
         node_image_id = ssm.StringParameter.from_string_parameter_attributes(self, "NodeImageId", parameter_name=PARAMETER_NAME, value_type=ssm.ParameterValueType.AWS_EC2_IMAGE_ID)
         
-        # User dat script for EC2 instance
-        my_user_data = f"""#!/bin/bash
-            set -o xtrace
-            echo "net.ipv4.conf.default.rp_filter = 0" | tee -a /etc/sysctl.conf
-            echo "net.ipv4.conf.all.rp_filter = 0" | tee -a /etc/sysctl.conf
-            sudo sysctl -p
-            sleep 30
-            ls /sys/class/net/ > /tmp/ethList;cat /tmp/ethList |while read line ; do sudo ifconfig $line up; done
-            grep eth /tmp/ethList |while read line ; do echo "ifconfig $line up" >> /etc/rc.d/rc.local; done
-            systemctl enable rc-local
-            chmod +x /etc/rc.d/rc.local
-            /etc/eks/bootstrap.sh {cluster_name} {BOOTSTRAP_ARGUMENTS}
-            /opt/aws/bin/cfn-signal --exit-code $? \
-                     --stack  {id} \
-                     --resource NodeGroup  \
-                     --region {REGION}  
+        # One launch template and managed node group per profile in NODE_GROUPS.
+        # All groups share the node role, so aws-auth needs a single mapping.
+        self.node_groups = {}
+        for profile in self.config.node_groups:
+            prefix = construct_prefix(profile)
+            node_group_id = f"{prefix}NodeGroup"
 
-                            """ 
-        # Define the launch template data for EC2 instance
-        launch_template_data_property = ec2.CfnLaunchTemplate.LaunchTemplateDataProperty(
-            instance_type=INSTANCE_TYPE,
-            key_name=self.key_name,
-            block_device_mappings=[
-                ec2.CfnLaunchTemplate.BlockDeviceMappingProperty(
-                    device_name="/dev/xvda",
-                    ebs=ec2.CfnLaunchTemplate.EbsProperty(
-                        delete_on_termination=True,
-                        volume_size=50,
-                        volume_type="gp2"
-                    ))
-            ],
-            user_data=Fn.base64(my_user_data),
-            # iam_instance_profile=ec2.CfnLaunchTemplate.IamInstanceProfileProperty(
-                # arn=cfn_instance_profile.attr_arn,
-            # ),
-            image_id=node_image_id.string_value, 
-            security_group_ids=[node_security_group.ref],
-            metadata_options=ec2.CfnLaunchTemplate.MetadataOptionsProperty(
-                http_put_response_hop_limit=2,
-                http_endpoint="enabled",
-                http_tokens="optional"
-            ),
+            # User data script for EC2 instance, tuned per the profile's tuning_profile
+            my_user_data = node_user_data.render(
+                cluster_name=cluster_name,
+                bootstrap_arguments=bootstrap_arguments(profile),
+                stack_name=id,
+                resource=node_group_id,
+                region=REGION,
+                tuning=TUNING_PROFILES[profile.tuning_profile],
+                node_group=profile.name,
+                attach_interfaces=self.attach_interfaces_script(profile),
+            )
+            # Define the launch template data for EC2 instance
+            launch_template_data_property = ec2.CfnLaunchTemplate.LaunchTemplateDataProperty(
+                instance_type=profile.instance_type,
+                key_name=self.key_name,
+                block_device_mappings=[
+                    ec2.CfnLaunchTemplate.BlockDeviceMappingProperty(
+                        device_name="/dev/xvda",
+                        ebs=ec2.CfnLaunchTemplate.EbsProperty(
+                            delete_on_termination=True,
+                            volume_size=50,
+                            volume_type="gp2"
+                        ))
+                ],
+                user_data=Fn.base64(my_user_data),
+                image_id=node_image_id.string_value, 
+                security_group_ids=[node_security_group.ref],
+                metadata_options=ec2.CfnLaunchTemplate.MetadataOptionsProperty(
+                    http_put_response_hop_limit=2,
+                    http_endpoint="enabled",
+                    http_tokens="optional"
+                ),
+            )
             
+            # Create the launch template for EC2 instances
+            node_launch_template = ec2.CfnLaunchTemplate(self, f"{prefix}NodeLaunchTemplate",
+                launch_template_data=launch_template_data_property
+            )
+
+            ng = eks.Nodegroup(
+                self,
+                node_group_id,
+                cluster=eks_cluster,
+                node_role=node_instance_role,
+                min_size=profile.min_size,
+                desired_size=profile.desired_size,
+                max_size=profile.max_size,
+                labels=dict(profile.labels),
+                taints=[
+                    eks.TaintSpec(key=taint.key, value=taint.value, effect=TAINT_EFFECTS[taint.effect])
+                    for taint in profile.taints
+                ],
+                launch_template_spec={
+                    "id": node_launch_template.ref,
+                    "version": node_launch_template.attr_latest_version_number
+                },
+                subnets=ec2.SubnetSelection(
+                    one_per_az=True,
+                    subnets=self.node_group_subnets(eks_vpc, profile),
+                ),
+            )
+            self.node_groups[profile.name] = ng
+            CfnOutput(self, f"{prefix}NodeGroupNameOutput", value=ng.nodegroup_name)
+
+        # Provisions the MongoDB volumes when the chart runs it as a StatefulSet
+        # (mongodb.persistence). The driver uses the node role's EBS policy.
+        ebs_csi_addon = eks.CfnAddon(self, "EbsCsiDriverAddon",
+            addon_name="aws-ebs-csi-driver",
+            cluster_name=cluster_name,
+            resolve_conflicts="OVERWRITE",
         )
-        
-        # Create the launch template for EC2 instances
-        node_launch_template = ec2.CfnLaunchTemplate(self, "NodeLaunchTemplate",
-            launch_template_data=launch_template_data_property
-        )
+        for ng in self.node_groups.values():
+            ebs_csi_addon.node.add_dependency(ng)
 
-        ng = eks.Nodegroup(
-            self,
-            "NodeGroup",
-            cluster=eks_cluster,
-            min_size=NODE_AUTOSCALINGGROUP_MIN_SIZE,
-            desired_size=NODE_AUTOSCALINGGROUP_DESIRED_CAPACITY,
-            max_size=NODE_AUTOSCALINGGROUP_MAX_SIZE,
-            launch_template_spec={
-                "id": node_launch_template.ref,
-                "version": node_launch_template.attr_latest_version_number
+        # Keep the AMF/UPF records pointed at the pods. The function's role must be
+        # mapped to the route53-sync user in aws-auth (see eks_config/aws-auth-cm.yaml).
+        route53_sync_role = iam.Role(self, "Route53SyncRole", assumed_by=iam.ServicePrincipal("lambda.amazonaws.com"))
+        route53_sync_role.add_managed_policy(iam.ManagedPolicy.from_aws_managed_policy_name("service-role/AWSLambdaBasicExecutionRole"))
+        route53_sync_role.add_to_policy(iam.PolicyStatement(
+            actions=["route53:ChangeResourceRecordSets", "route53:ListResourceRecordSets"],
+            resources=[upf_hosted_zone.hosted_zone_arn, amf_hosted_zone.hosted_zone_arn],
+        ))
+        route53_sync_role.add_to_policy(iam.PolicyStatement(
+            actions=["eks:DescribeCluster"],
+            resources=[eks_cluster.cluster_arn],
+        ))
+
+        route53_sync_function = _lambda.Function(self, "Route53SyncFunction",
+            runtime=_lambda.Runtime.PYTHON_3_11,
+            code=_lambda.Code.from_asset(FUNCTIONS_DIR, exclude=["**/__pycache__"]),
+            handler="route53_sync.handler.handler",
+            role=route53_sync_role,
+            timeout=Duration.seconds(ROUTE53_SYNC_WATCH_SECONDS + 10),
+            environment={
+                "CLUSTER_NAME": cluster_name,
+                "NAMESPACE": OPEN5GS_NAMESPACE,
+                "WATCH_SECONDS": str(ROUTE53_SYNC_WATCH_SECONDS),
+                "TARGETS": self.to_json_string([
+                    {"record_name": "amf.open5gs.service", "hosted_zone_id": amf_hosted_zone.hosted_zone_id,
+                     "labels": AMF_POD_LABELS},
+                    {"record_name": "upf.open5gs.service", "hosted_zone_id": upf_hosted_zone.hosted_zone_id,
+                     "labels": UPF_POD_LABELS},
+                ]),
             },
-            subnets=ec2.SubnetSelection(
-                one_per_az=True,
-                subnets=[eks_vpc.private_subnets[0]],
-            ),
+        )
+        events.Rule(self, "Route53SyncSchedule",
+            schedule=events.Schedule.rate(Duration.minutes(1)),
+            targets=[targets.LambdaFunction(route53_sync_function)],
         )
 
-        ssm.StringParameter(self, "SSMNGRoleArn", parameter_name="NGRoleArn", string_value=ng.role.role_arn)
+        ssm.StringParameter(self, "SSMNGRoleArn", parameter_name="NGRoleArn", string_value=node_instance_role.role_arn)
+        ssm.StringParameter(self, "SSMRoute53SyncRoleArn", parameter_name="Route53SyncRoleArn", string_value=route53_sync_role.role_arn)
 
-        CfnOutput(self, "NodeGroupNameOutput", value=ng.nodegroup_name)
-        CfnOutput(self, "NodeGroupRoleOutput", value=ng.role.role_arn)
+        CfnOutput(self, "NodeGroupRoleOutput", value=node_instance_role.role_arn)
         CfnOutput(self, "ClusterNameOutput", value=cluster_name)
         CfnOutput(self, "UpfHostedZoneIdOutput", value=upf_hosted_zone.hosted_zone_id)
-        CfnOutput(self, "AmfHostedZoneIdOutput", value=amf_hosted_zone.hosted_zone_id)
\ No newline at end of file
+        CfnOutput(self, "AmfHostedZoneIdOutput", value=amf_hosted_zone.hosted_zone_id)
+        CfnOutput(self, "Route53SyncRoleOutput", value=route53_sync_role.role_arn)
+
+    # Overridden by MultusNodeGroupStack, which gives the node groups listing
+    # multus_networks dedicated data-plane ENIs.
+
+    def add_data_plane_networks(self, eks_vpc, eks_vpc_id):
+        """Create what the node groups' extra interfaces need; runs before the node groups are added."""
+
+    def node_group_subnets(self, eks_vpc, profile):
+        # Spread the group over every AZ it is allowed in.
+        return [subnet for subnet in eks_vpc.private_subnets if subnet.availability_zone in profile.azs]
+
+    def attach_interfaces_script(self, profile):
+        """User data attaching the group's extra interfaces at boot; none here."""
+        return ""
\ No newline at end of file
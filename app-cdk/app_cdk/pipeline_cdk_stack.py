@@ -1,6 +1,7 @@
 import os
 from constructs import Construct
 from aws_cdk import (
+    Duration,
     Stack,
     CfnOutput,
     aws_codecommit as codecommit,
@@ -8,17 +9,32 @@ from aws_cdk import (
     aws_codebuild as codebuild,
     aws_codepipeline_actions as codepipeline_actions,
     aws_iam as iam,
+    aws_s3 as s3,
     aws_ssm as ssm
 )
 
+from app_cdk import lookups
+from app_cdk.config import load_config
+from app_cdk.shared import ueransim_artifact_key
+
 IMAGE_TAG="v265"
 
+BUILD_IMAGE = codebuild.LinuxBuildImage.STANDARD_7_0
+
+# Image-Build action name -> Dockerfile targets it builds (IMAGE_TARGETS in buildspec_test.yaml).
+IMAGE_BUILDS = {
+    "Image-Build-Core": "runtime upf",
+    "Image-Build-Provision": "provision",
+}
+
+
 class PipelineCdkStack(Stack):
     def __init__(self, scope: Construct, id: str, **kwargs) -> None:
         super().__init__(scope, id, **kwargs)
 
-        ecr_repository_uri = ssm.StringParameter.value_from_lookup(self, "EcrRepositoryUri")
-        cluster_name = ssm.StringParameter.value_from_lookup(self, "EKSClusterName")
+        self.config = load_config()
+        ecr_repository_uri = lookups.string_parameter(self, "EcrRepositoryUri")
+        cluster_name = lookups.string_parameter(self, "EKSClusterName")
         
         # # create new role for codebuild
         codebuild_role=iam.Role(
@@ -45,66 +61,104 @@ class PipelineCdkStack(Stack):
             self, "Private5GPipeline", cross_account_keys=False
         )
 
-        codeQualityBuild = codebuild.PipelineProject(
-            self, "CodeQuality",
+        # kubectl/helm (and pip's wheels) survive between builds in this bucket instead of being
+        # downloaded on every run. The buildspecs pin the tool versions and list the cached paths.
+        cache_bucket = s3.Bucket(
+            self, "BuildCacheBucket",
+            block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
+            encryption=s3.BucketEncryption.S3_MANAGED,
+            enforce_ssl=True,
+            lifecycle_rules=[s3.LifecycleRule(expiration=Duration.days(30))],
+        )
+
+        # Versioned UERANSIM tarballs, built once per UERANSIM_VERSION and fetched by the RAN instances.
+        ueransim_bucket = s3.Bucket(
+            self, "UeransimArtifacts",
+            block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
+            encryption=s3.BucketEncryption.S3_MANAGED,
+            enforce_ssl=True,
+        )
+        ueransim_bucket.grant_read_write(codebuild_role)
+
+        def environment_variables(**variables):
+            return {
+                name: codebuild.BuildEnvironmentVariable(
+                    type=codebuild.BuildEnvironmentVariableType.PLAINTEXT,
+                    value=value
+                ) for name, value in variables.items()
+            }
+
+        image_build_project = codebuild.PipelineProject(
+            self, "ImageBuild",
             build_spec=codebuild.BuildSpec.from_source_filename(
             "./buildspec_test.yaml"
             ),
             environment=codebuild.BuildEnvironment(
-                build_image=codebuild.LinuxBuildImage.STANDARD_6_0,
+                build_image=BUILD_IMAGE,
                 privileged=True,
                 compute_type=codebuild.ComputeType.LARGE,
-                environment_variables={
-                    "IMAGE_TAG": codebuild.BuildEnvironmentVariable(
-                        type=codebuild.BuildEnvironmentVariableType.PLAINTEXT,
-                        value=IMAGE_TAG
-                    ),
-                    "IMAGE_REPO_URI": codebuild.BuildEnvironmentVariable(
-                        type=codebuild.BuildEnvironmentVariableType.PLAINTEXT,
-                        value=ecr_repository_uri
-                    ),
-                    "AWS_DEFAULT_REGION": codebuild.BuildEnvironmentVariable(
-                        type=codebuild.BuildEnvironmentVariableType.PLAINTEXT,
-                        value=os.environ["CDK_DEFAULT_REGION"]
-                    )
-                }
+                environment_variables=environment_variables(
+                    IMAGE_TAG=IMAGE_TAG,
+                    IMAGE_REPO_URI=ecr_repository_uri,
+                    AWS_DEFAULT_REGION=os.environ["CDK_DEFAULT_REGION"],
+                )
             ),
+            # Layers also come from the registry cache; the local cache saves re-pulling
+            # the BuildKit image and the source on a warm build host.
+            cache=codebuild.Cache.local(codebuild.LocalCacheMode.DOCKER_LAYER, codebuild.LocalCacheMode.SOURCE),
             role=codebuild_role,
         )
 
-        docker_build_project = codebuild.PipelineProject(
-            self, "DockerBuild",
+        unit_test_project = codebuild.PipelineProject(
+            self, "UnitTest",
+            build_spec=codebuild.BuildSpec.from_source_filename("./buildspec_unit.yaml"),
+            environment=codebuild.BuildEnvironment(
+                build_image=BUILD_IMAGE,
+                compute_type=codebuild.ComputeType.MEDIUM,
+                environment_variables=environment_variables(
+                    AWS_DEFAULT_REGION=os.environ["CDK_DEFAULT_REGION"],
+                )
+            ),
+            cache=codebuild.Cache.bucket(cache_bucket, prefix="unit-test"),
+            role=codebuild_role,
+        )
+
+        deploy_project = codebuild.PipelineProject(
+            self, "HelmDeploy",
             build_spec=codebuild.BuildSpec.from_source_filename("./buildspec_docker.yaml"),
             environment=codebuild.BuildEnvironment(
-                build_image=codebuild.LinuxBuildImage.STANDARD_5_0,
+                build_image=BUILD_IMAGE,
+                compute_type=codebuild.ComputeType.SMALL,
+                environment_variables=environment_variables(
+                    IMAGE_TAG=IMAGE_TAG,
+                    IMAGE_REPO_URI=ecr_repository_uri,
+                    AWS_DEFAULT_REGION=os.environ["CDK_DEFAULT_REGION"],
+                    CLUSTER_NAME=cluster_name,
+                )
+            ),
+            cache=codebuild.Cache.bucket(cache_bucket, prefix="deploy"),
+            role=codebuild_role,
+        )
+
+        ueransim_build_project = codebuild.PipelineProject(
+            self, "UeransimBuild",
+            build_spec=codebuild.BuildSpec.from_source_filename("./buildspec_ueransim.yaml"),
+            environment=codebuild.BuildEnvironment(
+                build_image=BUILD_IMAGE,
                 privileged=True,
-                compute_type=codebuild.ComputeType.LARGE,
-                environment_variables={
-                    "IMAGE_TAG": codebuild.BuildEnvironmentVariable(
-                        type=codebuild.BuildEnvironmentVariableType.PLAINTEXT,
-                        value=IMAGE_TAG
-                    ),
-                    "IMAGE_REPO_URI": codebuild.BuildEnvironmentVariable(
-                        type=codebuild.BuildEnvironmentVariableType.PLAINTEXT,
-                        value=ecr_repository_uri
-                    ),
-                    "AWS_DEFAULT_REGION": codebuild.BuildEnvironmentVariable(
-                        type=codebuild.BuildEnvironmentVariableType.PLAINTEXT,
-                        value=os.environ["CDK_DEFAULT_REGION"]
-                    ),
-                    "CLUSTER_NAME": codebuild.BuildEnvironmentVariable(
-                        type=codebuild.BuildEnvironmentVariableType.PLAINTEXT,
-                        value=cluster_name
-                    ),
-                }
+                compute_type=codebuild.ComputeType.MEDIUM,
+                environment_variables=environment_variables(
+                    UERANSIM_VERSION=self.config.ueransim_version,
+                    ARTIFACT_BUCKET=ueransim_bucket.bucket_name,
+                    ARTIFACT_KEY=ueransim_artifact_key(self.config.ueransim_version),
+                    AWS_DEFAULT_REGION=os.environ["CDK_DEFAULT_REGION"],
+                )
             ),
             role=codebuild_role,
         )
 
         source_output = codepipeline.Artifact()
-        unit_test_output = codepipeline.Artifact()
-        docker_build_output = codepipeline.Artifact()
-        
+
         source_action = codepipeline_actions.CodeCommitSourceAction(
             action_name="CodeCommit",
             repository=repo,
@@ -118,32 +172,61 @@ class PipelineCdkStack(Stack):
             actions=[source_action]
         )
 
-        build_action = codepipeline_actions.CodeBuildAction(
+        # Everything in Build only needs the source, so it all runs at once. The UPF image
+        # is built on top of runtime, so those two share an action; provision has no
+        # common layers with them and gets its own.
+        build_actions = [
+            codepipeline_actions.CodeBuildAction(
+                action_name=action_name,
+                project=image_build_project,
+                input=source_output,
+                environment_variables=environment_variables(IMAGE_TARGETS=targets),
+                run_order=1
+            ) for action_name, targets in IMAGE_BUILDS.items()
+        ]
+        build_actions.append(codepipeline_actions.CodeBuildAction(
             action_name="Unit-Test",
-            project=codeQualityBuild,
-            input=source_output, 
-            outputs=[unit_test_output]
+            project=unit_test_project,
+            input=source_output,
+            run_order=1
+        ))
+
+        pipeline.add_stage(
+            stage_name="Build",
+            actions=build_actions
         )
-        
+
+        # The chart deploys the images pushed above, and only once the tests have passed.
+        deploy_action = codepipeline_actions.CodeBuildAction(
+            action_name="Helm-Deploy",
+            project=deploy_project,
+            input=source_output,
+            run_order=1
+        )
+
         pipeline.add_stage(
-            stage_name="Code-Quality-Testing",
-            actions=[build_action]
-        )        
-        
-        docker_build_action = codepipeline_actions.CodeBuildAction(
-            action_name="Docker-Build",
-            project=docker_build_project,
+            stage_name="Deploy",
+            actions=[deploy_action]
+        )
+
+        # The RAN side is not needed to deploy the core, so its build must not hold up
+        # Helm-Deploy. It only compiles when UERANSIM_VERSION has no tarball yet.
+        ueransim_build_action = codepipeline_actions.CodeBuildAction(
+            action_name="Ueransim-Build",
+            project=ueransim_build_project,
             input=source_output,
-            outputs=[docker_build_output]
+            run_order=1
         )
 
         pipeline.add_stage(
-            stage_name="Docker-Build",
-            actions=[docker_build_action]
+            stage_name="RAN-Build",
+            actions=[ueransim_build_action]
         )
 
         ssm.StringParameter(self, "SSMCodeCommitUri", parameter_name="CodeCommitUri", string_value=repo.repository_clone_url_http)
         ssm.StringParameter(self, "SSMCodeBuildRoleArn", parameter_name="CodeBuildRoleArn", string_value=codebuild_role.role_arn)
+        ssm.StringParameter(self, "SSMUeransimArtifactBucket", parameter_name="UeransimArtifactBucket",
+                            string_value=ueransim_bucket.bucket_name)
 
         CfnOutput(
             self, 'CodeCommitRepositoryUrl',
@@ -0,0 +1,137 @@
+"""Registry of the app's stacks and the SSM parameters that wire them together.
+
+Stacks never reference each other directly: a producer writes an SSM
+parameter (``EksVpcId``, ``TgwId``, ...) and a consumer looks it up. Each
+``StackSpec`` declares those edges, so a selection such as
+
+    cdk synth -c stacks=no-multus-nodegroup-stack
+
+can be expanded to the stacks that produce what it reads, and only those
+stacks are imported and constructed. ``PRIVATE5G_STACKS`` works the same
+way as the ``stacks`` context key. Without a selection every stack is built
+except the alternatives: a spec with ``alternative_to`` replaces that stack,
+is built only when it is named, and may not be selected together with it.
+
+The edges are used to pick what to synth; no CloudFormation dependency is
+added between the stacks, so ``cdk deploy <stack>`` still deploys just
+that stack.
+"""
+import importlib
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+STACKS_CONTEXT_KEY = "stacks"
+STACKS_ENV = "PRIVATE5G_STACKS"
+
+
+@dataclass(frozen=True)
+class StackSpec:
+    name: str
+    module: str
+    class_name: str
+    produces: Tuple[str, ...] = ()
+    consumes: Tuple[str, ...] = ()
+    # Name of the stack this one replaces; both create the same resources.
+    alternative_to: Optional[str] = None
+
+    def load(self):
+        return getattr(importlib.import_module(self.module), self.class_name)
+
+
+STACKS = (
+    StackSpec("eks-vpc-cdk-stack", "app_cdk.eks_vpc_cdk_stack", "EksVpcCdkStack",
+              produces=("EksVpcId",)),
+    StackSpec("eks-infra-cf-stack", "app_cdk.eks_infra_cf_cdk_stack", "EksInfraCFStack",
+              produces=("EKSClusterName", "EKSClusterControlSGId"),
+              consumes=("EksVpcId",)),
+    StackSpec("no-multus-nodegroup-stack", "app_cdk.nomultus_eks_nodegroup_stack", "NoMultusNodeGroupStack",
+              produces=("NGRoleArn", "Route53SyncRoleArn"),
+              consumes=("EksVpcId", "EKSClusterName", "EKSClusterControlSGId")),
+    # no-multus-nodegroup-stack with dedicated N3/N6 ENIs.
+    StackSpec("multus-nodegroup-stack", "app_cdk.multus_eks_nodegroup_stack", "MultusNodeGroupStack",
+              produces=("NGRoleArn", "Route53SyncRoleArn"),
+              consumes=("EksVpcId", "EKSClusterName", "EKSClusterControlSGId"),
+              alternative_to="no-multus-nodegroup-stack"),
+    # Also reads UeransimArtifactBucket, but at deploy time through CloudFormation, not
+    # at synth: deploy pipeline-cdk-stack first.
+    StackSpec("customer-vpc-cdk-stack", "app_cdk.customer_vpc_cdk_stack", "CustomerVpcCdkStack",
+              produces=("CustomerVpcId", "CustomerGWInstanceEIP", "CustomerGWInstanceId")),
+    StackSpec("tgw-vpn-cdk-stack", "app_cdk.tgw_vpn_cdk_stack", "TransitGatewayVPNStack",
+              produces=("TgwId", "VpnConnections"),
+              consumes=("EksVpcId", "CustomerGWInstanceEIP")),
+    StackSpec("vpn-route-cdk-stack", "app_cdk.vpn_route_cdk_stack", "VpnRouteCdkStack",
+              consumes=("EksVpcId", "TgwId", "CustomerGWInstanceId", "CustomerVpcId")),
+    StackSpec("ecr-cdk-stack", "app_cdk.ecr_cdk_stack", "EcrCdkStack",
+              produces=("EcrRepositoryUri",)),
+    StackSpec("pipeline-cdk-stack", "app_cdk.pipeline_cdk_stack", "PipelineCdkStack",
+              produces=("CodeCommitUri", "CodeBuildRoleArn", "UeransimArtifactBucket"),
+              consumes=("EcrRepositoryUri", "EKSClusterName")),
+)
+
+_BY_NAME = {spec.name: spec for spec in STACKS}
+# Alternatives produce their parameters only when they are selected (see dependencies()).
+_PRODUCERS = {parameter: spec for spec in STACKS if spec.alternative_to is None for parameter in spec.produces}
+
+
+def get(name: str) -> StackSpec:
+    try:
+        return _BY_NAME[name]
+    except KeyError:
+        raise ValueError(f"unknown stack {name!r}; known stacks: {', '.join(_BY_NAME)}") from None
+
+
+def dependencies(spec: StackSpec, selected: Sequence[StackSpec] = ()) -> List[StackSpec]:
+    """The stacks that produce the parameters ``spec`` consumes, preferring those in ``selected``."""
+    producers = []
+    for parameter in spec.consumes:
+        producer = next((other for other in selected if parameter in other.produces), _PRODUCERS.get(parameter))
+        if producer is not None and producer not in producers:
+            producers.append(producer)
+    return producers
+
+
+def resolve(names: Optional[Sequence[str]] = None) -> List[StackSpec]:
+    """Expand ``names`` with their transitive producers, in registry order.
+
+    Without ``names``, every stack that is not an alternative.
+    """
+    if names is None:
+        return [spec for spec in STACKS if spec.alternative_to is None]
+
+    selected = [get(name) for name in names]
+    wanted = set()
+    pending = list(selected)
+    while pending:
+        spec = pending.pop()
+        if spec.name not in wanted:
+            wanted.add(spec.name)
+            pending.extend(dependencies(spec, selected))
+    specs = [spec for spec in STACKS if spec.name in wanted]
+    for spec in specs:
+        if spec.alternative_to in wanted:
+            raise ValueError(f"{spec.name} replaces {spec.alternative_to}; select only one of them")
+    return specs
+
+
+def consumed_parameters(specs: Sequence[StackSpec] = STACKS) -> Tuple[str, ...]:
+    parameters = []
+    for spec in specs:
+        for parameter in spec.consumes:
+            if parameter not in parameters:
+                parameters.append(parameter)
+    return tuple(parameters)
+
+
+def selected_stack_names(app) -> Optional[List[str]]:
+    value = app.node.try_get_context(STACKS_CONTEXT_KEY) or os.getenv(STACKS_ENV)
+    if not value:
+        return None
+    if isinstance(value, str):
+        value = value.split(",")
+    return [name.strip() for name in value if name.strip()]
+
+
+def build(app, env, specs: Sequence[StackSpec] = STACKS) -> Dict[str, object]:
+    """Import and construct ``specs`` (usually the result of ``resolve``) in ``app``."""
+    return {spec.name: spec.load()(app, spec.name, env=env) for spec in specs}
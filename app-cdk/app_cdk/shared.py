@@ -0,0 +1,17 @@
+"""Names two stacks have to agree on.
+
+Stacks never import each other (see ``registry``); a value one stack writes
+and another reads, beyond the SSM parameters, lives here instead.
+"""
+
+# The RAN instances run Ubuntu 22.04 on x86_64, like loadtest/ueransim's builder stage.
+UERANSIM_ARTIFACT_PLATFORM = "ubuntu22.04-amd64"
+
+# tgw-vpn-cdk-stack tags the tunnels' pre-shared key secrets with this;
+# customer-vpc-cdk-stack's gateway may read only the secrets carrying it.
+VPN_PSK_TAG = "private5g:vpn-psk"
+
+
+def ueransim_artifact_key(version):
+    """S3 key of the UERANSIM tarball of ``version``; its SHA-256 is at the same key plus ``.sha256``."""
+    return f"ueransim/{version}/ueransim-{version}-{UERANSIM_ARTIFACT_PLATFORM}.tar.gz"
@@ -2,28 +2,56 @@ from constructs import Construct
 from aws_cdk import (
     Stack,
     aws_ec2 as ec2,
+    aws_secretsmanager as secretsmanager,
     aws_ssm as ssm,
     CfnTag,
-    CfnOutput
+    CfnOutput,
+    Tags
 )
 
+from app_cdk import lookups
+from app_cdk.config import load_config
+from app_cdk.shared import VPN_PSK_TAG
+
 # Configuration constants
 BGP_ASN = 65016
+# The Transit Gateway's default, set explicitly since the customer gateway reads it from VpnConnections.
+AMAZON_SIDE_ASN = 64512
+# AWS accepts 8-64 letters, digits, periods and underscores, not starting with 0.
+PSK_LENGTH = 32
 
 class TransitGatewayVPNStack(Stack):
+    """Transit Gateway with ``VPN_CONNECTIONS`` Site-to-Site VPNs to the customer gateway.
+
+    Every tunnel runs BGP, and the Transit Gateway spreads traffic over the
+    tunnels with ECMP, so the RAN-to-core bandwidth grows with the number of
+    connections. Each tunnel's pre-shared key is generated into its own
+    Secrets Manager secret. The ``VpnConnections`` parameter holds both BGP
+    ASNs and lists the connections with their tunnels' inside CIDRs and key
+    secrets.
+    """
 
     def __init__(self, scope: Construct, id: str, **kwargs) -> None:
         super().__init__(scope, id, **kwargs)
 
+        self.config = load_config()
+
         # Retrieve VPC using eks_vpc_id
-        eks_vpc_id = ssm.StringParameter.value_from_lookup(self, "EksVpcId")
-        eks_vpc = ec2.Vpc.from_lookup(self, "LookupVPC", vpc_id=eks_vpc_id)
+        eks_vpc_id = lookups.string_parameter(self, "EksVpcId")
+        eks_vpc = lookups.vpc(self, "LookupVPC", vpc_id=eks_vpc_id)
 
-        cgw_ip = ssm.StringParameter.value_from_lookup(self, "CustomerGWInstanceEIP")
+        cgw_ip = lookups.string_parameter(self, "CustomerGWInstanceEIP")
 
 
-        # Create a Transit Gateway
-        cfn_tgw = ec2.CfnTransitGateway(self, "MyTGW")
+        # Create a Transit Gateway. ECMP needs the VPN attachments' BGP routes
+        # in the route table the VPC attachment uses, hence the default
+        # association and propagation.
+        cfn_tgw = ec2.CfnTransitGateway(self, "MyTGW",
+            amazon_side_asn=AMAZON_SIDE_ASN,
+            vpn_ecmp_support="enable",
+            default_route_table_association="enable",
+            default_route_table_propagation="enable",
+        )
 
         ssm.StringParameter(self, "SSMTgwId", parameter_name="TgwId", string_value=cfn_tgw.ref)
 
@@ -44,23 +72,51 @@ class TransitGatewayVPNStack(Stack):
             type="ipsec.1"
         )
 
-        # Create VPN Connection
-        ec2.CfnVPNConnection(self, "Site2SiteVPN",
-            transit_gateway_id=cfn_tgw.ref,
-            customer_gateway_id=cgw.ref,
-            static_routes_only=False,
-            type="ipsec.1",
-            vpn_tunnel_options_specifications=[
-                ec2.CfnVPNConnection.VpnTunnelOptionsSpecificationProperty(
-                    pre_shared_key="strongswan_awsvpn",
-                    tunnel_inside_cidr="169.254.11.0/30"
-                ),
-                ec2.CfnVPNConnection.VpnTunnelOptionsSpecificationProperty(
-                    pre_shared_key="strongswan_awsvpn",
-                    tunnel_inside_cidr="169.254.12.0/30"
+        # Create the VPN Connections, all to the same customer gateway
+        connections = []
+        for index, inside_cidrs in enumerate(self.config.vpn_tunnel_inside_cidrs, start=1):
+            tunnels = []
+            for tunnel, inside_cidr in enumerate(inside_cidrs, start=1):
+                psk = secretsmanager.Secret(self, f"Vpn{index}Tunnel{tunnel}Psk",
+                    description=f"Pre-shared key of tunnel {tunnel} of VPN connection {index} ({inside_cidr})",
+                    generate_secret_string=secretsmanager.SecretStringGenerator(
+                        password_length=PSK_LENGTH,
+                        exclude_punctuation=True,
+                        include_space=False,
+                        exclude_characters="0",
+                    ),
                 )
-            ]
-        )
+                # The customer gateway instance may read the secrets with this tag.
+                Tags.of(psk).add(VPN_PSK_TAG, "true")
+                tunnels.append((inside_cidr, psk))
+
+            vpn = ec2.CfnVPNConnection(self, f"Site2SiteVPN{index}",
+                transit_gateway_id=cfn_tgw.ref,
+                customer_gateway_id=cgw.ref,
+                static_routes_only=False,
+                type="ipsec.1",
+                vpn_tunnel_options_specifications=[
+                    ec2.CfnVPNConnection.VpnTunnelOptionsSpecificationProperty(
+                        pre_shared_key=psk.secret_value.unsafe_unwrap(),
+                        tunnel_inside_cidr=inside_cidr
+                    )
+                    for inside_cidr, psk in tunnels
+                ],
+                tags=[CfnTag(key="Name", value=f"{self.stack_name}-{index}")],
+            )
+            connections.append({
+                "id": vpn.ref,
+                "tunnels": [{"inside_cidr": inside_cidr, "psk_secret_arn": psk.secret_arn}
+                            for inside_cidr, psk in tunnels],
+            })
+            CfnOutput(self, f"VpnConnection{index}Id", value=vpn.ref)
+
+        ssm.StringParameter(self, "SSMVpnConnections", parameter_name="VpnConnections",
+                            string_value=self.to_json_string({
+                                "amazon_side_asn": AMAZON_SIDE_ASN,
+                                "customer_side_asn": BGP_ASN,
+                                "connections": connections,
+                            }))
 
         # Output
-        CfnOutput(self, "TransitGatewayId", value=cfn_tgw.ref)
\ No newline at end of file
+        CfnOutput(self, "TransitGatewayId", value=cfn_tgw.ref)
@@ -0,0 +1,176 @@
+"""Host tuning profiles for worker nodes, rendered into launch template user data.
+
+A node group selects a profile by name (``tuning_profile`` in
+``NODE_GROUPS``). Bump a profile's ``version`` whenever its settings change;
+the version is written to ``/etc/private5g/tuning-profile`` on the node and
+changes the user data, so the node group rolls onto the new settings.
+
+CPUs are split into housekeeping CPUs, which take interrupts, receive
+packet steering and system daemons, and the top ``isolated_cpus`` CPUs,
+which are left for the UPF. The split is computed on the node because the
+vCPU count depends on the instance type.
+
+With ``cpu_manager_static`` the kubelet runs the static CPU manager with the
+housekeeping CPUs (CPU 0 when nothing is isolated) as ``--reserved-cpus``,
+so pods with Guaranteed QoS and whole-CPU requests, such as the UPF and
+SMF, get exclusive cores out of the rest.
+"""
+from dataclasses import dataclass
+from typing import Tuple
+
+SYSCTL_PATH = "/etc/sysctl.d/90-private5g.conf"
+PROFILE_MARKER_PATH = "/etc/private5g/tuning-profile"
+
+# Prints the /sys cpumask (comma-separated 32-bit hex words) for a list of CPUs.
+_CPUMASK_FUNCTION = """cpumask() {
+  local max=0 cpu i word out=""
+  for cpu in "$@"; do (( cpu > max )) && max=$cpu; done
+  for (( i = max / 32; i >= 0; i-- )); do
+    word=0
+    for cpu in "$@"; do (( cpu / 32 == i )) && word=$(( word | 1 << (cpu % 32) )); done
+    out+=$(printf '%08x' $word)
+    (( i > 0 )) && out+=","
+  done
+  echo $out
+}"""
+
+
+@dataclass(frozen=True)
+class TuningProfile:
+    name: str
+    version: int
+    sysctls: Tuple[Tuple[str, str], ...]
+    # Steer receive processing (RPS) and transmit queues (XPS) to housekeeping CPUs.
+    packet_steering: bool = False
+    # Pin ENA queue interrupts round-robin to housekeeping CPUs (irqbalance is stopped).
+    irq_affinity: bool = False
+    # Enable every combined queue the ENA device supports.
+    ena_max_queues: bool = False
+    hugepages_2m: int = 0
+    isolated_cpus: int = 0
+    cpu_manager_static: bool = False
+
+    @property
+    def label(self) -> str:
+        return f"{self.name} v{self.version}"
+
+
+_RP_FILTER_OFF = (
+    ("net.ipv4.conf.default.rp_filter", "0"),
+    ("net.ipv4.conf.all.rp_filter", "0"),
+)
+
+PROFILES = {
+    profile.name: profile for profile in (
+        # What every node got before profiles existed.
+        TuningProfile(name="default", version=1, sysctls=_RP_FILTER_OFF),
+        # Control plane NFs: exclusive cores for the Guaranteed pods (SMF).
+        TuningProfile(name="nf-pinned", version=1, sysctls=_RP_FILTER_OFF, cpu_manager_static=True),
+        # GTP-U on UDP 2152: large socket buffers and backlog, spread softirq
+        # work over the housekeeping CPUs and keep the rest for the UPF.
+        TuningProfile(
+            name="upf-dataplane",
+            version=2,
+            sysctls=_RP_FILTER_OFF + (
+                ("net.ipv4.ip_forward", "1"),
+                ("net.core.rmem_max", "134217728"),
+                ("net.core.wmem_max", "134217728"),
+                ("net.core.rmem_default", "16777216"),
+                ("net.core.wmem_default", "16777216"),
+                ("net.ipv4.udp_rmem_min", "16384"),
+                ("net.ipv4.udp_wmem_min", "16384"),
+                ("net.core.netdev_max_backlog", "250000"),
+                ("net.core.netdev_budget", "600"),
+                ("net.core.rps_sock_flow_entries", "32768"),
+            ),
+            packet_steering=True,
+            irq_affinity=True,
+            ena_max_queues=True,
+            hugepages_2m=512,
+            isolated_cpus=4,
+            cpu_manager_static=True,
+        ),
+    )
+}
+
+
+def _cpu_split(profile: TuningProfile):
+    return [
+        "ncpu=$(nproc)",
+        # Never isolate so many CPUs that fewer than two are left for housekeeping.
+        f"isolated={profile.isolated_cpus}; (( isolated > ncpu - 2 )) && isolated=0",
+        "housekeeping=($(seq 0 $(( ncpu - isolated - 1 ))))",
+    ]
+
+
+def render_sysctl(profile: TuningProfile) -> str:
+    """Shell that persists and applies the profile's sysctls and hugepages."""
+    sysctls = list(profile.sysctls)
+    if profile.hugepages_2m:
+        sysctls.append(("vm.nr_hugepages", str(profile.hugepages_2m)))
+    lines = "\n".join(f"{key} = {value}" for key, value in sysctls)
+    return f"""# tuning profile {profile.label}
+mkdir -p {PROFILE_MARKER_PATH.rsplit('/', 1)[0]}
+echo "{profile.label}" > {PROFILE_MARKER_PATH}
+cat > {SYSCTL_PATH} <<'EOF'
+{lines}
+EOF
+sysctl -p {SYSCTL_PATH}"""
+
+
+def render_interface_tuning(profile: TuningProfile) -> str:
+    """Shell that tunes queues, interrupts and CPU placement once the interfaces are up."""
+    if not (profile.packet_steering or profile.irq_affinity or profile.ena_max_queues or profile.isolated_cpus):
+        return f"# tuning profile {profile.label}: no interface tuning"
+
+    parts = [
+        f"# tuning profile {profile.label}: interfaces and CPUs",
+        _CPUMASK_FUNCTION,
+        *_cpu_split(profile),
+        'housekeeping_mask=$(cpumask "${housekeeping[@]}")',
+        "interfaces=$(ls /sys/class/net | grep '^eth')",
+    ]
+    if profile.ena_max_queues:
+        parts.append("""for dev in $interfaces; do
+  max_queues=$(ethtool -l $dev 2>/dev/null | awk '/^Combined:/ {print $2; exit}')
+  [ -n "$max_queues" ] && ethtool -L $dev combined $max_queues
+done""")
+    if profile.packet_steering:
+        parts.append("""for dev in $interfaces; do
+  for queue in /sys/class/net/$dev/queues/rx-*; do
+    echo $housekeeping_mask > $queue/rps_cpus
+    echo 4096 > $queue/rps_flow_cnt
+  done
+  i=0
+  for queue in /sys/class/net/$dev/queues/tx-*; do
+    cpumask ${housekeeping[$(( i % ${#housekeeping[@]} ))]} > $queue/xps_cpus
+    i=$(( i + 1 ))
+  done
+done""")
+    if profile.irq_affinity:
+        parts.append("""systemctl stop irqbalance 2>/dev/null; systemctl disable irqbalance 2>/dev/null
+i=0
+for irq in $(awk -F: '/eth[0-9]+-Tx-Rx/ {gsub(/ /, "", $1); print $1}' /proc/interrupts); do
+  echo ${housekeeping[$(( i % ${#housekeeping[@]} ))]} > /proc/irq/$irq/smp_affinity_list
+  i=$(( i + 1 ))
+done""")
+    if profile.isolated_cpus:
+        parts.append("""if (( isolated > 0 )); then
+  mkdir -p /etc/systemd/system.conf.d
+  printf '[Manager]\\nCPUAffinity=%s\\n' "${housekeeping[*]}" > /etc/systemd/system.conf.d/90-private5g-cpu-affinity.conf
+  systemctl daemon-reexec
+fi""")
+    return "\n".join(parts)
+
+
+def render_kubelet_cpu_args(profile: TuningProfile) -> str:
+    """Shell that sets ``kubelet_cpu_args`` for the kubelet's CPU manager."""
+    if not profile.cpu_manager_static:
+        return f'# tuning profile {profile.label}: default CPU manager\nkubelet_cpu_args=""'
+    return "\n".join([
+        f"# tuning profile {profile.label}: static CPU manager",
+        *_cpu_split(profile),
+        # The static policy needs at least one reserved CPU.
+        "(( isolated > 0 )) && reserved_cpus=$(IFS=,; echo \"${housekeeping[*]}\") || reserved_cpus=0",
+        'kubelet_cpu_args="--cpu-manager-policy=static --reserved-cpus=$reserved_cpus"',
+    ])
@@ -1,6 +1,3 @@
-import os
-import json
-
 from constructs import Construct
 from aws_cdk import (
     Stack,
@@ -13,31 +10,27 @@ from aws_cdk import (
     CfnOutput
 )
 
-script_dir = os.path.dirname(os.path.realpath(__file__))
-config_path = os.path.join(script_dir, 'config', 'variables.json')
+from app_cdk import lookups
+from app_cdk.config import load_config
 
 class VpnRouteCdkStack(Stack):
 
-    def load_config(self, file_path):
-        with open(file_path, 'r') as config_file:
-            self.config = json.load(config_file)
-            self.eks_vpc_cidr = self.config.get("VPC_CIDR")
-            self.customer_vpc_cidr = self.config.get("CUSTOMER_VPC_CIDR")
-
     def __init__(self, scope: Construct, id: str, **kwargs) -> None:
         super().__init__(scope, id, **kwargs)
 
-        self.load_config(config_path)
+        self.config = load_config()
+        self.eks_vpc_cidr = self.config.vpc_cidr
+        self.customer_vpc_cidr = self.config.customer_vpc_cidr
         # Retrieve VPCs using provided IDs
         
-        eks_vpc_id = ssm.StringParameter.value_from_lookup(self, "EksVpcId")
-        my_vpc = ec2.Vpc.from_lookup(self, "LookupVPC", vpc_id=eks_vpc_id)
+        eks_vpc_id = lookups.string_parameter(self, "EksVpcId")
+        my_vpc = lookups.vpc(self, "LookupVPC", vpc_id=eks_vpc_id)
 
-        eks_tgw_id = eks_vpc_id = ssm.StringParameter.value_from_lookup(self, "TgwId")
-        customer_gw_instance_id = ssm.StringParameter.value_from_lookup(self, "CustomerGWInstanceId")
+        eks_tgw_id = eks_vpc_id = lookups.string_parameter(self, "TgwId")
+        customer_gw_instance_id = lookups.string_parameter(self, "CustomerGWInstanceId")
 
-        customer_vpc_id = ssm.StringParameter.value_from_lookup(self, "CustomerVpcId")
-        customer_vpc = ec2.Vpc.from_lookup(self,"lookupCVPC",vpc_id=customer_vpc_id)
+        customer_vpc_id = lookups.string_parameter(self, "CustomerVpcId")
+        customer_vpc = lookups.vpc(self, "lookupCVPC", vpc_id=customer_vpc_id)
 
         # Retrieve route table IDs from the VPCs
         my_vpc_to_tgw_route_table_id = my_vpc.private_subnets[0].route_table.route_table_id
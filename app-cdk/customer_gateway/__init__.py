@@ -0,0 +1,9 @@
+"""Configures the customer gateway instance for the tgw-vpn-cdk-stack VPNs.
+
+Shipped to ``CustomerGWInstance`` by ``CustomerVpcCdkStack`` and run there
+as ``cgw-configure`` once tgw-vpn-cdk-stack is deployed. It reads the
+``VpnConnections`` parameter (both BGP ASNs and the connections), the
+tunnels' outside addresses (``describe-vpn-connections``) and their
+pre-shared keys, then renders and applies the strongSwan (swanctl), Quagga
+(zebra/bgpd) and sysctl configuration. Needs only the Python standard library and the AWS CLI.
+"""
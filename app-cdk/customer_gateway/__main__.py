@@ -0,0 +1,147 @@
+"""``python3 -m customer_gateway configure``: render and apply the gateway configuration.
+
+``--dry-run --out DIR`` writes the files under ``DIR`` and applies nothing.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import urllib.request
+
+from .render import (INTERFACE_TYPES, choose_interface, parse_version_output, render_all, tunnels_from_aws,
+                     vpc_router)
+
+PARAMETER_NAME = "VpnConnections"
+IMDS = "http://169.254.169.254/latest"
+TUNNELS_SCRIPT = "/usr/local/sbin/private5g-tunnels"
+
+
+class ConfigureError(Exception):
+    pass
+
+
+def _imds(path: str, token: str) -> str:
+    request = urllib.request.Request(f"{IMDS}/meta-data/{path}", headers={"X-aws-ec2-metadata-token": token})
+    with urllib.request.urlopen(request, timeout=5) as response:
+        return response.read().decode()
+
+
+def instance_metadata() -> dict:
+    request = urllib.request.Request(f"{IMDS}/api/token", method="PUT",
+                                     headers={"X-aws-ec2-metadata-token-ttl-seconds": "300"})
+    with urllib.request.urlopen(request, timeout=5) as response:
+        token = response.read().decode()
+    mac = _imds("mac", token)
+    return {
+        "region": _imds("placement/region", token),
+        "local_address": _imds("local-ipv4", token),
+        "public_ip": _imds("public-ipv4", token),
+        "subnet_cidr": _imds(f"network/interfaces/macs/{mac}/subnet-ipv4-cidr-block", token),
+        "vpc_cidr": _imds(f"network/interfaces/macs/{mac}/vpc-ipv4-cidr-block", token),
+    }
+
+
+def _aws(region: str, *args) -> str:
+    result = subprocess.run(["aws", "--region", region, "--output", "json", *args],
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    if result.returncode != 0:
+        raise ConfigureError(result.stderr.strip())
+    return result.stdout
+
+
+def vpn_connections(region: str):
+    """The ``VpnConnections`` parameter (BGP ASNs and connections), or None before tgw-vpn-cdk-stack is deployed."""
+    try:
+        output = _aws(region, "ssm", "get-parameter", "--name", PARAMETER_NAME)
+    except ConfigureError as error:
+        if "ParameterNotFound" in str(error):
+            return None
+        raise
+    return json.loads(json.loads(output)["Parameter"]["Value"])
+
+
+def fetch_tunnels(region: str, connections):
+    descriptions = json.loads(_aws(region, "ec2", "describe-vpn-connections", "--vpn-connection-ids",
+                                   *[connection["id"] for connection in connections]))["VpnConnections"]
+    psks = {}
+    for connection in connections:
+        for tunnel in connection["tunnels"]:
+            arn = tunnel["psk_secret_arn"]
+            psks[arn] = json.loads(_aws(region, "secretsmanager", "get-secret-value", "--secret-id", arn))["SecretString"]
+    return tunnels_from_aws(connections, descriptions, psks)
+
+
+def strongswan_version() -> str:
+    try:
+        output = subprocess.run(["strongswan", "version"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                universal_newlines=True).stdout
+    except FileNotFoundError:
+        return "0"
+    return parse_version_output(output) or "0"
+
+
+def write_files(files: dict, root: str = "/") -> None:
+    for path, content in files.items():
+        target = os.path.join(root, path.lstrip("/"))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "w") as f:
+            f.write(content)
+        if path == TUNNELS_SCRIPT:
+            os.chmod(target, 0o755)
+
+
+def apply() -> None:
+    for command in (
+        ["sysctl", "--system"],
+        [TUNNELS_SCRIPT],
+        ["systemctl", "enable", "--now", "strongswan-swanctl"],
+        ["swanctl", "--load-all"],
+        ["systemctl", "enable", "zebra", "bgpd"],
+        ["systemctl", "restart", "zebra", "bgpd"],
+    ):
+        if subprocess.run(command).returncode != 0:
+            raise ConfigureError(f"{' '.join(command)} failed")
+
+
+def configure(args) -> int:
+    metadata = instance_metadata()
+    parameter = vpn_connections(metadata["region"])
+    if parameter is None:
+        print(f"{PARAMETER_NAME} does not exist yet; deploy tgw-vpn-cdk-stack first", file=sys.stderr)
+        return 1
+    tunnels = fetch_tunnels(metadata["region"], parameter["connections"])
+    interface_type = args.interface
+    if interface_type == "auto":
+        interface_type = choose_interface(platform.release(), strongswan_version())
+    files = render_all(tunnels, metadata["local_address"], metadata["public_ip"], parameter["customer_side_asn"],
+                       parameter["amazon_side_asn"], metadata["vpc_cidr"], vpc_router(metadata["subnet_cidr"]),
+                       os.cpu_count() or 1, interface_type)
+    if args.dry_run:
+        write_files(files, args.out)
+    else:
+        write_files(files)
+        apply()
+    print(f"{len(tunnels)} tunnels over {interface_type} interfaces")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="cgw-configure", description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    configure_parser = subparsers.add_parser("configure", help="render and apply the VPN configuration")
+    configure_parser.add_argument("--interface", choices=("auto",) + INTERFACE_TYPES, default="auto",
+                                  help="route-based tunnel interfaces; auto picks xfrm where supported")
+    configure_parser.add_argument("--dry-run", action="store_true", help="only write the files under --out")
+    configure_parser.add_argument("--out", default=".", help="root directory of --dry-run")
+    args = parser.parse_args(argv)
+    try:
+        return configure(args)
+    except ConfigureError as error:
+        print(error, file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
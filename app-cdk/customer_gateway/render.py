@@ -0,0 +1,245 @@
+"""strongSwan, Quagga and sysctl configuration of the customer gateway.
+
+Every tunnel of every VPN connection gets its own IKE connection, one
+CHILD_SA (the AWS endpoint accepts a single pair of IPsec SAs per tunnel)
+and its own route-based interface: an XFRM interface where the kernel and
+strongSwan support them (``if_id``), a VTI (``mark``) otherwise. BGP runs
+over every tunnel and zebra installs the AWS routes as multipath routes,
+hashed on ports, so flows spread over all tunnels. The tunnels' ESP packets
+come from different AWS endpoints and land on different ENA receive queues,
+so crypto is spread over the cores as well; more connections mean more
+parallelism.
+"""
+import ipaddress
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+# AES-GCM needs no separate integrity algorithm, which keeps ESP to one pass
+# over the packet, and AES-NI/PCLMULQDQ accelerate it on every current EC2 type.
+IKE_PROPOSAL = "aes128gcm16-prfsha256-ecp256"
+ESP_PROPOSAL = "aes128gcm16-ecp256"
+# AWS's maximum phase 1 and phase 2 lifetimes.
+IKE_LIFETIME = "8h"
+CHILD_LIFETIME = "1h"
+# AWS's recommended tunnel MTU and TCP MSS for customer gateways.
+TUNNEL_MTU = 1436
+TCP_MSS = 1379
+XFRM = "xfrm"
+VTI = "vti"
+INTERFACE_TYPES = (XFRM, VTI)
+
+
+@dataclass(frozen=True)
+class Tunnel:
+    """One tunnel of VPN connection ``connection``; ``number`` is unique on the gateway (1, 2, ...)."""
+    connection: int
+    index: int
+    number: int
+    outside_ip: str
+    inside_cidr: str
+    psk: str
+
+    @property
+    def name(self) -> str:
+        return f"vpn{self.connection}-tunnel{self.index}"
+
+    @property
+    def aws_inside_ip(self) -> str:
+        """AWS takes the first host of the inside /30, the customer gateway the second."""
+        return str(ipaddress.ip_network(self.inside_cidr).network_address + 1)
+
+    @property
+    def inside_ip(self) -> str:
+        return str(ipaddress.ip_network(self.inside_cidr).network_address + 2)
+
+    def interface(self, interface_type: str) -> str:
+        return f"{interface_type}{self.number}"
+
+
+def tunnels_from_aws(connections: Sequence[dict], descriptions: Sequence[dict], psks: Dict[str, str]) -> List[Tunnel]:
+    """Tunnels of the ``VpnConnections`` parameter, with outside IPs from ``describe-vpn-connections``.
+
+    ``psks`` maps each tunnel's ``psk_secret_arn`` to its key.
+    """
+    outside = {}
+    for description in descriptions:
+        for options in description.get("Options", {}).get("TunnelOptions", []):
+            outside[(description["VpnConnectionId"], options["TunnelInsideCidr"])] = options["OutsideIpAddress"]
+    tunnels = []
+    for connection_index, connection in enumerate(connections, start=1):
+        for tunnel_index, tunnel in enumerate(connection["tunnels"], start=1):
+            key = (connection["id"], tunnel["inside_cidr"])
+            if key not in outside:
+                raise ValueError(f"{connection['id']} has no tunnel with inside CIDR {tunnel['inside_cidr']}")
+            tunnels.append(Tunnel(connection_index, tunnel_index, len(tunnels) + 1, outside[key],
+                                  tunnel["inside_cidr"], psks[tunnel["psk_secret_arn"]]))
+    return tunnels
+
+
+def _version(text: str) -> tuple:
+    match = re.search(r"(\d+)\.(\d+)(?:\.(\d+))?", text)
+    return tuple(int(part or 0) for part in match.groups()) if match else (0, 0, 0)
+
+
+def choose_interface(kernel_release: str, strongswan_version: str) -> str:
+    """XFRM interfaces need Linux 4.19 and strongSwan 5.8; Amazon Linux 2's defaults get VTIs."""
+    if _version(kernel_release) >= (4, 19, 0) and _version(strongswan_version) >= (5, 8, 0):
+        return XFRM
+    return VTI
+
+
+def _block(name: str, body: List[str], indent: int = 0) -> List[str]:
+    pad = "    " * indent
+    return [f"{pad}{name} {{"] + [f"{pad}    {line}" if line else "" for line in body] + [f"{pad}}}"]
+
+
+def render_swanctl(tunnels: Sequence[Tunnel], local_address: str, public_ip: str, interface_type: str) -> str:
+    """``swanctl.conf``: an IKE connection per tunnel, keyed to its interface by if_id or mark."""
+    if interface_type not in INTERFACE_TYPES:
+        raise ValueError(f"interface type must be one of {', '.join(INTERFACE_TYPES)}")
+    connections, secrets = [], []
+    for tunnel in tunnels:
+        binding = ([f"if_id_in = {tunnel.number}", f"if_id_out = {tunnel.number}"] if interface_type == XFRM
+                   else [f"mark_in = {tunnel.number}", f"mark_out = {tunnel.number}"])
+        child = _block(tunnel.name, [
+            "local_ts = 0.0.0.0/0",
+            "remote_ts = 0.0.0.0/0",
+            f"esp_proposals = {ESP_PROPOSAL}",
+            f"rekey_time = {CHILD_LIFETIME}",
+            *binding,
+            "start_action = start",
+            "dpd_action = restart",
+            "close_action = restart",
+        ])
+        connections += _block(tunnel.name, [
+            "version = 2",
+            f"local_addrs = {local_address}",
+            f"remote_addrs = {tunnel.outside_ip}",
+            f"proposals = {IKE_PROPOSAL}",
+            f"rekey_time = {IKE_LIFETIME}",
+            "dpd_delay = 10s",
+            "mobike = no",
+            *_block("local", ["auth = psk", f"id = {public_ip}"]),
+            *_block("remote", ["auth = psk", f"id = {tunnel.outside_ip}"]),
+            *_block("children", child),
+        ], indent=1)
+        secrets += _block(f"ike-{tunnel.name}", [
+            f"id-1 = {tunnel.outside_ip}",
+            f'secret = "{tunnel.psk}"',
+        ], indent=1)
+    lines = ["# Generated by cgw-configure; changes are overwritten."]
+    lines += ["connections {"] + connections + ["}", "", "secrets {"] + secrets + ["}"]
+    return "\n".join(lines) + "\n"
+
+
+def charon_threads(cores: int) -> int:
+    """IKE work is light, but rekeys of many tunnels come in bursts; never below charon's default 16."""
+    return max(16, 2 * cores)
+
+
+def render_strongswan(cores: int) -> str:
+    """``strongswan.d`` drop-in: charon sized to the instance, routes left to zebra."""
+    return "\n".join([
+        "# Generated by cgw-configure; changes are overwritten.",
+        *_block("charon", [
+            f"threads = {charon_threads(cores)}",
+            # BGP installs the routes over the tunnel interfaces.
+            "install_routes = no",
+            "install_virtual_ip = no",
+        ]),
+    ]) + "\n"
+
+
+def render_interfaces(tunnels: Sequence[Tunnel], interface_type: str, local_address: str, device: str = "eth0") -> str:
+    """Shell script creating each tunnel's interface with its inside address."""
+    lines = ["#!/bin/bash", "# Generated by cgw-configure; changes are overwritten.", "set -e"]
+    for tunnel in tunnels:
+        interface = tunnel.interface(interface_type)
+        lines.append(f"ip link del {interface} 2>/dev/null || true")
+        if interface_type == XFRM:
+            lines.append(f"ip link add {interface} type xfrm dev {device} if_id {tunnel.number}")
+        else:
+            lines.append(f"ip link add {interface} type vti local {local_address} remote {tunnel.outside_ip} "
+                         f"key {tunnel.number}")
+            # The VTI's mark selects the SA; no policy lookup on the decrypted packets.
+            lines.append(f"sysctl -qw net.ipv4.conf.{interface}.disable_policy=1")
+        lines.append(f"ip addr add {tunnel.inside_ip}/30 dev {interface}")
+        lines.append(f"ip link set {interface} up mtu {TUNNEL_MTU}")
+    lines.append(f"iptables -t mangle -C FORWARD -p tcp --tcp-flags SYN,RST SYN -j TCPMSS --set-mss {TCP_MSS} 2>/dev/null || "
+                 f"iptables -t mangle -A FORWARD -p tcp --tcp-flags SYN,RST SYN -j TCPMSS --set-mss {TCP_MSS}")
+    return "\n".join(lines) + "\n"
+
+
+def render_sysctl() -> str:
+    return "\n".join([
+        "# Generated by cgw-configure; changes are overwritten.",
+        "net.ipv4.ip_forward = 1",
+        # Return traffic may come back over any tunnel.
+        "net.ipv4.conf.all.rp_filter = 0",
+        "net.ipv4.conf.default.rp_filter = 0",
+        # Hash multipath routes on the ports too, so flows between two hosts use all tunnels.
+        "net.ipv4.fib_multipath_hash_policy = 1",
+        "net.core.netdev_max_backlog = 30000",
+        "net.core.rmem_max = 67108864",
+        "net.core.wmem_max = 67108864",
+    ]) + "\n"
+
+
+def render_zebra(customer_vpc_cidr: str, vpc_router: str, hostname: str = "cgw") -> str:
+    """``zebra.conf``: the customer VPC route bgpd advertises, via the subnet's VPC router."""
+    return "\n".join([
+        "! Generated by cgw-configure; changes are overwritten.",
+        f"hostname {hostname}",
+        f"ip route {customer_vpc_cidr} {vpc_router}",
+        "log file /var/log/quagga/zebra.log",
+    ]) + "\n"
+
+
+def render_bgpd(tunnels: Sequence[Tunnel], local_asn: int, remote_asn: int, networks: Sequence[str],
+                router_id: str, hostname: str = "cgw") -> str:
+    """``bgpd.conf``: a session per tunnel, and multipath over all of them."""
+    lines = [
+        "! Generated by cgw-configure; changes are overwritten.",
+        f"hostname {hostname}",
+        f"router bgp {local_asn}",
+        f" bgp router-id {router_id}",
+        f" maximum-paths {max(1, len(tunnels))}",
+    ]
+    lines += [f" network {network}" for network in networks]
+    for tunnel in tunnels:
+        lines += [
+            f" neighbor {tunnel.aws_inside_ip} remote-as {remote_asn}",
+            f" neighbor {tunnel.aws_inside_ip} description {tunnel.name}",
+            # AWS's hold time is 30s.
+            f" neighbor {tunnel.aws_inside_ip} timers 10 30",
+            f" neighbor {tunnel.aws_inside_ip} soft-reconfiguration inbound",
+        ]
+    lines.append("log file /var/log/quagga/bgpd.log")
+    return "\n".join(lines) + "\n"
+
+
+def render_all(tunnels: Sequence[Tunnel], local_address: str, public_ip: str, local_asn: int, remote_asn: int,
+               customer_vpc_cidr: str, vpc_router: str, cores: int, interface_type: str,
+               device: str = "eth0") -> Dict[str, str]:
+    """Every generated file, by its path on the gateway (EPEL's strongSwan and Quagga layout)."""
+    return {
+        "/etc/strongswan/swanctl/conf.d/private5g.conf": render_swanctl(tunnels, local_address, public_ip,
+                                                                       interface_type),
+        "/etc/strongswan/strongswan.d/private5g.conf": render_strongswan(cores),
+        "/etc/sysctl.d/90-private5g-cgw.conf": render_sysctl(),
+        "/etc/quagga/zebra.conf": render_zebra(customer_vpc_cidr, vpc_router),
+        "/etc/quagga/bgpd.conf": render_bgpd(tunnels, local_asn, remote_asn, [customer_vpc_cidr],
+                                             local_address),
+        "/usr/local/sbin/private5g-tunnels": render_interfaces(tunnels, interface_type, local_address, device),
+    }
+
+
+def vpc_router(subnet_cidr: str) -> str:
+    """The VPC router, the first host of every subnet."""
+    return str(ipaddress.ip_network(subnet_cidr).network_address + 1)
+
+
+def parse_version_output(output: str) -> Optional[str]:
+    match = re.search(r"\d+\.\d+(?:\.\d+)?", output)
+    return match.group(0) if match else None
@@ -0,0 +1,7 @@
+"""Keeps the AMF/UPF private hosted zone records pointed at their pods.
+
+Deployed as a Lambda function by ``NoMultusNodeGroupStack`` and invoked
+every minute. Each invocation lists the watched pods, upserts their IPs, then
+watches the pods and pushes changes as they happen until shortly before the
+next invocation takes over.
+"""
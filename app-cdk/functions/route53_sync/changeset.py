@@ -0,0 +1,238 @@
+"""Minimal Route53 change sets: diff the desired records against the zones.
+
+Desired records for every NF endpoint are compared with what the hosted
+zones hold. Records that already match are skipped, and what is left becomes
+one ``ChangeBatch`` per zone. The same code backs the route53-sync Lambda and
+the command line, which replaces the per-record ``jq`` + ``aws route53``
+steps:
+
+    cd app-cdk/functions
+    python -m route53_sync.changeset plan --records ../../network_config/records.json \\
+        --set upf.open5gs.service=$upf_ipaddr --set amf.open5gs.service=$amf_ipaddr
+    python -m route53_sync.changeset apply ...
+
+``plan`` only prints the changes; ``apply`` sends them.
+"""
+import argparse
+import json
+import sys
+from dataclasses import dataclass, replace
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+DEFAULT_TTL = 30
+# ChangeResourceRecordSets accepts at most 1000 changes per call.
+MAX_CHANGES_PER_BATCH = 1000
+COMMENT = "route53-sync"
+
+
+def normalize(name: str) -> str:
+    return name.rstrip(".").lower()
+
+
+@dataclass(frozen=True)
+class Record:
+    zone_id: str
+    name: str
+    values: Tuple[str, ...]
+    type: str = "A"
+    ttl: int = DEFAULT_TTL
+
+    @property
+    def key(self) -> Tuple[str, str, str]:
+        return self.zone_id, normalize(self.name), self.type
+
+    def resource_record_set(self) -> dict:
+        return {
+            "Name": self.name,
+            "Type": self.type,
+            "TTL": self.ttl,
+            "ResourceRecords": [{"Value": value} for value in self.values],
+        }
+
+
+@dataclass(frozen=True)
+class Change:
+    action: str  # UPSERT or DELETE
+    record: Record
+    previous: Optional[Record] = None
+
+    def as_dict(self) -> dict:
+        return {"Action": self.action, "ResourceRecordSet": self.record.resource_record_set()}
+
+    def describe(self) -> str:
+        record = self.record
+        if self.action == "DELETE":
+            return f"  - {record.name} {record.type} {list(record.values)}"
+        if self.previous is None:
+            return f"  + {record.name} {record.type} {record.ttl} {list(record.values)}"
+        previous = self.previous
+        ttl = f"{previous.ttl} -> {record.ttl}" if previous.ttl != record.ttl else str(record.ttl)
+        return f"  ~ {record.name} {record.type} {ttl} {list(previous.values)} -> {list(record.values)}"
+
+
+def fetch_current(route53, zone_id: str, names: Iterable[str]) -> Dict[Tuple[str, str, str], Record]:
+    """The simple (non-alias) records in ``zone_id`` whose name is in ``names``."""
+    wanted = {normalize(name) for name in names}
+    current = {}
+    kwargs = {"HostedZoneId": zone_id}
+    while True:
+        page = route53.list_resource_record_sets(**kwargs)
+        for record_set in page["ResourceRecordSets"]:
+            if normalize(record_set["Name"]) in wanted and "ResourceRecords" in record_set:
+                record = Record(
+                    zone_id=zone_id,
+                    name=normalize(record_set["Name"]),
+                    values=tuple(sorted(r["Value"] for r in record_set["ResourceRecords"])),
+                    type=record_set["Type"],
+                    ttl=record_set.get("TTL", DEFAULT_TTL),
+                )
+                current[record.key] = record
+        if not page.get("IsTruncated"):
+            return current
+        kwargs["StartRecordName"] = page["NextRecordName"]
+        kwargs["StartRecordType"] = page["NextRecordType"]
+
+
+def diff(desired: Iterable[Record], current: Mapping[Tuple[str, str, str], Record]) -> List[Change]:
+    """Changes that turn ``current`` into ``desired``.
+
+    A desired record with no values deletes the record if it exists. Records
+    in ``current`` that are not desired are left alone, since the zone may
+    hold records managed elsewhere.
+    """
+    changes = []
+    for record in desired:
+        record = replace(record, values=tuple(sorted(set(record.values))))
+        existing = current.get(record.key)
+        if not record.values:
+            if existing is not None:
+                changes.append(Change("DELETE", existing))
+        elif existing is None or (existing.values, existing.ttl) != (record.values, record.ttl):
+            changes.append(Change("UPSERT", record, existing))
+    return changes
+
+
+def change_batches(changes: Sequence[Change]) -> Dict[str, List[dict]]:
+    """``ChangeBatch`` payloads per zone; more than one only past the API's per-call limit."""
+    by_zone: Dict[str, List[Change]] = {}
+    for change in changes:
+        by_zone.setdefault(change.record.zone_id, []).append(change)
+    return {
+        zone_id: [
+            {"Comment": COMMENT, "Changes": [change.as_dict() for change in zone_changes[i:i + MAX_CHANGES_PER_BATCH]]}
+            for i in range(0, len(zone_changes), MAX_CHANGES_PER_BATCH)
+        ]
+        for zone_id, zone_changes in by_zone.items()
+    }
+
+
+def apply(route53, changes: Sequence[Change]) -> int:
+    """Send the changes, one call per zone batch; returns the number of calls."""
+    calls = 0
+    for zone_id, batches in change_batches(changes).items():
+        for batch in batches:
+            route53.change_resource_record_sets(HostedZoneId=zone_id, ChangeBatch=batch)
+            calls += 1
+    return calls
+
+
+def plan_text(changes: Sequence[Change], zones: Mapping[str, str]) -> str:
+    """Readable plan; ``zones`` maps zone IDs to names and lists every zone considered."""
+    lines = []
+    for zone_id, zone_name in sorted(zones.items(), key=lambda item: item[1]):
+        zone_changes = [change for change in changes if change.record.zone_id == zone_id]
+        if not zone_changes:
+            lines.append(f"{zone_name} ({zone_id}): no changes")
+            continue
+        lines.append(f"{zone_name} ({zone_id}): {len(zone_changes)} change(s)")
+        lines.extend(change.describe() for change in zone_changes)
+    return "\n".join(lines)
+
+
+def find_private_zone(route53, zone_name: str) -> str:
+    zone_name = normalize(zone_name)
+    response = route53.list_hosted_zones_by_name(DNSName=zone_name)
+    matches = [
+        zone["Id"].split("/")[-1] for zone in response["HostedZones"]
+        if normalize(zone["Name"]) == zone_name and zone.get("Config", {}).get("PrivateZone")
+    ]
+    if len(matches) != 1:
+        raise ValueError(f"expected one private hosted zone named {zone_name}, found {len(matches)}")
+    return matches[0]
+
+
+def load_records(path: str, overrides: Mapping[str, Sequence[str]], zone_ids: Mapping[str, str]) -> List[Record]:
+    """Read ``{"records": [{"zone", "name", "values", "type"?, "ttl"?}]}``.
+
+    ``overrides`` replaces the values of records by name and ``zone_ids``
+    maps zone names to IDs.
+    """
+    with open(path) as records_file:
+        raw_records = json.load(records_file)["records"]
+    unknown = set(overrides) - {normalize(raw["name"]) for raw in raw_records}
+    if unknown:
+        raise ValueError(f"--set names not in {path}: {', '.join(sorted(unknown))}")
+    return [
+        Record(
+            zone_id=zone_ids[normalize(raw["zone"])],
+            name=normalize(raw["name"]),
+            values=tuple(overrides.get(normalize(raw["name"]), raw["values"])),
+            type=raw.get("type", "A"),
+            ttl=int(raw.get("ttl", DEFAULT_TTL)),
+        )
+        for raw in raw_records
+    ]
+
+
+def _parse_pairs(pairs: Sequence[str], option: str) -> Dict[str, List[str]]:
+    parsed: Dict[str, List[str]] = {}
+    for pair in pairs:
+        name, sep, value = pair.partition("=")
+        if not sep:
+            raise SystemExit(f"{option} expects NAME=VALUE, got {pair!r}")
+        parsed.setdefault(normalize(name), []).extend(v for v in value.split(",") if v)
+    return parsed
+
+
+def main(argv: Optional[Sequence[str]] = None, route53=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m route53_sync.changeset")
+    parser.add_argument("command", choices=("plan", "apply"))
+    parser.add_argument("--records", required=True, help="JSON file with the desired records")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=IP[,IP]",
+                        help="override the values of a record (repeatable)")
+    parser.add_argument("--zone-id", action="append", default=[], metavar="ZONE=ID",
+                        help="hosted zone ID to use instead of looking the zone up by name")
+    parser.add_argument("--json", action="store_true", help="print the change batches as JSON")
+    parser.add_argument("--region")
+    args = parser.parse_args(argv)
+
+    if route53 is None:
+        import boto3
+        route53 = boto3.client("route53", region_name=args.region)
+
+    with open(args.records) as records_file:
+        zone_names = sorted({normalize(raw["zone"]) for raw in json.load(records_file)["records"]})
+    zone_ids = {name: ids[0] for name, ids in _parse_pairs(args.zone_id, "--zone-id").items()}
+    for zone_name in zone_names:
+        if zone_name not in zone_ids:
+            zone_ids[zone_name] = find_private_zone(route53, zone_name)
+
+    desired = load_records(args.records, _parse_pairs(args.set, "--set"), zone_ids)
+    current = {}
+    for zone_name in zone_names:
+        zone_id = zone_ids[zone_name]
+        current.update(fetch_current(route53, zone_id, [r.name for r in desired if r.zone_id == zone_id]))
+    changes = diff(desired, current)
+
+    if args.json:
+        print(json.dumps(change_batches(changes), indent=2))
+    else:
+        print(plan_text(changes, {zone_ids[name]: name for name in zone_names}))
+    if args.command == "apply" and changes:
+        calls = apply(route53, changes)
+        print(f"applied {len(changes)} change(s) in {calls} call(s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
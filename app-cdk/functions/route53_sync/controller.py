@@ -0,0 +1,157 @@
+"""Pod watch -> Route53 record sync.
+
+The controller only talks to two small interfaces, so tests can drive it
+with stubs:
+
+* ``kube``: ``list_pods(namespace, selector)`` returning ``(pods,
+  resource_version)`` and ``watch_pods(namespace, selector, resource_version,
+  timeout_seconds)`` yielding Kubernetes watch events (``{"type": ...,
+  "object": pod}``).
+* ``route53``: a boto3 Route53 client (``list_resource_record_sets`` and
+  ``change_resource_record_sets``).
+"""
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from . import changeset
+from .changeset import DEFAULT_TTL, Record
+
+logger = logging.getLogger(__name__)
+
+
+class WatchExpired(Exception):
+    """The watch's resource version is too old (HTTP 410); the pods must be listed again."""
+
+
+@dataclass(frozen=True)
+class Target:
+    """An A record kept equal to the IPs of the ready pods matching ``labels``."""
+    record_name: str
+    hosted_zone_id: str
+    labels: Tuple[Tuple[str, str], ...]
+    ttl: int = DEFAULT_TTL
+
+    @classmethod
+    def from_dict(cls, raw: Mapping) -> "Target":
+        return cls(
+            record_name=raw["record_name"],
+            hosted_zone_id=raw["hosted_zone_id"],
+            labels=tuple(sorted(raw["labels"].items())),
+            ttl=int(raw.get("ttl", DEFAULT_TTL)),
+        )
+
+    def matches(self, pod: Mapping) -> bool:
+        pod_labels = pod.get("metadata", {}).get("labels") or {}
+        return all(pod_labels.get(key) == value for key, value in self.labels)
+
+
+def label_selector(targets: Iterable[Target]) -> str:
+    """One set-based selector covering every target, e.g. ``epc-mode in (amf-1,upf)``.
+
+    Requirements on different keys would all have to hold, so targets keyed
+    on different labels get the empty selector (every pod in the namespace);
+    ``Target.matches`` still sorts the pods out.
+    """
+    targets = list(targets)
+    values = {}
+    for target in targets:
+        for key, value in target.labels:
+            values.setdefault(key, set()).add(value)
+    if len(values) > 1 and len(targets) > 1:
+        return ""
+    return ",".join(f"{key} in ({','.join(sorted(vals))})" for key, vals in sorted(values.items()))
+
+
+def is_ready(pod: Mapping) -> bool:
+    status = pod.get("status") or {}
+    if pod.get("metadata", {}).get("deletionTimestamp") or status.get("phase") != "Running":
+        return False
+    if not status.get("podIP"):
+        return False
+    return any(c.get("type") == "Ready" and c.get("status") == "True" for c in status.get("conditions") or [])
+
+
+def desired_records(targets: Iterable[Target], pods: Iterable[Mapping]) -> Dict[Target, Tuple[str, ...]]:
+    """The sorted IPs of the ready pods for each target that has any.
+
+    Targets without a ready pod are left out, so a record keeps its last
+    address while a pod restarts instead of going empty.
+    """
+    pods = list(pods)
+    records = {}
+    for target in targets:
+        ips = sorted({pod["status"]["podIP"] for pod in pods if target.matches(pod) and is_ready(pod)})
+        if ips:
+            records[target] = tuple(ips)
+    return records
+
+
+class Controller:
+
+    def __init__(self, kube, route53, namespace: str, targets: List[Target], clock=time.monotonic):
+        self.kube = kube
+        self.route53 = route53
+        self.namespace = namespace
+        self.targets = list(targets)
+        self.selector = label_selector(self.targets)
+        self.clock = clock
+        self.pods: Dict[str, Mapping] = {}
+        # The zones' records as of the last list or push, so matching records are not pushed again.
+        self.current: Dict[Tuple[str, str, str], Record] = {}
+        self.change_calls = 0
+
+    def sync(self) -> List[changeset.Change]:
+        """Push the records that differ from the zones; returns the changes made."""
+        desired = [
+            Record(target.hosted_zone_id, target.record_name, ips, ttl=target.ttl)
+            for target, ips in desired_records(self.targets, self.pods.values()).items()
+        ]
+        changes = changeset.diff(desired, self.current)
+        if changes:
+            self.change_calls += changeset.apply(self.route53, changes)
+            for change in changes:
+                logger.info("%s", change.describe().strip())
+                self.current[change.record.key] = change.record
+        return changes
+
+    def relist(self) -> str:
+        pods, resource_version = self.kube.list_pods(self.namespace, self.selector)
+        self.pods = {pod["metadata"]["uid"]: pod for pod in pods}
+        self.current = {}
+        for zone_id in sorted({target.hosted_zone_id for target in self.targets}):
+            names = [target.record_name for target in self.targets if target.hosted_zone_id == zone_id]
+            self.current.update(changeset.fetch_current(self.route53, zone_id, names))
+        self.sync()
+        return resource_version
+
+    def apply(self, event: Mapping) -> Optional[str]:
+        """Apply one watch event; returns the event's resource version."""
+        kind = event.get("type")
+        pod = event.get("object") or {}
+        if kind == "ERROR":
+            raise WatchExpired(pod.get("message", "watch error"))
+        metadata = pod.get("metadata") or {}
+        if kind in ("ADDED", "MODIFIED"):
+            self.pods[metadata["uid"]] = pod
+        elif kind == "DELETED":
+            self.pods.pop(metadata["uid"], None)
+        if kind != "BOOKMARK":
+            self.sync()
+        return metadata.get("resourceVersion")
+
+    def run(self, seconds: float) -> int:
+        """List, then follow the watch for ``seconds``; returns the number of Route53 calls made."""
+        deadline = self.clock() + seconds
+        resource_version = self.relist()
+        while True:
+            remaining = int(deadline - self.clock())
+            if remaining <= 0:
+                return self.change_calls
+            try:
+                for event in self.kube.watch_pods(self.namespace, self.selector, resource_version, remaining):
+                    resource_version = self.apply(event) or resource_version
+            except WatchExpired as e:
+                logger.info("watch expired (%s), listing pods again", e)
+                resource_version = self.relist()
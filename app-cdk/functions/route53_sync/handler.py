@@ -0,0 +1,30 @@
+"""Lambda entry point, configured through the environment set by the stack.
+
+* ``CLUSTER_NAME``: EKS cluster to watch.
+* ``NAMESPACE``: namespace of the pods (``open5gs``).
+* ``TARGETS``: JSON list of ``{"record_name", "hosted_zone_id", "labels"}``.
+* ``WATCH_SECONDS``: how long one invocation follows the watch.
+"""
+import json
+import logging
+import os
+
+import boto3
+
+from .controller import Controller, Target
+from .kube import KubeClient
+
+logging.getLogger().setLevel(logging.INFO)
+
+
+def handler(event, context):
+    region = os.environ["AWS_REGION"]
+    session = boto3.session.Session(region_name=region)
+    controller = Controller(
+        kube=KubeClient.for_eks(session, os.environ["CLUSTER_NAME"], region),
+        route53=session.client("route53"),
+        namespace=os.environ["NAMESPACE"],
+        targets=[Target.from_dict(raw) for raw in json.loads(os.environ["TARGETS"])],
+    )
+    calls = controller.run(float(os.environ["WATCH_SECONDS"]))
+    return {"changeCalls": calls, "records": {r.name: list(r.values) for r in controller.current.values()}}
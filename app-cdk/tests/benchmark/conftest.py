@@ -0,0 +1,24 @@
+import os
+
+import pytest
+
+from tests.benchmark import harness
+
+RESULTS = {}
+
+
+@pytest.fixture(scope="session")
+def synth_results():
+    return RESULTS
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if not RESULTS:
+        return
+    if os.getenv(harness.UPDATE_ENV):
+        baseline = harness.load_baseline()
+        baseline["stacks"] = {name: metrics.as_dict() for name, metrics in sorted(RESULTS.items())}
+        harness.write_json(harness.BASELINE_PATH, baseline)
+    results_path = os.getenv(harness.RESULTS_ENV)
+    if results_path:
+        harness.write_json(results_path, {name: metrics.as_dict() for name, metrics in RESULTS.items()})
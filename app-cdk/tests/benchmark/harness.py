@@ -0,0 +1,124 @@
+"""Measure what it costs to synthesize a single stack.
+
+Synthesis runs offline (see ``app_cdk.lookups``), so the numbers only
+depend on the code in ``app_cdk``. Most of the work happens in the jsii
+node process, so peak RSS is taken over this process and its children.
+"""
+import json
+import os
+import resource
+import time
+from dataclasses import asdict, dataclass
+
+import aws_cdk as cdk
+
+from app_cdk import lookups, registry
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), "baseline.json")
+
+# Regenerates baseline.json from the current run instead of comparing against it.
+UPDATE_ENV = "SYNTH_BENCHMARK_UPDATE"
+# Optional path the measured results are written to as JSON.
+RESULTS_ENV = "SYNTH_BENCHMARK_RESULTS"
+# Wall time and peak RSS depend on the machine and its load, so they are only
+# checked against the baseline when this is set, on a quiet machine.
+HOST_METRICS_ENV = "SYNTH_BENCHMARK_HOST_METRICS"
+HOST_METRICS = ("wall_seconds", "peak_rss_kb")
+
+
+@dataclass(frozen=True)
+class SynthMetrics:
+    wall_seconds: float
+    peak_rss_kb: int
+    construct_count: int
+    template_bytes: int
+
+    def as_dict(self):
+        return asdict(self)
+
+
+def _process_tree(pid):
+    pids = [pid]
+    task_dir = f"/proc/{pid}/task"
+    for task in os.listdir(task_dir):
+        with open(os.path.join(task_dir, task, "children")) as children:
+            for child in children.read().split():
+                pids.extend(_process_tree(int(child)))
+    return pids
+
+
+def _reset_peak_rss(pids):
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/clear_refs", "w") as clear_refs:
+                clear_refs.write("5")
+        except OSError:
+            pass
+
+
+def _peak_rss_kb(pids):
+    total = 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/status") as status:
+                for line in status:
+                    if line.startswith("VmHWM:"):
+                        total += int(line.split()[1])
+        except OSError:
+            pass
+    return total
+
+
+def synth_stack(spec: registry.StackSpec, outdir: str) -> SynthMetrics:
+    has_proc = os.path.isdir(f"/proc/{os.getpid()}/task")
+    pids = _process_tree(os.getpid()) if has_proc else []
+    _reset_peak_rss(pids)
+
+    start = time.perf_counter()
+    app = cdk.App(outdir=outdir, context={lookups.OFFLINE_CONTEXT_KEY: "true"})
+    env = lookups.offline_environment()
+    lookups.prime_offline_context(app, env)
+    stack = registry.build(app, env, [spec])[spec.name]
+    assembly = app.synth()
+    wall_seconds = time.perf_counter() - start
+
+    if has_proc:
+        peak_rss_kb = _peak_rss_kb(pids)
+    else:
+        peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    template_path = os.path.join(assembly.directory, stack.template_file)
+    return SynthMetrics(
+        wall_seconds=round(wall_seconds, 3),
+        peak_rss_kb=peak_rss_kb,
+        construct_count=len(stack.node.find_all()),
+        template_bytes=os.path.getsize(template_path),
+    )
+
+
+def load_baseline(path: str = BASELINE_PATH) -> dict:
+    with open(path) as baseline_file:
+        return json.load(baseline_file)
+
+
+def write_json(path: str, data: dict) -> None:
+    with open(path, "w") as output:
+        json.dump(data, output, indent=2, sort_keys=True)
+        output.write("\n")
+
+
+def regressions(metrics: SynthMetrics, baseline: dict, tolerances: dict, slack: dict, skip=()):
+    """Return a message per metric that exceeds its baseline by more than its tolerance.
+
+    A metric may grow by ``tolerances[name]`` (a fraction of the baseline)
+    or by ``slack[name]`` (an absolute amount), whichever is larger, so that
+    small, noisy values such as sub-second wall times do not flap. Metrics
+    named in ``skip`` are not checked.
+    """
+    failures = []
+    for name, value in metrics.as_dict().items():
+        if name in skip:
+            continue
+        limit = baseline[name] + max(baseline[name] * tolerances[name], slack.get(name, 0))
+        if value > limit:
+            failures.append(f"{name}: {value} > {limit:.3f} (baseline {baseline[name]})")
+    return failures
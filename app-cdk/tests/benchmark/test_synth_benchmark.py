@@ -0,0 +1,47 @@
+import os
+
+import pytest
+
+from app_cdk import registry
+from tests.benchmark import harness
+
+
+@pytest.fixture(scope="module", autouse=True)
+def warm_up(tmp_path_factory):
+    # The first synth in a process pays for loading the jsii modules.
+    harness.synth_stack(registry.get("ecr-cdk-stack"), str(tmp_path_factory.mktemp("warm-up")))
+
+
+@pytest.mark.parametrize("spec", registry.STACKS, ids=[spec.name for spec in registry.STACKS])
+def test_synth_within_baseline(monkeypatch, tmp_path, synth_results, spec):
+    monkeypatch.setenv("CDK_DEFAULT_REGION", "us-west-2")
+    metrics = harness.synth_stack(spec, str(tmp_path))
+    synth_results[spec.name] = metrics
+
+    if os.getenv(harness.UPDATE_ENV):
+        return
+    baseline = harness.load_baseline()
+    assert spec.name in baseline["stacks"], \
+        f"no baseline for {spec.name}; rerun with {harness.UPDATE_ENV}=1"
+    skip = () if os.getenv(harness.HOST_METRICS_ENV) else harness.HOST_METRICS
+    failures = harness.regressions(metrics, baseline["stacks"][spec.name], baseline["tolerances"], baseline["slack"],
+                                   skip)
+    assert not failures, f"{spec.name} synth regressed:\n" + "\n".join(failures)
+
+
+def test_regressions_reports_metrics_past_threshold():
+    baseline = {"wall_seconds": 1.0, "peak_rss_kb": 1000, "construct_count": 100, "template_bytes": 1000}
+    tolerances = {"wall_seconds": 1.0, "peak_rss_kb": 0.25, "construct_count": 0.05, "template_bytes": 0.05}
+    slack = {"wall_seconds": 0.5}
+
+    within = harness.SynthMetrics(wall_seconds=1.9, peak_rss_kb=1200, construct_count=105, template_bytes=1050)
+    assert harness.regressions(within, baseline, tolerances, slack) == []
+
+    regressed = harness.SynthMetrics(wall_seconds=1.9, peak_rss_kb=1200, construct_count=106, template_bytes=1050)
+    failures = harness.regressions(regressed, baseline, tolerances, slack)
+    assert len(failures) == 1 and failures[0].startswith("construct_count")
+
+    slow = harness.SynthMetrics(wall_seconds=9.0, peak_rss_kb=9000, construct_count=100, template_bytes=1000)
+    assert [failure.split(":")[0] for failure in harness.regressions(slow, baseline, tolerances, slack)] == [
+        "wall_seconds", "peak_rss_kb"]
+    assert harness.regressions(slow, baseline, tolerances, slack, skip=harness.HOST_METRICS) == []
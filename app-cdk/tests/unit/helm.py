@@ -0,0 +1,25 @@
+"""Renders the no-Multus chart for the helm template tests."""
+import os
+import shutil
+import subprocess
+
+import pytest
+import yaml
+
+CHART = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, os.pardir,
+                     "helm_chart", "open5gs-helm-charts_nomultus")
+
+requires_helm = pytest.mark.skipif(shutil.which("helm") is None, reason="helm is not installed")
+
+
+def render(*set_values):
+    args = ["helm", "template", "core5g", CHART, "--namespace", "open5gs"]
+    for value in set_values:
+        args += ["--set", value]
+    result = subprocess.run(args, capture_output=True, text=True)
+    return result, [doc for doc in yaml.safe_load_all(result.stdout or "") if doc]
+
+
+def find(docs, kind, name):
+    (doc,) = [d for d in docs if d["kind"] == kind and d["metadata"]["name"] == name]
+    return doc
@@ -0,0 +1,25 @@
+"""An in-memory Route53 client for the route53_sync tests."""
+
+
+class FakeRoute53:
+    """Hosted zones held in memory; ``calls`` records every change batch."""
+
+    def __init__(self, zones=None):
+        self.zones = {zone_id: dict(records) for zone_id, records in (zones or {}).items()}
+        self.calls = []
+
+    def list_resource_record_sets(self, HostedZoneId, **kwargs):
+        return {
+            "ResourceRecordSets": [
+                {"Name": name + ".", "Type": "A", "TTL": 30, "ResourceRecords": [{"Value": ip} for ip in ips]}
+                for name, ips in self.zones.get(HostedZoneId, {}).items()
+            ],
+            "IsTruncated": False,
+        }
+
+    def change_resource_record_sets(self, HostedZoneId, ChangeBatch):
+        self.calls.append((HostedZoneId, ChangeBatch))
+        for change in ChangeBatch["Changes"]:
+            record_set = change["ResourceRecordSet"]
+            self.zones.setdefault(HostedZoneId, {})[record_set["Name"]] = [
+                r["Value"] for r in record_set["ResourceRecords"]]
@@ -1,15 +1,22 @@
+import json
+import os
+
 import aws_cdk as core
-import aws_cdk.assertions as assertions
 
-from app_cdk.app_cdk_stack import AppCdkStack
+from app_cdk import lookups, registry
+
+
+def test_app_synthesizes_offline(monkeypatch, tmp_path):
+    monkeypatch.setenv("CDK_DEFAULT_REGION", "us-west-2")
+    app = core.App(outdir=str(tmp_path), context={lookups.OFFLINE_CONTEXT_KEY: "true"})
+    env = lookups.offline_environment()
+    lookups.prime_offline_context(app, env)
 
-# example tests. To run these tests, uncomment this file along with the example
-# resource in app_cdk/app_cdk_stack.py
-def test_sqs_queue_created():
-    app = core.App()
-    stack = AppCdkStack(app, "app-cdk")
-    template = assertions.Template.from_stack(stack)
+    stacks = registry.build(app, env)
+    assembly = app.synth()
 
-#     template.has_resource_properties("AWS::SQS::Queue", {
-#         "VisibilityTimeout": 300
-#     })
+    assert sorted(stacks) == sorted(spec.name for spec in registry.STACKS)
+    with open(os.path.join(assembly.directory, "manifest.json")) as manifest:
+        assert "missing" not in json.load(manifest)
+    for stack in stacks.values():
+        assert os.path.exists(os.path.join(assembly.directory, stack.template_file))
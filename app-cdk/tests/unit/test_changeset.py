@@ -0,0 +1,92 @@
+import json
+import os
+
+import pytest
+
+from functions.route53_sync import changeset
+from functions.route53_sync.changeset import Record
+
+from .route53 import FakeRoute53
+
+RECORDS_PATH = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, os.pardir, "network_config", "records.json")
+
+
+class PagedRoute53(FakeRoute53):
+    """Returns one record set per page and lists the two repo zones."""
+
+    def list_resource_record_sets(self, HostedZoneId, StartRecordName=None, StartRecordType=None):
+        record_sets = super().list_resource_record_sets(HostedZoneId)["ResourceRecordSets"]
+        names = [r["Name"] for r in record_sets]
+        start = names.index(StartRecordName) if StartRecordName else 0
+        page = {"ResourceRecordSets": record_sets[start:start + 1], "IsTruncated": start + 1 < len(record_sets)}
+        if page["IsTruncated"]:
+            page.update(NextRecordName=names[start + 1], NextRecordType="A")
+        return page
+
+    def list_hosted_zones_by_name(self, DNSName):
+        return {"HostedZones": [
+            {"Id": "/hostedzone/ZAMF", "Name": "amf.open5gs.service.", "Config": {"PrivateZone": True}},
+            {"Id": "/hostedzone/ZUPF", "Name": "upf.open5gs.service.", "Config": {"PrivateZone": True}},
+        ]}
+
+
+def test_diff_skips_matching_records():
+    current = {Record("Z1", "amf.open5gs.service", ("10.1.30.1",)).key: Record("Z1", "amf.open5gs.service", ("10.1.30.1",))}
+    desired = [Record("Z1", "amf.open5gs.service.", ("10.1.30.1", "10.1.30.1"))]
+    assert changeset.diff(desired, current) == []
+
+
+def test_diff_upserts_changed_ttl_and_values_and_deletes_emptied_records():
+    old = Record("Z1", "smf.open5gs.service", ("10.1.30.5",))
+    current = {old.key: old, Record("Z1", "nrf.open5gs.service", ("10.1.30.9",)).key: Record("Z1", "nrf.open5gs.service", ("10.1.30.9",))}
+    changes = changeset.diff([
+        Record("Z1", "smf.open5gs.service", ("10.1.30.6",), ttl=60),
+        Record("Z1", "nrf.open5gs.service", ()),
+        Record("Z1", "amf.open5gs.service", ("10.1.30.1",)),
+        Record("Z1", "ausf.open5gs.service", ()),
+    ], current)
+    assert [(c.action, c.record.name) for c in changes] == [
+        ("UPSERT", "smf.open5gs.service"), ("DELETE", "nrf.open5gs.service"), ("UPSERT", "amf.open5gs.service")]
+    assert changes[0].describe() == "  ~ smf.open5gs.service A 30 -> 60 ['10.1.30.5'] -> ['10.1.30.6']"
+
+
+def test_one_batch_per_zone_split_at_api_limit():
+    changes = [changeset.Change("UPSERT", Record("Z1", f"ue{i}.open5gs.service", ("10.0.0.1",)))
+               for i in range(changeset.MAX_CHANGES_PER_BATCH + 1)]
+    changes.append(changeset.Change("UPSERT", Record("Z2", "upf.open5gs.service", ("10.0.0.2",))))
+    batches = changeset.change_batches(changes)
+    assert [len(b["Changes"]) for b in batches["Z1"]] == [changeset.MAX_CHANGES_PER_BATCH, 1]
+    assert len(batches["Z2"]) == 1
+
+
+def test_fetch_current_follows_pages():
+    route53 = PagedRoute53({"Z1": {"amf.open5gs.service": ["10.1.30.1"], "other.open5gs.service": ["10.9.9.9"],
+                                   "upf.open5gs.service": ["10.1.30.2"]}})
+    current = changeset.fetch_current(route53, "Z1", ["amf.open5gs.service", "upf.open5gs.service"])
+    assert sorted(record.name for record in current.values()) == ["amf.open5gs.service", "upf.open5gs.service"]
+
+
+def test_plan_does_not_change_zones(capsys):
+    route53 = PagedRoute53({"ZAMF": {"amf.open5gs.service": ["10.1.30.138"]}})
+    changeset.main(["plan", "--records", RECORDS_PATH, "--set", "amf.open5gs.service=10.1.30.138"], route53=route53)
+    assert route53.calls == []
+    assert capsys.readouterr().out.splitlines() == [
+        "amf.open5gs.service (ZAMF): no changes",
+        "upf.open5gs.service (ZUPF): 1 change(s)",
+        "  + upf.open5gs.service A 30 ['10.1.30.210']",
+    ]
+
+
+def test_apply_sends_one_call_per_changed_zone(capsys):
+    route53 = PagedRoute53({"ZAMF": {"amf.open5gs.service": ["10.1.30.138"]}})
+    changeset.main(["apply", "--records", RECORDS_PATH, "--set", "upf.open5gs.service=10.1.30.7,10.1.40.7",
+                    "--json"], route53=route53)
+    assert [zone_id for zone_id, _ in route53.calls] == ["ZUPF"]
+    assert route53.zones["ZUPF"] == {"upf.open5gs.service": ["10.1.30.7", "10.1.40.7"]}
+    assert list(json.loads(capsys.readouterr().out)) == ["ZUPF"]
+
+
+def test_unknown_override_is_rejected():
+    with pytest.raises(ValueError, match="smf.open5gs.service"):
+        changeset.main(["plan", "--records", RECORDS_PATH, "--set", "smf.open5gs.service=10.1.30.1"],
+                       route53=PagedRoute53())
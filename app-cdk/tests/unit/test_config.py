@@ -0,0 +1,172 @@
+import json
+
+import pytest
+
+from app_cdk.config import ConfigError, load_config
+
+BASE = {
+    "KEY_NAME": "private5g-west-2",
+    "AZS": ["us-west-2a", "us-west-2b"],
+    "VPC_CIDR": "10.1.0.0/16",
+    "PUBLIC_SUBNET_AZ1_CIDR": "10.1.10.0/24",
+    "PUBLIC_SUBNET_AZ2_CIDR": "10.1.20.0/24",
+    "PRIVATE_SUBNET_AZ1_CIDR": "10.1.30.0/24",
+    "PRIVATE_SUBNET_AZ2_CIDR": "10.1.40.0/24",
+    "CUSTOMER_VPC_CIDR": "192.168.0.0/16",
+}
+
+
+def write_config(tmp_path, name="variables.json", **overrides):
+    values = dict(BASE, **overrides)
+    (tmp_path / name).write_text(json.dumps(values))
+    return str(tmp_path)
+
+
+def test_repo_config_is_valid():
+    config = load_config("us-west-2")
+    assert config.region == "us-west-2"
+    assert config.azs == ("us-west-2a", "us-west-2b")
+
+
+def test_config_is_memoized(tmp_path):
+    config_dir = write_config(tmp_path)
+    assert load_config("us-west-2", config_dir) is load_config("us-west-2", config_dir)
+
+
+def test_config_is_frozen(tmp_path):
+    config = load_config("us-west-2", write_config(tmp_path))
+    with pytest.raises(AttributeError):
+        config.vpc_cidr = "10.2.0.0/16"
+
+
+def test_region_overlay(tmp_path):
+    config_dir = write_config(tmp_path)
+    (tmp_path / "variables.us-east-1.json").write_text(json.dumps({
+        "KEY_NAME": "private5g-east-1",
+        "AZS": ["us-east-1a", "us-east-1b"],
+    }))
+    config = load_config("us-east-1", config_dir)
+    assert config.key_name == "private5g-east-1"
+    assert config.vpc_cidr == BASE["VPC_CIDR"]
+
+
+def test_unknown_key_is_rejected(tmp_path):
+    config_dir = write_config(tmp_path, VPC_CDIR="10.1.0.0/16")
+    with pytest.raises(ConfigError, match="VPC_CDIR"):
+        load_config("us-west-2", config_dir)
+
+
+def test_missing_key_is_rejected(tmp_path):
+    values = dict(BASE)
+    del values["KEY_NAME"]
+    (tmp_path / "variables.json").write_text(json.dumps(values))
+    with pytest.raises(ConfigError, match="KEY_NAME"):
+        load_config("us-west-2", str(tmp_path))
+
+
+def test_region_mismatch_is_rejected(tmp_path):
+    with pytest.raises(ConfigError, match="region"):
+        load_config("eu-west-1", write_config(tmp_path))
+
+
+@pytest.mark.parametrize("overrides, message", [
+    ({"VPC_CIDR": "10.1.0.0/33"}, "not a valid CIDR"),
+    ({"PRIVATE_SUBNET_AZ1_CIDR": "10.2.30.0/24"}, "not inside VPC_CIDR"),
+    ({"PRIVATE_SUBNET_AZ2_CIDR": "10.1.30.128/25"}, "overlaps PRIVATE_SUBNET_AZ1_CIDR"),
+    ({"CUSTOMER_VPC_CIDR": "10.0.0.0/8"}, "overlaps VPC_CIDR"),
+])
+def test_cidr_checks(tmp_path, overrides, message):
+    with pytest.raises(ConfigError, match=message):
+        load_config("us-west-2", write_config(tmp_path, **overrides))
+
+
+def test_node_groups_default_to_single_group(tmp_path):
+    (group,) = load_config("us-west-2", write_config(tmp_path)).node_groups
+    assert (group.instance_type, group.min_size, group.desired_size, group.max_size) == ("c5.2xlarge", 1, 1, 1)
+    assert group.azs == ("us-west-2a", "us-west-2b")
+
+
+def test_node_group_profiles(tmp_path):
+    config_dir = write_config(tmp_path, NODE_GROUPS=[
+        {"name": "upf", "instance_type": "c6in.4xlarge", "min_size": 2, "desired_size": 2, "max_size": 6,
+         "azs": ["us-west-2b"], "labels": {"nf-group": "upf"},
+         "taints": [{"key": "dedicated", "value": "upf", "effect": "NoSchedule"}]},
+    ])
+    (group,) = load_config("us-west-2", config_dir).node_groups
+    assert group.azs == ("us-west-2b",)
+    assert group.labels == (("nf-group", "upf"),)
+    assert group.taints[0].effect == "NoSchedule"
+    assert group.tuning_profile == "default"
+
+
+@pytest.mark.parametrize("group, message", [
+    ({"instance_type": "c5.large", "min_size": 1, "desired_size": 1, "max_size": 1}, "missing keys"),
+    ({"name": "nf", "instance_type": "c5", "min_size": 1, "desired_size": 1, "max_size": 1}, "instance type"),
+    ({"name": "nf", "instance_type": "c5.large", "min_size": 2, "desired_size": 1, "max_size": 3}, "min_size"),
+    ({"name": "nf", "instance_type": "c5.large", "min_size": 1, "desired_size": 1, "max_size": 1,
+      "azs": ["us-east-1a"]}, "subset of AZS"),
+    ({"name": "nf", "instance_type": "c5.large", "min_size": 1, "desired_size": 1, "max_size": 1,
+      "taints": [{"key": "a", "value": "b", "effect": "Never"}]}, "taint effect"),
+    ({"name": "nf", "instance_type": "c5.large", "min_size": 1, "desired_size": 1, "max_size": 1,
+      "tuning_profile": "turbo"}, "tuning_profile"),
+])
+def test_invalid_node_groups(tmp_path, group, message):
+    with pytest.raises(ConfigError, match=message):
+        load_config("us-west-2", write_config(tmp_path, NODE_GROUPS=[group]))
+
+
+def test_multus_defaults(tmp_path):
+    config = load_config("us-west-2", write_config(tmp_path))
+    assert config.multus_az == "us-west-2a"
+    assert config.multus_subnet_cidrs == {"n3": "10.1.50.0/24", "n6": "10.1.60.0/24"}
+
+
+@pytest.mark.parametrize("overrides, message", [
+    ({"N3_SUBNET_CIDR": "10.1.30.0/25"}, "overlaps PRIVATE_SUBNET_AZ1_CIDR"),
+    ({"N6_SUBNET_CIDR": "10.2.60.0/24"}, "not inside VPC_CIDR"),
+    ({"N6_SUBNET_CIDR": "10.1.60.0/28"}, "/27 or larger"),
+    ({"MULTUS_AZ": "us-west-2c"}, "MULTUS_AZ"),
+    ({"NODE_GROUPS": [{"name": "upf", "instance_type": "c5n.2xlarge", "min_size": 1, "desired_size": 1,
+                       "max_size": 1, "multus_networks": ["n3", "n9"]}]}, "multus_networks"),
+    ({"MULTUS_AZ": "us-west-2b",
+      "NODE_GROUPS": [{"name": "upf", "instance_type": "c5n.2xlarge", "min_size": 1, "desired_size": 1,
+                       "max_size": 1, "azs": ["us-west-2a"], "multus_networks": ["n3"]}]}, "not in MULTUS_AZ"),
+])
+def test_invalid_multus_settings(tmp_path, overrides, message):
+    with pytest.raises(ConfigError, match=message):
+        load_config("us-west-2", write_config(tmp_path, **overrides))
+
+
+def test_vpn_tunnel_inside_cidrs(tmp_path):
+    config = load_config("us-west-2", write_config(tmp_path))
+    assert config.vpn_tunnel_inside_cidrs == (("169.254.10.0/30", "169.254.10.4/30"),)
+    # The /30s AWS reserves are skipped.
+    (tmp_path / "reserved").mkdir()
+    config = load_config("us-west-2", write_config(tmp_path / "reserved", VPN_CONNECTIONS=3,
+                                                    VPN_INSIDE_CIDR_POOL="169.254.0.0/21"))
+    assert config.vpn_tunnel_inside_cidrs == (("169.254.0.4/30", "169.254.0.8/30"),
+                                              ("169.254.0.12/30", "169.254.0.16/30"),
+                                              ("169.254.0.20/30", "169.254.0.24/30"))
+
+
+@pytest.mark.parametrize("overrides, message", [
+    ({"VPN_CONNECTIONS": 0}, "VPN_CONNECTIONS"),
+    ({"VPN_CONNECTIONS": 11}, "VPN_CONNECTIONS"),
+    ({"VPN_INSIDE_CIDR_POOL": "10.1.0.0/24"}, "inside 169.254.0.0/16"),
+    ({"VPN_INSIDE_CIDR_POOL": "169.254.10.0/31"}, "/30 or larger"),
+    ({"VPN_CONNECTIONS": 3, "VPN_INSIDE_CIDR_POOL": "169.254.10.0/28"}, "has 4 usable /30s"),
+    ({"VPN_INSIDE_CIDR_POOL": "169.254.1.0/30"}, "has 0 usable /30s"),
+])
+def test_invalid_vpn_settings(tmp_path, overrides, message):
+    with pytest.raises(ConfigError, match=message):
+        load_config("us-west-2", write_config(tmp_path, **overrides))
+
+
+@pytest.mark.parametrize("overrides, message", [
+    ({"UERANSIM_VERSION": "master"}, "UERANSIM_VERSION"),
+    ({"RAN_FLEET_SIZE": 0}, "RAN_FLEET_SIZE"),
+    ({"RAN_FLEET_SIZE": 17}, "RAN_FLEET_SIZE"),
+])
+def test_invalid_ran_settings(tmp_path, overrides, message):
+    with pytest.raises(ConfigError, match=message):
+        load_config("us-west-2", write_config(tmp_path, **overrides))
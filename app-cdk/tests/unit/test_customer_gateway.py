@@ -0,0 +1,124 @@
+import json
+
+import pytest
+
+from customer_gateway import __main__ as cgw
+from customer_gateway import render
+
+CONNECTIONS = [
+    {"id": "vpn-1", "tunnels": [{"inside_cidr": "169.254.10.0/30", "psk_secret_arn": "arn:psk-1-1"},
+                                {"inside_cidr": "169.254.10.4/30", "psk_secret_arn": "arn:psk-1-2"}]},
+    {"id": "vpn-2", "tunnels": [{"inside_cidr": "169.254.10.8/30", "psk_secret_arn": "arn:psk-2-1"},
+                                {"inside_cidr": "169.254.10.12/30", "psk_secret_arn": "arn:psk-2-2"}]},
+]
+# describe-vpn-connections lists the tunnels in no particular order.
+DESCRIPTIONS = [
+    {"VpnConnectionId": "vpn-2", "Options": {"TunnelOptions": [
+        {"OutsideIpAddress": "52.0.0.4", "TunnelInsideCidr": "169.254.10.12/30"},
+        {"OutsideIpAddress": "52.0.0.3", "TunnelInsideCidr": "169.254.10.8/30"}]}},
+    {"VpnConnectionId": "vpn-1", "Options": {"TunnelOptions": [
+        {"OutsideIpAddress": "52.0.0.1", "TunnelInsideCidr": "169.254.10.0/30"},
+        {"OutsideIpAddress": "52.0.0.2", "TunnelInsideCidr": "169.254.10.4/30"}]}},
+]
+PSKS = {f"arn:psk-{c}-{t}": f"key{c}{t}" for c in (1, 2) for t in (1, 2)}
+PARAMETER = {"amazon_side_asn": 64512, "customer_side_asn": 65016, "connections": CONNECTIONS}
+
+
+@pytest.fixture
+def tunnels():
+    return render.tunnels_from_aws(CONNECTIONS, DESCRIPTIONS, PSKS)
+
+
+def test_tunnels_from_aws(tunnels):
+    assert [(t.name, t.number, t.outside_ip, t.psk) for t in tunnels] == [
+        ("vpn1-tunnel1", 1, "52.0.0.1", "key11"), ("vpn1-tunnel2", 2, "52.0.0.2", "key12"),
+        ("vpn2-tunnel1", 3, "52.0.0.3", "key21"), ("vpn2-tunnel2", 4, "52.0.0.4", "key22")]
+    assert (tunnels[2].aws_inside_ip, tunnels[2].inside_ip) == ("169.254.10.9", "169.254.10.10")
+    with pytest.raises(ValueError, match="vpn-1 has no tunnel with inside CIDR 169.254.10.0/30"):
+        render.tunnels_from_aws(CONNECTIONS, DESCRIPTIONS[:1], PSKS)
+
+
+@pytest.mark.parametrize("kernel, strongswan, interface", [
+    ("5.10.192-183.736.amzn2.x86_64", "5.9.10", "xfrm"),
+    ("4.14.326-245.539.amzn2.x86_64", "5.9.10", "vti"),
+    ("5.10.192-183.736.amzn2.x86_64", "5.7.2", "vti"),
+    ("6.1.0", "0", "vti"),
+])
+def test_choose_interface(kernel, strongswan, interface):
+    assert render.choose_interface(kernel, strongswan) == interface
+
+
+def test_parse_version_output():
+    assert render.parse_version_output("Linux strongSwan U5.7.2/K4.14.326") == "5.7.2"
+    assert render.parse_version_output("") is None
+
+
+@pytest.mark.parametrize("interface, binding", [("xfrm", "if_id_in = 3"), ("vti", "mark_in = 3")])
+def test_swanctl_has_a_connection_per_tunnel(tunnels, interface, binding):
+    conf = render.render_swanctl(tunnels, "10.2.0.10", "34.1.2.3", interface)
+    for tunnel in tunnels:
+        assert f"remote_addrs = {tunnel.outside_ip}" in conf
+        assert f'secret = "{tunnel.psk}"' in conf
+    assert conf.count("version = 2") == 4
+    assert conf.count(f"esp_proposals = {render.ESP_PROPOSAL}") == 4
+    assert conf.count("id = 34.1.2.3") == 4
+    assert binding in conf
+    assert conf.count("{") == conf.count("}")
+    with pytest.raises(ValueError, match="interface type"):
+        render.render_swanctl(tunnels, "10.2.0.10", "34.1.2.3", "gre")
+
+
+def test_charon_threads_follow_the_cores():
+    assert render.charon_threads(2) == 16
+    assert render.charon_threads(16) == 32
+    assert "threads = 32" in render.render_strongswan(16)
+
+
+def test_interfaces_script(tunnels):
+    xfrm = render.render_interfaces(tunnels, "xfrm", "10.2.0.10")
+    assert "ip link add xfrm4 type xfrm dev eth0 if_id 4" in xfrm
+    assert "ip addr add 169.254.10.14/30 dev xfrm4" in xfrm
+    assert f"ip link set xfrm4 up mtu {render.TUNNEL_MTU}" in xfrm
+    assert f"--set-mss {render.TCP_MSS}" in xfrm
+    vti = render.render_interfaces(tunnels, "vti", "10.2.0.10")
+    assert "ip link add vti1 type vti local 10.2.0.10 remote 52.0.0.1 key 1" in vti
+    assert "net.ipv4.conf.vti1.disable_policy=1" in vti
+
+
+def test_bgp_multipath_over_every_tunnel(tunnels):
+    conf = render.render_bgpd(tunnels, 65016, 64512, ["10.2.0.0/16"], "10.2.0.10")
+    assert "router bgp 65016" in conf
+    assert " maximum-paths 4" in conf
+    assert " network 10.2.0.0/16" in conf
+    for tunnel in tunnels:
+        assert f" neighbor {tunnel.aws_inside_ip} remote-as 64512" in conf
+    assert "net.ipv4.fib_multipath_hash_policy = 1" in render.render_sysctl()
+    assert "ip route 10.2.0.0/16 10.2.0.1" in render.render_zebra("10.2.0.0/16", render.vpc_router("10.2.0.0/24"))
+
+
+def test_configure_dry_run(tmp_path, monkeypatch):
+    monkeypatch.setattr(cgw, "instance_metadata", lambda: {
+        "region": "us-west-2", "local_address": "10.2.0.10", "public_ip": "34.1.2.3",
+        "subnet_cidr": "10.2.0.0/24", "vpc_cidr": "10.2.0.0/16"})
+    monkeypatch.setattr(cgw, "vpn_connections", lambda region: dict(PARAMETER, amazon_side_asn=4200000000))
+    monkeypatch.setattr(cgw, "fetch_tunnels",
+                        lambda region, connections: render.tunnels_from_aws(connections, DESCRIPTIONS, PSKS))
+    assert cgw.main(["configure", "--dry-run", "--out", str(tmp_path), "--interface", "xfrm"]) == 0
+    assert "if_id_in = 4" in (tmp_path / "etc/strongswan/swanctl/conf.d/private5g.conf").read_text()
+    bgpd = (tmp_path / "etc/quagga/bgpd.conf").read_text()
+    assert "router bgp 65016" in bgpd
+    assert " neighbor 169.254.10.13 remote-as 4200000000" in bgpd
+    assert (tmp_path / "usr/local/sbin/private5g-tunnels").stat().st_mode & 0o111
+
+    monkeypatch.setattr(cgw, "vpn_connections", lambda region: None)
+    assert cgw.main(["configure", "--dry-run", "--out", str(tmp_path)]) == 1
+
+
+def test_vpn_connections_before_tgw_vpn_stack(monkeypatch):
+    def missing(region, *args):
+        raise cgw.ConfigureError("An error occurred (ParameterNotFound) when calling the GetParameter operation")
+    monkeypatch.setattr(cgw, "_aws", missing)
+    assert cgw.vpn_connections("us-west-2") is None
+    monkeypatch.setattr(cgw, "_aws", lambda region, *args: json.dumps(
+        {"Parameter": {"Value": json.dumps(PARAMETER)}}))
+    assert cgw.vpn_connections("us-west-2") == PARAMETER
@@ -0,0 +1,120 @@
+import dataclasses
+import json
+import os
+import re
+import subprocess
+
+import aws_cdk as cdk
+import aws_cdk.assertions as assertions
+import pytest
+
+from app_cdk import customer_vpc_cdk_stack, lookups
+from app_cdk.config import load_config
+from app_cdk.customer_vpc_cdk_stack import CustomerVpcCdkStack
+from app_cdk.nomultus_eks_nodegroup_stack import FUNCTIONS_DIR
+from app_cdk.shared import VPN_PSK_TAG, ueransim_artifact_key
+
+
+def synth(**overrides):
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("CDK_DEFAULT_REGION", "us-west-2")
+        if overrides:
+            config = dataclasses.replace(load_config(), **overrides)
+            monkeypatch.setattr(customer_vpc_cdk_stack, "load_config", lambda: config)
+        app = cdk.App(context={lookups.OFFLINE_CONTEXT_KEY: "true"})
+        env = lookups.offline_environment()
+        lookups.prime_offline_context(app, env)
+        stack = CustomerVpcCdkStack(app, "customer-vpc-cdk-stack", env=env)
+        return assertions.Template.from_stack(stack)
+
+
+@pytest.fixture(scope="module")
+def template():
+    return synth()
+
+
+def ran_user_data(template):
+    """User data of each RAN instance, by construct id."""
+    return {re.sub(r"[0-9A-F]{8}$", "", logical_id): json.dumps(resource["Properties"]["UserData"])
+            for logical_id, resource in template.find_resources("AWS::EC2::Instance").items()
+            if logical_id.startswith("CustomerRANInstance")}
+
+
+def test_gateway_installs_cgw_configure(template):
+    instances = template.find_resources("AWS::EC2::Instance", {"Properties": {"SourceDestCheck": False}})
+    (gateway,) = instances.values()
+    user_data = json.dumps(gateway["Properties"]["UserData"])
+    assert "yum install strongswan quagga python3 unzip -y" in user_data
+    assert "/usr/local/bin/cgw-configure" in user_data
+    assert "python3 -m customer_gateway configure" in user_data
+    # Not zipped into the node group stacks' Lambda asset.
+    assert os.path.commonpath([os.path.realpath(customer_vpc_cdk_stack.CUSTOMER_GATEWAY_DIR),
+                               os.path.realpath(FUNCTIONS_DIR)]) != os.path.realpath(FUNCTIONS_DIR)
+
+
+def test_gateway_reads_only_the_vpn_settings(template):
+    policies = template.find_resources("AWS::IAM::Policy")
+    statements = [s for p in policies.values() for s in p["Properties"]["PolicyDocument"]["Statement"]]
+    actions = {s["Action"] if isinstance(s["Action"], str) else tuple(s["Action"]): s for s in statements}
+    assert "VpnConnections" in json.dumps(actions["ssm:GetParameter"]["Resource"])
+    assert actions["secretsmanager:GetSecretValue"]["Condition"] == {
+        "StringEquals": {f"secretsmanager:ResourceTag/{VPN_PSK_TAG}": "true"}}
+    assert "ec2:DescribeVpnConnections" in actions
+
+
+def test_ran_fetches_the_prebuilt_ueransim(template):
+    (user_data,) = ran_user_data(template).values()
+    assert "make" not in user_data and "git clone" not in user_data and "apt upgrade" not in user_data
+    assert f"{ueransim_artifact_key('v3.2.6')}.sha256" in user_data
+    assert "sha256sum -c" in user_data
+    assert "GNB_INDEX=0" in user_data
+    assert "python3 -m ranload render --gnb-index" in user_data
+    assert "ExecStart=/opt/UERANSIM/build/nr-gnb -c /etc/ueransim/gnb.yaml" in user_data
+    # The pipeline's bucket, resolved from its parameter at deploy time.
+    (parameter,) = [name for name, parameter in template.to_json()["Parameters"].items()
+                    if parameter["Default"] == "UeransimArtifactBucket"]
+    assert json.dumps({"Ref": parameter}) in user_data
+    statements = [statement for policy in template.find_resources("AWS::IAM::Policy").values()
+                  for statement in policy["Properties"]["PolicyDocument"]["Statement"]
+                  if statement["Action"] == "s3:GetObject"]
+    assert statements and all(
+        statement["Resource"] == {"Fn::Join": ["", ["arn:", {"Ref": "AWS::Partition"}, ":s3:::",
+                                                    {"Ref": parameter}, "/ueransim/v3.2.6/*"]]}
+        for statement in statements)
+
+
+# aws cp writes $CHECKSUM as the .sha256 and "tarball" as the tarball; tar and sleep only log.
+FAKE_RAN_BIN = {
+    "aws": """echo "aws $*" >> "$CALLS"
+case "$*" in
+  "s3 cp"*.sha256*) [ -n "$CHECKSUM" ] && echo "$CHECKSUM" > "${@: -1}" ;;
+  "s3 cp"*) echo tarball > "${@: -1}" ;;
+esac""",
+    "tar": 'echo "tar $*" >> "$CALLS"',
+    "sleep": "true",
+}
+
+
+# Not published yet; published, but not matching the tarball.
+@pytest.mark.parametrize("checksum", ["", "0" * 64])
+def test_ran_stops_without_a_verified_ueransim(tmp_path, monkeypatch, checksum):
+    monkeypatch.setattr(customer_vpc_cdk_stack, "UERANSIM_WAIT_ATTEMPTS", 2)
+    for name, script in FAKE_RAN_BIN.items():
+        (tmp_path / name).write_text(f"#!/bin/bash\n{script}\n")
+        (tmp_path / name).chmod(0o755)
+    script = "\n".join(customer_vpc_cdk_stack.ueransim_commands("v3.2.6", "us-west-2", "artifacts") + ["echo installed"])
+    env = dict(os.environ, PATH=f"{tmp_path}:{os.environ['PATH']}", CALLS=str(tmp_path / "calls"),
+               CHECKSUM=checksum)
+    result = subprocess.run(["bash", "-c", script.replace("/tmp/", f"{tmp_path}/")], env=env,
+                            capture_output=True, text=True)
+    assert result.returncode == 1
+    assert "installed" not in result.stdout
+    assert "tar " not in (tmp_path / "calls").read_text()
+
+
+def test_ran_fleet():
+    user_data = ran_user_data(synth(ran_fleet_size=3))
+    assert sorted(user_data) == ["CustomerRANInstance", "CustomerRANInstance2", "CustomerRANInstance3"]
+    for index, construct_id in enumerate(["CustomerRANInstance", "CustomerRANInstance2", "CustomerRANInstance3"]):
+        assert f"GNB_INDEX={index}" in user_data[construct_id]
+        assert "RAN_FLEET_SIZE=3" in user_data[construct_id]
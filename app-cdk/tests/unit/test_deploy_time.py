@@ -0,0 +1,149 @@
+import json
+import os
+import stat
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, os.pardir, "loadtest"))
+
+from ranload import deploytime  # noqa: E402
+from ranload.__main__ import main  # noqa: E402
+
+STARTED = deploytime._timestamp("2026-10-18T12:00:00Z")
+
+
+def pod(name, ready_at=None, restarts=0, owner="ReplicaSet"):
+    conditions = [{"type": "Ready", "status": "True", "lastTransitionTime": ready_at}] if ready_at else [
+        {"type": "Ready", "status": "False", "lastTransitionTime": "2026-10-18T12:00:01Z"}]
+    return {
+        "metadata": {"name": name, "ownerReferences": [{"kind": owner}]},
+        "status": {"conditions": conditions, "containerStatuses": [{"restartCount": restarts}]},
+    }
+
+
+PODS = {"items": [
+    pod("core5g-nrf-deployment-abc", "2026-10-18T12:00:09Z"),
+    pod("core5g-udr-deployment-def", "2026-10-18T12:00:31Z", restarts=1),
+    pod("core5g-upf-0", "2026-10-18T12:00:14Z"),
+    pod("core5g-mongo-ue-import-xyz", owner="Job"),
+]}
+
+
+def workload(kind, replicas, ready, updated=None, generation=2, observed=2):
+    updated = ready if updated is None else updated
+    if kind == "DaemonSet":
+        spec, status = {}, {"desiredNumberScheduled": replicas, "updatedNumberScheduled": updated, "numberReady": ready}
+    else:
+        spec, status = {"replicas": replicas}, {"updatedReplicas": updated, "readyReplicas": ready}
+    return {"kind": kind, "metadata": {"generation": generation}, "spec": spec,
+            "status": dict(status, observedGeneration=observed)}
+
+
+def workloads(ready):
+    # Right after an upgrade the StatefulSet still reports the previous generation, all replicas ready.
+    return {"items": [
+        workload("Deployment", 1, 1),
+        workload("StatefulSet", 2, 2) if ready else workload("StatefulSet", 2, 2, observed=1),
+        workload("DaemonSet", 3, 3),
+    ]}
+
+
+def test_workloads_ready():
+    assert deploytime.workloads_ready(workloads(False)) == (2, 3)
+    assert deploytime.workloads_ready(workloads(True)) == (3, 3)
+    assert deploytime.workloads_ready({"items": []}) == (0, 0)
+
+
+@pytest.mark.parametrize("item, ready", [
+    (workload("Deployment", 2, 2, updated=1), False),
+    (workload("Deployment", 2, 3), False),
+    (workload("Deployment", 0, 0), True),
+    (workload("DaemonSet", 3, 3, updated=2), False),
+    (workload("DaemonSet", 0, 0), True),
+])
+def test_workload_readiness(item, ready):
+    assert deploytime.workloads_ready({"items": [item]}) == (int(ready), 1)
+
+
+def test_pod_times_skip_jobs():
+    assert deploytime.pod_times(PODS, STARTED) == {
+        "core5g-nrf-deployment-abc": {"ready_seconds": 9.0, "restarts": 0},
+        "core5g-udr-deployment-def": {"ready_seconds": 31.0, "restarts": 1},
+        "core5g-upf-0": {"ready_seconds": 14.0, "restarts": 0},
+    }
+    not_ready = deploytime.pod_times({"items": [pod("core5g-amf-1-deployment-x")]}, STARTED)
+    assert not_ready["core5g-amf-1-deployment-x"]["ready_seconds"] is None
+
+
+# kubectl answers "not ready" to the first workload poll and "ready" after that.
+FAKE_KUBECTL = """#!/usr/bin/env python3
+import json, os, sys
+args = sys.argv[1:]
+with open(sys.argv[0] + ".calls", "a") as calls:
+    calls.write(" ".join(args) + "\\n")
+if args[0] == "wait":
+    print("error: no matching resources found", file=sys.stderr)
+    sys.exit(1)
+if args[1] == "pods":
+    print(json.dumps(PODS))
+else:
+    polls = sys.argv[0] + ".polls"
+    n = int(open(polls).read()) if os.path.exists(polls) else 0
+    open(polls, "w").write(str(n + 1))
+    print(json.dumps(WORKLOADS[min(n, 1)]))
+"""
+FAKE_HELM = """#!/bin/sh
+echo "$@" >> "$0.calls"
+"""
+
+
+@pytest.fixture
+def fake_bin(tmp_path, monkeypatch):
+    kubectl = f"PODS = {PODS!r}\nWORKLOADS = {[workloads(False), workloads(True)]!r}\n"
+    for name, script in (("kubectl", FAKE_KUBECTL.replace("import json, os, sys\n", "import json, os, sys\n" + kubectl)),
+                         ("helm", FAKE_HELM)):
+        path = tmp_path / name
+        path.write_text(script)
+        path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+    return tmp_path
+
+
+def test_measure_cold_deploy(fake_bin):
+    clock = iter([STARTED, STARTED + 20.0, STARTED + 32.0])
+    report = deploytime.measure("core5g", "open5gs", "chart/", ["upf.replicas=2"], labels={"chart": "probes"},
+                                clock=lambda: next(clock), sleep=lambda seconds: None)
+    assert report["seconds"] == 32.0
+    assert report["workloads"] == 3
+    assert report["restarts"] == 1
+    assert report["slowest"] == "core5g-udr-deployment-def"
+    assert report["labels"] == {"chart": "probes"}
+    helm_calls = (fake_bin / "helm.calls").read_text().splitlines()
+    assert helm_calls == ["uninstall core5g -n open5gs",
+                          "upgrade --install core5g chart/ -n open5gs --create-namespace --set upf.replicas=2"]
+
+
+def test_measure_warm_waits_for_the_new_generation(fake_bin):
+    clock = iter([STARTED, STARTED + 1.0, STARTED + 6.0])
+    report = deploytime.measure("core5g", "open5gs", "chart/", warm=True,
+                                clock=lambda: next(clock), sleep=lambda seconds: None)
+    assert report["cold"] is False
+    assert report["seconds"] == 6.0
+    assert (fake_bin / "kubectl.polls").read_text() == "2"
+
+
+def test_measure_times_out(fake_bin):
+    clock = iter([STARTED, STARTED + 5.0])
+    with pytest.raises(deploytime.DeployTimeError, match="2/3 workloads ready after 5s"):
+        deploytime.measure("core5g", "open5gs", "chart/", timeout=5, warm=True,
+                           clock=lambda: next(clock), sleep=lambda seconds: None)
+    assert "uninstall" not in (fake_bin / "helm.calls").read_text()
+
+
+def test_main_deploy_time(fake_bin, tmp_path, capsys):
+    results = tmp_path / "deploy.json"
+    assert main(["deploy-time", "--label", "chart=probes", "--json", str(results)]) == 0
+    assert "3 workloads Ready in" in capsys.readouterr().out
+    report = json.loads(results.read_text())
+    assert report["cold"] is True and report["labels"] == {"chart": "probes"}
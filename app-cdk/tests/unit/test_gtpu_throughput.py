@@ -0,0 +1,114 @@
+import json
+import os
+import stat
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, os.pardir, "loadtest"))
+
+from ranload import throughput  # noqa: E402
+from ranload.throughput import Flow  # noqa: E402
+
+IP_JSON = json.dumps([
+    {"ifname": "lo", "addr_info": [{"family": "inet", "local": "127.0.0.1"}]},
+    {"ifname": "uesimtun10", "addr_info": [{"family": "inet", "local": "10.45.0.12"}]},
+    {"ifname": "uesimtun0", "addr_info": [{"family": "inet", "local": "10.45.0.2"}]},
+    {"ifname": "uesimtun1", "addr_info": [{"family": "inet", "local": "10.45.0.3"}]},
+    {"ifname": "eth0", "addr_info": [{"family": "inet", "local": "192.168.2.144"}]},
+])
+
+# Answers like iperf3 -J: UDP when -u is given, TCP otherwise; port 5299 fails.
+FAKE_IPERF = """#!/usr/bin/env python3
+import json, sys
+args = sys.argv[1:]
+port = args[args.index("-p") + 1]
+with open(sys.argv[0] + ".calls", "a") as calls:
+    calls.write(" ".join(args) + "\\n")
+if port == "5299":
+    print(json.dumps({"error": "unable to connect to server: Connection refused"}))
+elif "-u" in args:
+    print(json.dumps({"end": {"sum": {"seconds": 10.0, "bits_per_second": 5e8, "packets": 520000,
+                                      "lost_percent": 0.5, "jitter_ms": 0.02}}}))
+else:
+    print(json.dumps({"end": {"sum_sent": {"bits_per_second": 9.5e8, "retransmits": 3},
+                              "sum_received": {"bits_per_second": 9.4e8}}}))
+"""
+# Each call prints the next /proc/stat snapshot.
+FAKE_STAT = """#!/bin/sh
+n=$(cat "$0.n" 2>/dev/null || echo 0); echo $((n + 1)) > "$0.n"
+if [ "$n" = 0 ]; then
+  printf 'cpu  100 0 100 800 0 0 0 0 0 0\\ncpu0 50 0 50 400 0 0 0 0 0 0\\ncpu1 50 0 50 400 0 0 0 0 0 0\\nintr 1\\n'
+else
+  printf 'cpu  400 0 200 1100 100 0 0 0 0 0\\ncpu0 350 0 150 400 0 0 0 0 0 0\\ncpu1 50 0 50 700 100 0 0 0 0 0\\nintr 2\\n'
+fi
+"""
+
+
+@pytest.fixture
+def fake_bin(tmp_path, monkeypatch):
+    for name, script in (("iperf3", FAKE_IPERF), ("upf-stat", FAKE_STAT)):
+        path = tmp_path / name
+        path.write_text(script)
+        path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+    return tmp_path
+
+
+def test_tun_addresses_in_interface_order():
+    assert throughput.tun_addresses(IP_JSON) == [
+        ("uesimtun0", "10.45.0.2"), ("uesimtun1", "10.45.0.3"), ("uesimtun10", "10.45.0.12")]
+
+
+@pytest.mark.parametrize("subnet, gateway", [("10.45.0.0/16", "10.45.0.1"), ("10.46.128.0/20", "10.46.128.1")])
+def test_upf_gateway_is_the_subnets_first_host(subnet, gateway):
+    assert throughput.upf_gateway(subnet) == gateway
+
+
+def test_flows_round_robin_over_the_ues():
+    flows = throughput.plan_flows(throughput.tun_addresses(IP_JSON), 4, "10.45.0.0/16")
+    assert [(f.interface, f.port, f.server) for f in flows] == [
+        ("uesimtun0", 5201, "10.45.0.1"), ("uesimtun1", 5202, "10.45.0.1"),
+        ("uesimtun10", 5203, "10.45.0.1"), ("uesimtun0", 5204, "10.45.0.1")]
+    assert {f.server for f in throughput.plan_flows(throughput.tun_addresses(IP_JSON), 2, "10.45.0.0/16",
+                                                    server="10.0.0.5")} == {"10.0.0.5"}
+    with pytest.raises(ValueError, match="no uesimtun"):
+        throughput.plan_flows([], 1, "10.45.0.0/16")
+
+
+def test_iperf_commands():
+    flow = Flow(0, "uesimtun0", "10.45.0.2", "10.45.0.1", 5201)
+    assert throughput.iperf_command(flow, "udp", 30, 1200, None, False) == [
+        "iperf3", "-c", "10.45.0.1", "-p", "5201", "-B", "10.45.0.2", "-t", "30", "-J",
+        "-u", "-b", "0", "-l", "1200"]
+    assert throughput.iperf_command(flow, "tcp", 10, None, "200M", True)[-3:] == ["-b", "200M", "-R"]
+
+
+def test_cpu_usage_between_snapshots(fake_bin):
+    before, after = throughput._shell("upf-stat"), throughput._shell("upf-stat")
+    assert throughput.cpu_usage(before, after) == {"cpu": 50.0, "cpu0": 100.0, "cpu1": 0.0}
+
+
+def test_run_reports_every_flow(fake_bin):
+    flows = [Flow(0, "uesimtun0", "10.45.0.2", "10.45.0.1", 5201),
+             Flow(1, "uesimtun1", "10.45.0.3", "10.45.0.1", 5202),
+             Flow(2, "uesimtun0", "10.45.0.2", "10.45.0.1", 5299)]
+    report = throughput.run(flows, "udp", duration=10, length=1200, upf_stat_command="upf-stat",
+                            labels={"instance": "c5n.2xlarge"})
+    assert len((fake_bin / "iperf3.calls").read_text().splitlines()) == 3
+    ok, _, failed = report["flows"]
+    assert (ok["bits_per_second"], ok["pps"], ok["lost_percent"], ok["jitter_ms"]) == (5e8, 52000.0, 0.5, 0.02)
+    assert failed["error"] == "unable to connect to server: Connection refused"
+    assert report["total"] == {"flows": 3, "failed_flows": 1, "bits_per_second": 1e9, "pps": 104000.0,
+                               "lost_percent_max": 0.5, "jitter_ms_max": 0.02}
+    assert report["upf_cpu_percent"]["cpu"] == 50.0
+    assert report["labels"] == {"instance": "c5n.2xlarge"}
+    assert report["config"]["direction"] == "uplink"
+    json.dumps(report)
+
+
+def test_tcp_flows(fake_bin):
+    report = throughput.run([Flow(0, "uesimtun0", "10.45.0.2", "10.45.0.1", 5201)], "tcp", duration=5)
+    (flow,) = report["flows"]
+    assert (flow["bits_per_second"], flow["retransmits"], flow["pps"]) == (9.4e8, 3, None)
+    assert report["upf_cpu_percent"] is None
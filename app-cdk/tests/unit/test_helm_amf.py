@@ -0,0 +1,41 @@
+import pytest
+import yaml
+
+from .helm import find, render, requires_helm
+
+pytestmark = requires_helm
+
+
+def amf_config(docs, n):
+    return yaml.safe_load(find(docs, "ConfigMap", f"core5g-amf-{n}-config")["data"]["amf.yaml"])["amf"]
+
+
+def test_one_amf_by_default():
+    result, docs = render()
+    assert result.returncode == 0, result.stderr
+    assert [d["metadata"]["name"] for d in docs if d["kind"] == "Deployment"
+            and d["metadata"]["name"].startswith("core5g-amf")] == ["core5g-amf-1-deployment"]
+    assert amf_config(docs, 1)["guami"][0]["amf_id"] == {"region": 2, "set": 1, "pointer": 1}
+
+
+def test_amf_instances_share_an_amf_set():
+    result, docs = render("amf.instances=3")
+    assert result.returncode == 0, result.stderr
+    for n in (1, 2, 3):
+        deployment = find(docs, "Deployment", f"core5g-amf-{n}-deployment")
+        labels = deployment["spec"]["template"]["metadata"]["labels"]
+        assert (labels["epc-mode"], labels["epc-nf"]) == (f"amf-{n}", "amf")
+        assert deployment["spec"]["template"]["spec"]["volumes"][0]["configMap"]["name"] == f"core5g-amf-{n}-config"
+        assert find(docs, "Service", f"core5g-amf-{n}")["spec"]["selector"] == {"epc-mode": f"amf-{n}"}
+        config = amf_config(docs, n)
+        assert config["guami"][0]["amf_id"] == {"region": 2, "set": 1, "pointer": n}
+        assert config["sbi"][0]["advertise"] == f"core5g-amf-{n}"
+        assert config["amf_name"] == f"open5gs-amf{n}"
+        assert config["tai"][0]["tac"] == 7
+
+
+@pytest.mark.parametrize("instances", [0, 64])
+def test_amf_pointer_bounds(instances):
+    result, _ = render(f"amf.instances={instances}")
+    assert result.returncode != 0
+    assert "amf.instances must be between 1 and 63" in result.stderr
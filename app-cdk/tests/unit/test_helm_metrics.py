@@ -0,0 +1,64 @@
+import yaml
+
+from .helm import find, render, requires_helm
+
+pytestmark = requires_helm
+
+METRICS_NFS = {
+    ("ConfigMap", "core5g-amf-1-config"): ("amf.yaml", "amf"),
+    ("ConfigMap", "core5g-smf-config"): ("smf.yaml", "smf"),
+    ("ConfigMap", "core5g-pcf-config"): ("pcf.yaml", "pcf"),
+    ("ConfigMap", "core5g-upf-config"): ("upf.yaml", "upf"),
+}
+
+
+def test_metrics_servers_enabled():
+    result, docs = render()
+    assert result.returncode == 0, result.stderr
+    for (kind, name), (key, section) in METRICS_NFS.items():
+        config = yaml.safe_load(find(docs, kind, name)["data"][key])
+        assert config[section]["metrics"] == [{"addr": "0.0.0.0", "port": 9090}], name
+
+    pods = [d["spec"]["template"] for d in docs if d["kind"] in ("Deployment", "StatefulSet", "DaemonSet")]
+    scraped = {pod["metadata"]["labels"]["epc-mode"]: pod for pod in pods
+               if pod["metadata"]["labels"].get("epc-prom") == "enabled"}
+    assert set(scraped) == {"amf-1", "smf", "upf", "pcf", "node-exporter"}
+    for mode, pod in scraped.items():
+        ports = [port for c in pod["spec"]["containers"] for port in c.get("ports", []) if port.get("name") == "prom"]
+        assert len(ports) == 1, mode
+
+    service = find(docs, "Service", "core5g-metrics")
+    assert service["spec"]["selector"] == {"epc-prom": "enabled"}
+    assert service["spec"]["ports"][0]["targetPort"] == "prom"
+
+
+def test_upf_has_no_exporter_sidecar():
+    result, docs = render()
+    assert result.returncode == 0, result.stderr
+    containers = find(docs, "StatefulSet", "core5g-upf")["spec"]["template"]["spec"]["containers"]
+    assert [c["name"] for c in containers] == ["upf"]
+    exporter = find(docs, "DaemonSet", "core5g-node-exporter")["spec"]["template"]["spec"]
+    assert exporter["hostNetwork"] is True
+    assert exporter["tolerations"] == [{"operator": "Exists"}]
+    assert exporter["containers"][0]["resources"]["limits"] == {"cpu": "200m", "memory": "64Mi"}
+
+
+def test_metrics_disabled():
+    result, docs = render("metrics.enabled=false", "prometheus.nodeExporter.enabled=false")
+    assert result.returncode == 0, result.stderr
+    config = yaml.safe_load(find(docs, "ConfigMap", "core5g-smf-config")["data"]["smf.yaml"])
+    assert "metrics" not in config["smf"]
+    assert not [d for d in docs if d["kind"] == "DaemonSet"]
+
+
+def test_service_monitor():
+    result, docs = render()
+    assert result.returncode == 0, result.stderr
+    assert not [d for d in docs if d["kind"] == "ServiceMonitor"]
+
+    result, docs = render("metrics.serviceMonitor.enabled=true", "metrics.serviceMonitor.labels.release=prometheus")
+    assert result.returncode == 0, result.stderr
+    monitor = find(docs, "ServiceMonitor", "core5g-metrics")
+    assert monitor["metadata"]["labels"]["release"] == "prometheus"
+    assert monitor["spec"]["selector"]["matchLabels"] == find(docs, "Service", "core5g-metrics")["metadata"]["labels"]
+    assert monitor["spec"]["endpoints"][0]["port"] == "prom"
@@ -0,0 +1,44 @@
+from .helm import find, render, requires_helm
+
+pytestmark = requires_helm
+
+
+def test_mongodb_defaults_to_emptydir_deployment():
+    result, docs = render()
+    assert result.returncode == 0, result.stderr
+    pod = find(docs, "Deployment", "core5g-mongodb")["spec"]["template"]["spec"]
+    assert pod["volumes"] == [{"name": "mongodb-persistent-storage", "emptyDir": {}}]
+    assert pod["containers"][0]["resources"]["requests"] == {"cpu": "500m", "memory": "1Gi"}
+    assert not [d for d in docs if d["kind"] in ("StatefulSet", "StorageClass") and "mongodb" in d["metadata"]["name"]]
+
+
+def test_mongodb_statefulset_mode():
+    result, docs = render("mongodb.persistence.enabled=true", "mongodb.persistence.size=20Gi")
+    assert result.returncode == 0, result.stderr
+    assert not [d for d in docs if d["kind"] == "Deployment" and d["metadata"]["name"] == "core5g-mongodb"]
+    statefulset = find(docs, "StatefulSet", "core5g-mongodb")["spec"]
+    assert statefulset["serviceName"] == "core5g-mongodb-svc"
+    assert "volumes" not in statefulset["template"]["spec"]
+    (claim,) = statefulset["volumeClaimTemplates"]
+    assert claim["metadata"]["name"] == "mongodb-persistent-storage"
+    assert claim["spec"]["storageClassName"] == "core5g-mongodb-gp3"
+    assert claim["spec"]["resources"]["requests"]["storage"] == "20Gi"
+    assert find(docs, "StorageClass", "core5g-mongodb-gp3")["provisioner"] == "ebs.csi.aws.com"
+
+
+def test_mongodb_existing_storage_class():
+    result, docs = render("mongodb.persistence.enabled=true", "mongodb.persistence.storageClass=fast")
+    assert result.returncode == 0, result.stderr
+    (claim,) = find(docs, "StatefulSet", "core5g-mongodb")["spec"]["volumeClaimTemplates"]
+    assert claim["spec"]["storageClassName"] == "fast"
+    assert not [d for d in docs if d["kind"] == "StorageClass"]
+
+
+def test_ue_import_creates_indexes_first():
+    result, docs = render()
+    assert result.returncode == 0, result.stderr
+    indexes = find(docs, "ConfigMap", "core5g-open5gs-web-profile")["data"]["indexes.js"]
+    assert "db.subscribers.createIndex({ imsi: 1 }, { unique: true })" in indexes
+    assert "db.subscribers.createIndex({ msisdn: 1 })" in indexes
+    (command,) = find(docs, "Job", "core5g-mongo-ue-import")["spec"]["template"]["spec"]["containers"][0]["args"]
+    assert command.index("/tmp/indexes.js") < command.index("/tmp/account.js") < command.index("ue-init.sh")
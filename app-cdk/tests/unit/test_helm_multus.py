@@ -0,0 +1,33 @@
+import json
+
+import yaml
+
+from .helm import find, render, requires_helm
+
+pytestmark = requires_helm
+
+
+def upf_pod(docs):
+    return find(docs, "StatefulSet", "core5g-upf")["spec"]["template"]
+
+
+def test_multus_is_off_by_default():
+    result, docs = render()
+    assert result.returncode == 0, result.stderr
+    assert not upf_pod(docs)["metadata"].get("annotations")
+    config = yaml.safe_load(find(docs, "ConfigMap", "core5g-upf-config")["data"]["upf.yaml"])
+    assert config["upf"]["gtpu"]["dev"] == "eth0"
+
+
+def test_multus_gives_the_upf_n3_and_n6():
+    result, docs = render("multus.enabled=true")
+    assert result.returncode == 0, result.stderr
+    pod = upf_pod(docs)
+    networks = json.loads(pod["metadata"]["annotations"]["k8s.v1.cni.cncf.io/networks"])
+    assert networks == [{"name": "n3", "interface": "n3"}, {"name": "n6", "interface": "n6"}]
+    env = {e["name"]: e.get("value") for e in pod["spec"]["initContainers"][0]["env"]}
+    assert (env["UPF_N3_DEV"], env["UPF_N6_DEV"]) == ("n3", "n6")
+    config = yaml.safe_load(find(docs, "ConfigMap", "core5g-upf-config")["data"]["upf.yaml"])
+    assert config["upf"]["gtpu"]["dev"] == "n3"
+    # PFCP stays on the pod network, where the SMF reaches it.
+    assert config["upf"]["pfcp"]["dev"] == "eth0"
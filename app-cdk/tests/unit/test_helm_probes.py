@@ -0,0 +1,54 @@
+import pytest
+
+from .helm import find, render, requires_helm
+
+pytestmark = requires_helm
+
+SBI_NFS = ["amf-1", "smf", "nrf", "ausf", "udm", "udr", "pcf", "bsf", "nssf"]
+
+
+def pod_spec(docs, mode):
+    (workload,) = [d for d in docs if d["kind"] in ("Deployment", "StatefulSet")
+                   and d["spec"]["template"]["metadata"]["labels"].get("epc-mode") == mode]
+    return workload["spec"]["template"]["spec"]
+
+
+def test_no_k8s_wait_for():
+    result, docs = render()
+    assert result.returncode == 0, result.stderr
+    assert "k8s-wait-for" not in result.stdout
+    assert not [d for d in docs if d["kind"] in ("ServiceAccount", "Role", "RoleBinding")
+                and d["metadata"]["name"].endswith("k8s-wait-for")]
+
+
+@pytest.mark.parametrize("mode", SBI_NFS)
+def test_sbi_probes(mode):
+    result, docs = render("probes.startupSeconds=90")
+    assert result.returncode == 0, result.stderr
+    (container,) = pod_spec(docs, mode)["containers"]
+    for probe in ("startupProbe", "readinessProbe"):
+        command = container[probe]["exec"]["command"]
+        assert command[:3] == ["curl", "-sf" if mode == "nrf" else "-s", "--http2-prior-knowledge"]
+        assert command[-1].startswith("http://127.0.0.1/")
+    assert container["startupProbe"]["failureThreshold"] == 90
+    # The NFs no longer install packages before they start.
+    assert container["command"][0] == f"open5gs-{mode.split('-')[0]}d"
+
+
+def test_only_database_nfs_wait_at_start():
+    result, docs = render()
+    assert result.returncode == 0, result.stderr
+    for mode in SBI_NFS:
+        init = [c["name"] for c in pod_spec(docs, mode).get("initContainers", [])]
+        expected = {"udr": ["wait-for-mongo"], "pcf": ["wait-for-mongo"], "smf": ["wait-for-upf-pfcp"]}
+        assert init == expected.get(mode, []), mode
+    job = find(docs, "Job", "core5g-mongo-ue-import")["spec"]["template"]["spec"]
+    assert "serviceAccountName" not in job
+    assert "core5g-mongodb-svc/27017" in job["initContainers"][0]["command"][-1]
+
+
+def test_upf_ready_once_pfcp_listens():
+    result, docs = render()
+    assert result.returncode == 0, result.stderr
+    (container,) = pod_spec(docs, "upf")["containers"]
+    assert container["readinessProbe"]["exec"]["command"] == ["test", "-f", "/run/upf/pfcp-ready"]
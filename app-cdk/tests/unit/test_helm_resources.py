@@ -0,0 +1,67 @@
+import pytest
+
+from .helm import find, render, requires_helm
+
+pytestmark = requires_helm
+
+NF_PODS = {
+    "amf": ("Deployment", "core5g-amf-1-deployment"),
+    "smf": ("Deployment", "core5g-smf-deployment"),
+    "upf": ("StatefulSet", "core5g-upf"),
+    "nrf": ("Deployment", "core5g-nrf-deployment"),
+    "ausf": ("Deployment", "core5g-ausf-deployment"),
+    "udm": ("Deployment", "core5g-udm-deployment"),
+    "udr": ("Deployment", "core5g-udr-deployment"),
+    "pcf": ("Deployment", "core5g-pcf-deployment"),
+    "bsf": ("Deployment", "core5g-bsf-deployment"),
+    "nssf": ("Deployment", "core5g-nssf-deployment"),
+}
+
+
+def nf_container(docs, nf):
+    pod = find(docs, *NF_PODS[nf])["spec"]["template"]["spec"]
+    (container,) = [c for c in pod["containers"] if c["name"] == nf]
+    return pod, container
+
+
+def qos_class(pod):
+    containers = pod.get("initContainers", []) + pod["containers"]
+    if all(c.get("resources", {}).get("requests") and c["resources"]["requests"] == c["resources"].get("limits")
+           for c in containers):
+        return "Guaranteed"
+    return "Burstable" if any(c.get("resources") for c in containers) else "BestEffort"
+
+
+def test_every_nf_has_resources():
+    result, docs = render()
+    assert result.returncode == 0, result.stderr
+    for nf in NF_PODS:
+        _, container = nf_container(docs, nf)
+        assert container["resources"]["requests"]["memory"], nf
+
+
+@pytest.mark.parametrize("nf", ["upf", "smf"])
+def test_upf_and_smf_are_guaranteed_with_whole_cpus(nf):
+    result, docs = render()
+    assert result.returncode == 0, result.stderr
+    pod, container = nf_container(docs, nf)
+    assert qos_class(pod) == "Guaranteed"
+    # The static CPU manager only pins whole CPUs.
+    assert float(container["resources"]["requests"]["cpu"]).is_integer()
+
+
+def test_control_plane_nfs_are_not_cpu_limited():
+    result, docs = render()
+    assert result.returncode == 0, result.stderr
+    for nf in ("amf", "nrf", "ausf", "udm", "udr", "pcf", "bsf", "nssf"):
+        pod, container = nf_container(docs, nf)
+        assert qos_class(pod) == "Burstable", nf
+        assert "cpu" not in container["resources"]["limits"], nf
+
+
+def test_resources_can_be_dropped():
+    result, docs = render("resources.upf=null")
+    assert result.returncode == 0, result.stderr
+    pod, container = nf_container(docs, "upf")
+    assert "resources" not in container
+    assert qos_class(pod) == "BestEffort"
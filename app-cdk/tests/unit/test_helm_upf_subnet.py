@@ -0,0 +1,47 @@
+import ipaddress
+
+import pytest
+import yaml
+
+from .helm import find, render, requires_helm
+
+pytestmark = requires_helm
+
+
+def upf_env(docs):
+    (init,) = find(docs, "StatefulSet", "core5g-upf")["spec"]["template"]["spec"]["initContainers"]
+    return {var["name"]: var.get("value") for var in init["env"]}
+
+
+@pytest.mark.parametrize("replicas", range(1, 9))
+def test_every_upf_serves_the_pool_the_smf_allocates_from(replicas):
+    result, docs = render(f"upf.replicas={replicas}")
+    assert result.returncode == 0, result.stderr
+
+    assert find(docs, "StatefulSet", "core5g-upf")["spec"]["replicas"] == replicas
+
+    # The SMF allocates every session's UE address from its DNN subnets,
+    # whichever UPF it selects for the session.
+    smf = yaml.safe_load(find(docs, "ConfigMap", "core5g-smf-config")["data"]["smf.yaml"])
+    assert smf["smf"]["subnet"] == [{"addr": "10.45.0.1/16", "dnn": "internet"}]
+    assert smf["upf"]["pfcp"] == [
+        {"addr": f"core5g-upf-{i}.core5g-upf-pfcp.open5gs.svc.cluster.local", "dnn": "internet"}
+        for i in range(replicas)]
+
+    # So each UPF, whatever its ordinal, serves, NATs and routes that whole pool.
+    upf_data = find(docs, "ConfigMap", "core5g-upf-config")["data"]
+    assert list(upf_data) == ["upf.yaml"]
+    upf = yaml.safe_load(upf_data["upf.yaml"])
+    assert upf["upf"]["subnet"] == smf["smf"]["subnet"]
+    env = upf_env(docs)
+    assert (env["UPF_TUN_ADDR"], env["UPF_SUBNET"]) == ("10.45.0.1/16", "10.45.0.0/16")
+    for pool in smf["smf"]["subnet"]:
+        assert ipaddress.ip_interface(pool["addr"]).network == ipaddress.ip_network(env["UPF_SUBNET"])
+
+
+def test_pool_follows_upf_subnet():
+    result, docs = render("upf.replicas=3", "upf.subnet=10.46.128.0/20")
+    assert result.returncode == 0, result.stderr
+    smf = yaml.safe_load(find(docs, "ConfigMap", "core5g-smf-config")["data"]["smf.yaml"])
+    assert smf["smf"]["subnet"] == [{"addr": "10.46.128.1/20", "dnn": "internet"}]
+    assert upf_env(docs)["UPF_SUBNET"] == "10.46.128.0/20"
@@ -0,0 +1,87 @@
+import os
+import re
+import subprocess
+
+import yaml
+
+REPO_ROOT = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, os.pardir)
+DOCKERFILE = os.path.join(REPO_ROOT, "my_open5gs", "Dockerfile")
+BUILDSPEC = os.path.join(REPO_ROOT, "buildspec_test.yaml")
+UERANSIM_BUILDSPEC = os.path.join(REPO_ROOT, "buildspec_ueransim.yaml")
+
+
+def dockerfile_stages():
+    with open(DOCKERFILE) as dockerfile:
+        return re.findall(r"^FROM \S+ AS (\S+)$", dockerfile.read(), re.MULTILINE)
+
+
+def build_commands():
+    with open(BUILDSPEC) as buildspec:
+        commands = yaml.safe_load(buildspec)["phases"]["build"]["commands"]
+    return [command for command in commands if "docker buildx build" in command]
+
+
+def test_buildspec_targets_existing_stages():
+    stages = dockerfile_stages()
+    assert "builder" in stages
+    for command in build_commands():
+        assert re.search(r"--target (\S+)", command).group(1) in stages
+
+
+def test_builds_reuse_the_registry_cache():
+    cache_tos = []
+    for command in build_commands():
+        cache_to = re.search(r"--cache-to type=registry,ref=(\S+?),mode=max", command).group(1)
+        assert f"--cache-from type=registry,ref={cache_to}" in command
+        assert "--push" in command
+        cache_tos.append(cache_to)
+    # Each target writes its own cache so one build does not overwrite the other's.
+    assert len(set(cache_tos)) == len(cache_tos) == 3
+
+
+def test_nf_images_bake_in_tools_and_scripts():
+    with open(DOCKERFILE) as dockerfile:
+        runtime, upf = dockerfile.read().split("AS runtime", 1)[1].split("AS upf", 1)
+    # curl runs the SBI probes; no NF pod apt-gets its tools on start.
+    for package in ("curl", "tcpdump", "iputils-ping", "iperf3"):
+        assert package in runtime
+    assert "/usr/local/bin/upf-net-init" in upf and "/usr/local/bin/upf-start" in upf
+
+
+def test_runtime_stage_has_no_toolchain_or_mongodb():
+    with open(DOCKERFILE) as dockerfile:
+        runtime = dockerfile.read().split("AS runtime", 1)[1]
+    for package in ("build-essential", "meson", "mongodb-org", "vim"):
+        assert package not in runtime
+
+
+def test_provision_image_is_python_only():
+    with open(DOCKERFILE) as dockerfile:
+        provision = dockerfile.read().split("AS provision", 1)[1]
+    assert "python3-pymongo" in provision
+    assert "/usr/local/bin/open5gs-provision" in provision
+    assert "COPY --from" not in provision
+
+
+def test_each_target_can_be_built_on_its_own():
+    # The pipeline splits the targets across parallel actions through IMAGE_TARGETS.
+    for command in build_commands():
+        target = re.search(r"--target (\S+)", command).group(1)
+        assert command.startswith(f'case " $IMAGE_TARGETS " in *" {target} "*)')
+        assert command.endswith(";; esac")
+
+
+def test_failed_ueransim_build_publishes_nothing(tmp_path):
+    with open(UERANSIM_BUILDSPEC) as buildspec:
+        spec = yaml.safe_load(buildspec)
+    assert spec["env"]["shell"] == "bash"
+    (command,) = spec["phases"]["build"]["commands"]
+    # Nothing is published yet, and docker build fails.
+    for name, script in (("aws", 'echo "aws $*" >> "$CALLS"; [ "$2" != head-object ]'), ("docker", "exit 1")):
+        (tmp_path / name).write_text(f"#!/bin/bash\n{script}\n")
+        (tmp_path / name).chmod(0o755)
+    env = dict(os.environ, PATH=f"{tmp_path}:{os.environ['PATH']}", CALLS=str(tmp_path / "calls"),
+               ARTIFACT_BUCKET="bucket", ARTIFACT_KEY="ueransim/v3.2.6/ueransim.tar.gz", UERANSIM_VERSION="v3.2.6")
+    result = subprocess.run(["bash", "-c", command], env=env, cwd=tmp_path, capture_output=True, text=True)
+    assert result.returncode != 0
+    assert "s3 cp" not in (tmp_path / "calls").read_text()
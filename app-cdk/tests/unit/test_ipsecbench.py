@@ -0,0 +1,91 @@
+import json
+import os
+import stat
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, os.pardir, "loadtest"))
+
+from ranload import ipsecbench  # noqa: E402
+from ranload.__main__ import main  # noqa: E402
+
+# Logs every call and runs `ip netns exec NS CMD...` as CMD.
+FAKE_IP = """#!/usr/bin/env python3
+import os, sys
+args = sys.argv[1:]
+with open(sys.argv[0] + ".calls", "a") as calls:
+    calls.write(" ".join(args) + "\\n")
+if args[:2] == ["netns", "exec"]:
+    os.execvp(args[3], args[3:])
+"""
+# Clients report by port: 5302 fails; servers (-s) exit at once.
+FAKE_IPERF = """#!/usr/bin/env python3
+import json, sys
+args = sys.argv[1:]
+if "-s" in args:
+    sys.exit(0)
+if args[args.index("-p") + 1] == "5302":
+    print(json.dumps({"error": "unable to connect to server: Connection refused"}))
+else:
+    print(json.dumps({"end": {"sum_sent": {"bits_per_second": 2.1e9, "retransmits": 0},
+                              "sum_received": {"bits_per_second": 2e9}}}))
+"""
+
+
+@pytest.fixture
+def fake_bin(tmp_path, monkeypatch):
+    for name, script in (("ip", FAKE_IP), ("iperf3", FAKE_IPERF)):
+        path = tmp_path / name
+        path.write_text(script)
+        path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setattr(ipsecbench.time, "sleep", lambda seconds: None)
+    return tmp_path
+
+
+def test_both_namespaces_share_each_tunnels_keys():
+    commands = [" ".join(args) for args in ipsecbench.setup_commands(ipsecbench.PROPOSALS["aes128gcm16"], 2)]
+    states = [c for c in commands if " xfrm state add " in c]
+    assert len(states) == 8
+    by_spi = {}
+    for state in states:
+        fields = state.split()
+        by_spi.setdefault(fields[fields.index("spi") + 1], set()).add(fields[fields.index("aead") + 2])
+    assert sorted(by_spi) == ["0x1001", "0x1002", "0x2001", "0x2002"]
+    # 20-byte keys: 16 of AES-128 and the 4-byte salt; one key per SA on both sides.
+    assert all(len(keys) == 1 and len(next(iter(keys))) == 2 + 40 for keys in by_spi.values())
+    assert "-n ipsecbench-b link add xfrm2 type xfrm dev veth-b if_id 2" in commands
+    assert "-n ipsecbench-a addr add 10.251.2.1/30 dev xfrm2" in commands
+
+
+def test_cbc_proposals_use_separate_integrity():
+    commands = ipsecbench.setup_commands(ipsecbench.PROPOSALS["aes256-sha256"], 1)
+    state = next(args for args in commands if args[3:5] == ["state", "add"])
+    assert state[state.index("enc") + 1] == "cbc(aes)"
+    assert len(state[state.index("enc") + 2]) == 2 + 64
+    assert state[state.index("auth-trunc") + 1:state.index("auth-trunc") + 2] == ["hmac(sha256)"]
+
+
+def test_run_sums_the_tunnels(fake_bin):
+    report = ipsecbench.run(["aes128gcm16"], [1, 2], duration=1, labels={"instance": "c5.2xlarge"})
+    one, two = report["cases"]
+    assert (one["tunnels"], one["bits_per_second"], one["failed_tunnels"]) == (1, 2e9, 0)
+    # The second tunnel's flow fails.
+    assert (two["tunnels"], two["bits_per_second"], two["failed_tunnels"]) == (2, 2e9, 1)
+    assert "cpu" in one["cpu_percent"]
+    calls = (fake_bin / "ip.calls").read_text().splitlines()
+    assert calls[-2:] == ["netns del ipsecbench-a", "netns del ipsecbench-b"]
+    assert "netns exec ipsecbench-a iperf3 -c 10.251.2.2 -B 10.251.2.1 -p 5302 -t 1 -J" in calls
+    with pytest.raises(ValueError, match="unknown proposal 3des"):
+        ipsecbench.run(["3des"], [1])
+
+
+def test_cli(fake_bin, tmp_path, capsys):
+    out = tmp_path / "ipsec.json"
+    assert main(["ipsec-bench", "--tunnels", "1", "--duration", "1", "--label", "instance=c5.2xlarge",
+                 "--json", str(out)]) == 0
+    assert "aes128gcm16" in capsys.readouterr().out
+    report = json.loads(out.read_text())
+    assert report["labels"] == {"instance": "c5.2xlarge"}
+    assert main(["ipsec-bench", "--tunnels", "2", "--duration", "1"]) == 2
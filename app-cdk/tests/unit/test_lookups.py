@@ -0,0 +1,90 @@
+import json
+import os
+
+import aws_cdk as cdk
+import pytest
+
+from app_cdk import lookups
+from app_cdk.eks_infra_cf_cdk_stack import EksInfraCFStack
+from app_cdk.multus_eks_nodegroup_stack import MultusNodeGroupStack
+from app_cdk.nomultus_eks_nodegroup_stack import NoMultusNodeGroupStack
+from app_cdk.pipeline_cdk_stack import PipelineCdkStack
+from app_cdk.tgw_vpn_cdk_stack import TransitGatewayVPNStack
+from app_cdk.vpn_route_cdk_stack import VpnRouteCdkStack
+
+
+class FakeSsmClient:
+
+    def __init__(self, parameters):
+        self.parameters = parameters
+        self.calls = []
+
+    def get_parameters(self, Names):
+        self.calls.append(list(Names))
+        return {
+            "Parameters": [{"Name": name, "Value": self.parameters[name]} for name in Names if name in self.parameters],
+            "InvalidParameters": [name for name in Names if name not in self.parameters],
+        }
+
+
+@pytest.fixture
+def offline_app(monkeypatch):
+    monkeypatch.setenv("CDK_DEFAULT_REGION", "us-west-2")
+    app = cdk.App(context={lookups.OFFLINE_CONTEXT_KEY: "true"})
+    env = lookups.offline_environment()
+    lookups.prime_offline_context(app, env)
+    return app, env
+
+
+@pytest.mark.parametrize("stack_class", [
+    EksInfraCFStack,
+    NoMultusNodeGroupStack,
+    MultusNodeGroupStack,
+    TransitGatewayVPNStack,
+    VpnRouteCdkStack,
+    PipelineCdkStack,
+])
+def test_offline_synth_needs_no_lookups(offline_app, stack_class):
+    app, env = offline_app
+    stack_class(app, "stack", env=env)
+    assembly = app.synth()
+    with open(os.path.join(assembly.directory, "manifest.json")) as manifest:
+        assert "missing" not in json.load(manifest)
+
+
+def test_offline_parameters_come_from_stub(offline_app):
+    app, env = offline_app
+    stack = cdk.Stack(app, "stack", env=env)
+    assert lookups.string_parameter(stack, "TgwId") == lookups.load_stub()["parameters"]["TgwId"]
+
+
+def test_stub_covers_every_parameter():
+    assert set(lookups.PARAMETER_NAMES) <= set(lookups.load_stub()["parameters"])
+
+
+def test_prefetch_batches_and_writes_context(tmp_path):
+    context_path = str(tmp_path / "cdk.context.json")
+    names = [f"Param{i}" for i in range(12)]
+    client = FakeSsmClient({name: f"value-{name}" for name in names[:-1]})
+
+    resolved = lookups.prefetch("111111111111", "us-west-2", names=names, context_path=context_path, client=client)
+
+    assert [len(call) for call in client.calls] == [10, 2]
+    assert set(resolved) == set(names[:-1])
+    with open(context_path) as context_file:
+        context = json.load(context_file)
+    assert context[lookups.ssm_context_key("111111111111", "us-west-2", "Param0")] == "value-Param0"
+
+
+def test_prefetch_skips_fresh_context_and_honours_ttl(tmp_path):
+    context_path = str(tmp_path / "cdk.context.json")
+    client = FakeSsmClient({"EksVpcId": "vpc-1"})
+
+    lookups.prefetch("111111111111", "us-west-2", names=["EksVpcId"], context_path=context_path, client=client)
+    assert lookups.prefetch("111111111111", "us-west-2", names=["EksVpcId"], context_path=context_path, client=client) == {}
+    assert len(client.calls) == 1
+
+    lookups.prefetch("111111111111", "us-west-2", names=["EksVpcId"], context_path=context_path,
+                     ttl_seconds=-1, force=True, client=client)
+    lookups.prefetch("111111111111", "us-west-2", names=["EksVpcId"], context_path=context_path, client=client)
+    assert len(client.calls) == 3
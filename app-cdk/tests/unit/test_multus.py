@@ -0,0 +1,38 @@
+import json
+
+import yaml
+
+from app_cdk import multus
+
+
+def test_pod_range_is_the_upper_half():
+    assert multus.pod_range("10.1.50.0/24") == "10.1.50.128/25"
+    assert multus.gateway("10.1.50.0/24") == "10.1.50.1"
+
+
+def test_network_attachments():
+    attachments = multus.network_attachments({"n3": "10.1.50.0/24", "n6": "10.1.60.0/24"})
+    assert list(attachments) == ["n3", "n6"]
+    n3 = attachments["n3"]
+    assert n3["metadata"] == {"name": "n3", "namespace": "open5gs"}
+    config = json.loads(n3["spec"]["config"])
+    assert (config["type"], config["master"], config["mode"]) == ("ipvlan", "eth1", "l2")
+    assert config["ipam"] == {"type": "whereabouts", "range": "10.1.50.0/24", "range_start": "10.1.50.128",
+                              "range_end": "10.1.50.254", "gateway": "10.1.50.1"}
+    assert json.loads(attachments["n6"]["spec"]["config"])["master"] == "eth2"
+
+
+def test_attach_script_tags_the_enis_for_the_cni():
+    script = multus.render_attach_script(("n6", "n3"), {"n3": "subnet-n3", "n6": "subnet-n6"}, "sg-1", "us-west-2")
+    assert "Key=node.k8s.amazonaws.com/no_manage,Value=true" in script
+    assert "--groups sg-1" in script
+    assert "DeleteOnTermination=true" in script
+    attaches = [line for line in script.splitlines() if line.startswith("attach_eni ")]
+    assert [line.split()[:4] for line in attaches] == [["attach_eni", "n3", "subnet-n3", "1"],
+                                                       ["attach_eni", "n6", "subnet-n6", "2"]]
+
+
+def test_main_prints_the_nads(capsys):
+    assert multus.main(["nads", "--region", "us-west-2", "--namespace", "core"]) == 0
+    documents = list(yaml.safe_load_all(capsys.readouterr().out))
+    assert [(d["metadata"]["name"], d["metadata"]["namespace"]) for d in documents] == [("n3", "core"), ("n6", "core")]
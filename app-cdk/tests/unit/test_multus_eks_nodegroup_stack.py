@@ -0,0 +1,77 @@
+import aws_cdk as cdk
+import aws_cdk.assertions as assertions
+import pytest
+
+from app_cdk import lookups
+from app_cdk.multus_eks_nodegroup_stack import MultusNodeGroupStack
+
+
+@pytest.fixture(scope="module")
+def template():
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("CDK_DEFAULT_REGION", "us-west-2")
+        app = cdk.App(context={lookups.OFFLINE_CONTEXT_KEY: "true"})
+        env = lookups.offline_environment()
+        lookups.prime_offline_context(app, env)
+        stack = MultusNodeGroupStack(app, "multus-nodegroup-stack", env=env)
+        return assertions.Template.from_stack(stack)
+
+
+def user_data(template, logical_id):
+    data = template.to_json()["Resources"][logical_id]["Properties"]["LaunchTemplateData"]["UserData"]["Fn::Base64"]
+    if isinstance(data, str):
+        return data
+    return "".join(part if isinstance(part, str) else str(part) for part in data["Fn::Join"][1])
+
+
+@pytest.mark.parametrize("name, cidr, pods", [("N3", "10.1.50.0/24", "10.1.50.128/25"),
+                                               ("N6", "10.1.60.0/24", "10.1.60.128/25")])
+def test_data_plane_subnets(template, name, cidr, pods):
+    template.has_resource("AWS::EC2::Subnet", {"Properties": assertions.Match.object_like({
+        "AvailabilityZone": "us-west-2a",
+        "CidrBlock": cidr,
+        "Tags": assertions.Match.array_with([{"Key": "aws-cdk:subnet-type", "Value": "Isolated"}]),
+    })})
+    template.has_resource_properties("AWS::EC2::SubnetRouteTableAssociation", {
+        "RouteTableId": "rtb-0e1c5000000000030",
+        "SubnetId": {"Ref": f"{name}Subnet"},
+    })
+    template.has_resource_properties("AWS::EC2::SubnetCidrReservation", {
+        "SubnetId": {"Ref": f"{name}Subnet"},
+        "Cidr": pods,
+        "ReservationType": "explicit",
+    })
+
+
+def test_data_plane_security_group_takes_gtpu(template):
+    template.has_resource_properties("AWS::EC2::SecurityGroupIngress", {
+        "GroupId": {"Ref": "DataPlaneSecurityGroup"},
+        "IpProtocol": "udp",
+        "FromPort": 2152,
+        "ToPort": 2152,
+    })
+
+
+def test_upf_nodes_attach_n3_and_n6_enis(template):
+    script = user_data(template, "UpfNodeLaunchTemplate")
+    assert "Key=node.k8s.amazonaws.com/no_manage,Value=true" in script
+    assert "--groups {'Ref': 'DataPlaneSecurityGroup'}" in script
+    assert "attach_eni n3 {'Ref': 'N3Subnet'} 1" in script
+    assert "attach_eni n6 {'Ref': 'N6Subnet'} 2" in script
+    # The ENIs are attached before the interface wait, so it waits for them too.
+    assert script.index("phase_end InterfaceAttach") < script.index("phase_begin InterfaceWait")
+
+
+def test_upf_nodes_are_in_the_multus_az(template):
+    template.has_resource_properties("AWS::EKS::Nodegroup", {
+        "Labels": {"cnf": "xyz", "nf-group": "upf"},
+        "Subnets": ["subnet-0e1c5000000000030"],
+    })
+
+
+def test_other_node_groups_are_unchanged(template):
+    assert "InterfaceAttach" not in user_data(template, "NfNodeLaunchTemplate")
+    template.has_resource_properties("AWS::EKS::Nodegroup", {
+        "Labels": {"cnf": "xyz", "nf-group": "nf"},
+        "Subnets": ["subnet-0e1c5000000000030", "subnet-0e1c5000000000040"],
+    })
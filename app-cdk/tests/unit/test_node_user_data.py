@@ -0,0 +1,53 @@
+import json
+import subprocess
+
+from app_cdk import node_user_data
+from app_cdk.tuning_profiles import PROFILES
+
+
+def render(**kwargs):
+    return node_user_data.render(
+        cluster_name="EKSCluster", bootstrap_arguments="--kubelet-extra-args '--node-labels=a=b'",
+        stack_name="no-multus-nodegroup-stack", resource="UpfNodeGroup", region="us-west-2",
+        tuning=PROFILES["default"], node_group="upf", **kwargs)
+
+
+def test_no_fixed_sleep():
+    user_data = render()
+    assert "sleep 30" not in user_data
+    assert "deadline=$(( SECONDS + 60 ))" in user_data
+    assert "deadline=$(( SECONDS + 5 ))" in render(interface_timeout=5)
+
+
+def test_phases_run_in_order():
+    user_data = render()
+    order = [user_data.index(f"phase_begin {phase}\n")
+             for phase in ("Sysctl", "InterfaceWait", "InterfaceTuning", "Bootstrap", "CfnSignal")]
+    assert order == sorted(order)
+    assert "--exit-code $bootstrap_status" in user_data
+    assert user_data.rstrip().endswith("exit $bootstrap_status")
+
+
+def test_metrics_line_is_embedded_metric_format(tmp_path):
+    metrics_log = tmp_path / "metrics.log"
+    script = f"""CLUSTER_NAME=EKSCluster
+NODE_GROUP=upf
+METRIC_NAMESPACE={node_user_data.METRIC_NAMESPACE}
+METRICS_LOG={metrics_log}
+interfaces_ready=1
+{node_user_data._TIMING_FUNCTIONS}
+phase_begin InterfaceWait
+phase_end InterfaceWait
+phase_begin Bootstrap
+phase_end Bootstrap
+emit_metrics
+"""
+    result = subprocess.run(["bash", "-c", script], capture_output=True, text=True, check=True)
+    assert "private5g-bootstrap phase=Bootstrap ms=" in result.stdout
+
+    record = json.loads(metrics_log.read_text())
+    (directive,) = record["_aws"]["CloudWatchMetrics"]
+    assert directive["Namespace"] == "Private5G/NodeBootstrap"
+    assert [metric["Name"] for metric in directive["Metrics"]] == ["InterfaceWait", "Bootstrap", "Total"]
+    assert record["NodeGroup"] == "upf" and record["InterfacesReady"] == 1
+    assert record["Total"] >= record["InterfaceWait"] + record["Bootstrap"]
@@ -0,0 +1,96 @@
+import aws_cdk as cdk
+import aws_cdk.assertions as assertions
+import pytest
+
+from app_cdk import lookups
+from app_cdk.nomultus_eks_nodegroup_stack import NoMultusNodeGroupStack
+
+
+@pytest.fixture(scope="module")
+def template():
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("CDK_DEFAULT_REGION", "us-west-2")
+        app = cdk.App(context={lookups.OFFLINE_CONTEXT_KEY: "true"})
+        env = lookups.offline_environment()
+        lookups.prime_offline_context(app, env)
+        stack = NoMultusNodeGroupStack(app, "no-multus-nodegroup-stack", env=env)
+        return assertions.Template.from_stack(stack)
+
+
+def launch_template_data(template, logical_id):
+    return template.to_json()["Resources"][logical_id]["Properties"]["LaunchTemplateData"]
+
+
+def test_one_node_group_per_profile(template):
+    template.resource_count_is("AWS::EKS::Nodegroup", 2)
+    template.resource_count_is("AWS::EC2::LaunchTemplate", 2)
+
+
+def test_nf_node_group(template):
+    template.has_resource_properties("AWS::EKS::Nodegroup", {
+        "ScalingConfig": {"MinSize": 1, "DesiredSize": 2, "MaxSize": 4},
+        "Labels": {"cnf": "xyz", "nf-group": "nf"},
+        "Subnets": ["subnet-0e1c5000000000030", "subnet-0e1c5000000000040"],
+        "LaunchTemplate": {"Id": {"Ref": "NfNodeLaunchTemplate"}},
+    })
+    assert launch_template_data(template, "NfNodeLaunchTemplate")["InstanceType"] == "c5.2xlarge"
+
+
+def test_upf_node_group_is_dedicated(template):
+    template.has_resource_properties("AWS::EKS::Nodegroup", {
+        "ScalingConfig": {"MinSize": 1, "DesiredSize": 2, "MaxSize": 4},
+        "Labels": {"cnf": "xyz", "nf-group": "upf"},
+        "Taints": [{"Key": "dedicated", "Value": "upf", "Effect": "NO_SCHEDULE"}],
+        "Subnets": ["subnet-0e1c5000000000030", "subnet-0e1c5000000000040"],
+        "LaunchTemplate": {"Id": {"Ref": "UpfNodeLaunchTemplate"}},
+    })
+    data = launch_template_data(template, "UpfNodeLaunchTemplate")
+    assert data["InstanceType"] == "c5n.2xlarge"
+    user_data = data["UserData"]["Fn::Base64"]
+    assert "--node-labels=cnf=xyz,nf-group=upf" in user_data
+    assert "--register-with-taints=dedicated=upf:NoSchedule" in user_data
+
+
+def test_node_groups_share_one_role(template):
+    roles = {
+        str(resource["Properties"]["NodeRole"])
+        for resource in template.find_resources("AWS::EKS::Nodegroup").values()
+    }
+    assert len(roles) == 1
+
+
+def test_tuning_profile_per_node_group(template):
+    nf = launch_template_data(template, "NfNodeLaunchTemplate")["UserData"]["Fn::Base64"]
+    upf = launch_template_data(template, "UpfNodeLaunchTemplate")["UserData"]["Fn::Base64"]
+    assert "# tuning profile nf-pinned v1" in nf
+    assert "# tuning profile upf-dataplane v2" in upf
+    assert "netdev_max_backlog" in upf and "netdev_max_backlog" not in nf
+
+
+def test_static_cpu_manager_on_every_node_group(template):
+    for logical_id in ("NfNodeLaunchTemplate", "UpfNodeLaunchTemplate"):
+        user_data = launch_template_data(template, logical_id)["UserData"]["Fn::Base64"]
+        assert "kubelet_cpu_args=\"--cpu-manager-policy=static --reserved-cpus=$reserved_cpus\"" in user_data
+        assert user_data.index("kubelet_cpu_args=") < user_data.index("/etc/eks/bootstrap.sh")
+        assert "$kubelet_cpu_args\"" in user_data.split("/etc/eks/bootstrap.sh", 1)[1].splitlines()[0]
+
+
+def test_route53_sync_function(template):
+    (function,) = template.find_resources("AWS::Lambda::Function").values()
+    properties = function["Properties"]
+    assert properties["Handler"] == "route53_sync.handler.handler"
+    variables = properties["Environment"]["Variables"]
+    assert variables["NAMESPACE"] == "open5gs"
+    assert variables["CLUSTER_NAME"] == "EKSCluster-stub"
+    template.has_resource_properties("AWS::Events::Rule", {"ScheduleExpression": "rate(1 minute)"})
+    template.has_resource_properties("AWS::SSM::Parameter", {"Name": "Route53SyncRoleArn"})
+
+
+def test_ebs_csi_driver_for_mongodb_volumes(template):
+    (addon_id, addon), = template.find_resources("AWS::EKS::Addon").items()
+    assert addon["Properties"]["AddonName"] == "aws-ebs-csi-driver"
+    assert set(addon["DependsOn"]) >= set(template.find_resources("AWS::EKS::Nodegroup"))
+    (role,) = template.find_resources("AWS::IAM::Role", {
+        "Properties": {"AssumeRolePolicyDocument": {"Statement": [{"Principal": {"Service": "ec2.amazonaws.com"}}]}},
+    }).values()
+    assert "service-role/AmazonEBSCSIDriverPolicy" in str(role["Properties"]["ManagedPolicyArns"])
@@ -0,0 +1,79 @@
+import json
+
+import aws_cdk as cdk
+import aws_cdk.assertions as assertions
+import pytest
+
+from app_cdk import lookups
+from app_cdk.pipeline_cdk_stack import IMAGE_BUILDS, PipelineCdkStack
+from app_cdk.shared import ueransim_artifact_key
+
+
+@pytest.fixture(scope="module")
+def template():
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("CDK_DEFAULT_REGION", "us-west-2")
+        app = cdk.App(context={lookups.OFFLINE_CONTEXT_KEY: "true"})
+        env = lookups.offline_environment()
+        lookups.prime_offline_context(app, env)
+        stack = PipelineCdkStack(app, "pipeline-cdk-stack", env=env)
+        return assertions.Template.from_stack(stack)
+
+
+def stages(template):
+    (pipeline,) = template.find_resources("AWS::CodePipeline::Pipeline").values()
+    return {stage["Name"]: stage["Actions"] for stage in pipeline["Properties"]["Stages"]}
+
+
+def projects(template):
+    return {logical_id: resource["Properties"]
+            for logical_id, resource in template.find_resources("AWS::CodeBuild::Project").items()}
+
+
+def test_build_actions_run_in_parallel(template):
+    pipeline = stages(template)
+    assert list(pipeline) == ["Source", "Build", "Deploy", "RAN-Build"]
+    build = pipeline["Build"]
+    assert sorted(action["Name"] for action in build) == sorted([*IMAGE_BUILDS, "Unit-Test"])
+    assert {action["RunOrder"] for action in build} == {1}
+    assert [action["Name"] for action in pipeline["Deploy"]] == ["Helm-Deploy"]
+    # After Deploy, so the UERANSIM build never holds up the core.
+    assert [action["Name"] for action in pipeline["RAN-Build"]] == ["Ueransim-Build"]
+
+
+def test_image_build_actions_split_the_targets(template):
+    targets = []
+    for action in stages(template)["Build"]:
+        if action["Name"] in IMAGE_BUILDS:
+            (variable,) = json.loads(action["Configuration"]["EnvironmentVariables"])
+            assert variable["name"] == "IMAGE_TARGETS"
+            targets += variable["value"].split()
+    assert sorted(targets) == ["provision", "runtime", "upf"]
+
+
+def test_one_build_image_for_every_project(template):
+    for properties in projects(template).values():
+        assert properties["Environment"]["Image"] == "aws/codebuild/standard:7.0"
+
+
+def test_caches(template):
+    by_spec = {properties["Source"]["BuildSpec"]: properties for properties in projects(template).values()}
+    image_build = by_spec["./buildspec_test.yaml"]
+    assert image_build["Cache"] == {"Type": "LOCAL", "Modes": ["LOCAL_DOCKER_LAYER_CACHE", "LOCAL_SOURCE_CACHE"]}
+    assert image_build["Environment"]["ComputeType"] == "BUILD_GENERAL1_LARGE"
+    for spec, compute_type in (("./buildspec_unit.yaml", "BUILD_GENERAL1_MEDIUM"),
+                               ("./buildspec_docker.yaml", "BUILD_GENERAL1_SMALL")):
+        assert by_spec[spec]["Cache"]["Type"] == "S3", spec
+        assert by_spec[spec]["Environment"]["ComputeType"] == compute_type
+        assert by_spec[spec]["Environment"].get("PrivilegedMode") is not True
+
+
+def test_ueransim_is_built_once_per_version(template):
+    by_spec = {properties["Source"]["BuildSpec"]: properties for properties in projects(template).values()}
+    environment = by_spec["./buildspec_ueransim.yaml"]["Environment"]
+    assert environment["PrivilegedMode"] is True
+    variables = {variable["Name"]: variable["Value"] for variable in environment["EnvironmentVariables"]}
+    assert variables["UERANSIM_VERSION"] == "v3.2.6"
+    assert variables["ARTIFACT_KEY"] == ueransim_artifact_key("v3.2.6") == \
+        "ueransim/v3.2.6/ueransim-v3.2.6-ubuntu22.04-amd64.tar.gz"
+    template.has_resource_properties("AWS::SSM::Parameter", {"Name": "UeransimArtifactBucket"})
@@ -0,0 +1,164 @@
+import importlib.util
+import io
+import os
+from collections import namedtuple
+
+import pytest
+
+PROVISION = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, os.pardir,
+                         "my_open5gs", "provision", "provision_subscribers.py")
+
+spec = importlib.util.spec_from_file_location("provision_subscribers", PROVISION)
+provision_subscribers = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(provision_subscribers)
+
+Subscriber = provision_subscribers.Subscriber
+
+KEY = "0C0A34601D4F07677303652C0462535B"
+OPC = "63bfa50ee6523365ff14c1f45f88737d"
+
+UpdateOne = namedtuple("UpdateOne", "filter update upsert")
+BulkWriteResult = namedtuple("BulkWriteResult", "upserted_count matched_count")
+
+
+class FakeCollection:
+    """Records bulk writes and keeps the documents by IMSI."""
+
+    def __init__(self):
+        self.documents = {}
+        self.calls = []
+
+    def create_index(self, keys, **kwargs):
+        pass
+
+    def bulk_write(self, operations, ordered=True):
+        self.calls.append((len(operations), ordered))
+        upserted = matched = 0
+        for operation in operations:
+            imsi = operation.filter["imsi"]
+            if imsi in self.documents:
+                matched += 1
+            else:
+                upserted += 1
+                self.documents[imsi] = dict(operation.update["$setOnInsert"])
+            self.documents[imsi].update(operation.update["$set"])
+        return BulkWriteResult(upserted, matched)
+
+
+def run(collection, subscribers, batch_size=1000):
+    return provision_subscribers.provision(collection, subscribers, batch_size,
+                                           update_one=UpdateOne, object_id=object, int64=int)
+
+
+def test_jsonl_and_csv_records():
+    jsonl = io.StringIO(
+        f'{{"imsi": "208930000000031", "key": "{KEY}", "opc": "{OPC}", "msisdn": ["0100"]}}\n'
+        "\n"
+        f'{{"imsi": 208930000000032, "key": "{KEY}", "op": "{OPC}", "sst": 2, "sd": "000001"}}\n'
+    )
+    first, second = provision_subscribers.read_jsonl(jsonl)
+    assert first == Subscriber("208930000000031", KEY, opc=OPC, msisdn=("0100",))
+    assert (second.imsi, second.op, second.opc, second.sst, second.sd) == ("208930000000032", OPC, None, 2, "000001")
+
+    csv = io.StringIO(f"imsi,key,opc,dnn,msisdn\n001010000000001,{KEY},{OPC},ims,0100 0101\n")
+    (subscriber,) = provision_subscribers.read_csv(csv)
+    assert subscriber == Subscriber("001010000000001", KEY, opc=OPC, dnn="ims", msisdn=("0100", "0101"))
+
+
+@pytest.mark.parametrize("line, message", [
+    (f'{{"imsi": "20893x", "key": "{KEY}", "opc": "{OPC}"}}', "invalid IMSI"),
+    (f'{{"imsi": "208930000000031", "key": "{KEY}"}}', "exactly one of opc and op"),
+    (f'{{"imsi": "208930000000031", "opc": "{OPC}"}}', "'key'"),
+])
+def test_bad_records_name_the_line(line, message):
+    records = io.StringIO("\n" + line + "\n")
+    with pytest.raises(ValueError, match=f"line 2: .*{message}"):
+        list(provision_subscribers.read_jsonl(records))
+
+
+def test_imsi_range_keeps_the_width():
+    subscribers = list(provision_subscribers.imsi_range("001010000000998", 3, {"key": KEY, "opc": OPC}))
+    assert [s.imsi for s in subscribers] == ["001010000000998", "001010000000999", "001010000001000"]
+    with pytest.raises(ValueError, match="overflow"):
+        list(provision_subscribers.imsi_range("999999999999999", 2, {"key": KEY, "opc": OPC}))
+
+
+def test_unordered_batches_and_report():
+    collection = FakeCollection()
+    subscribers = provision_subscribers.imsi_range("208930000000000", 2500, {"key": KEY, "opc": OPC})
+    report = run(collection, subscribers)
+    assert collection.calls == [(1000, False), (1000, False), (500, False)]
+    assert (report.subscribers, report.inserted, report.updated, report.batches) == (2500, 2500, 0, 3)
+    assert "2500 subscribers in 3 batch(es)" in str(report)
+
+    report = run(collection, provision_subscribers.imsi_range("208930000002000", 1000, {"key": KEY, "opc": OPC}))
+    assert (report.inserted, report.updated) == (500, 500)
+    assert len(collection.documents) == 3000
+
+
+def test_last_duplicate_in_a_batch_wins():
+    collection = FakeCollection()
+    subscribers = [Subscriber("208930000000031", KEY, opc=OPC), Subscriber("208930000000031", KEY, opc="00" * 16)]
+    report = run(collection, subscribers)
+    assert collection.calls == [(1, False)]
+    assert report.subscribers == 1
+    assert collection.documents["208930000000031"]["security.opc"] == "00" * 16
+
+
+def test_sqn_is_set_only_on_insert():
+    collection = FakeCollection()
+    run(collection, [Subscriber("208930000000031", KEY, opc=OPC)])
+    assert collection.documents["208930000000031"]["security.sqn"] == 64
+    collection.documents["208930000000031"]["security.sqn"] = 1184
+    run(collection, [Subscriber("208930000000031", KEY, opc=OPC)])
+    assert collection.documents["208930000000031"]["security.sqn"] == 1184
+
+
+def test_update_sets_security_fields_one_by_one():
+    update = provision_subscribers.subscriber_update(Subscriber("208930000000031", KEY, opc=OPC, sd="000001"), object)
+    assert "security" not in update and "security.sqn" not in update
+    assert (update["security.k"], update["security.opc"], update["security.op"], update["security.amf"]) == (KEY, OPC, None, "8000")
+    (slice_,) = update["slice"]
+    assert (slice_["sst"], slice_["sd"], slice_["default_indicator"]) == (1, "000001", True)
+    assert slice_["session"][0]["name"] == "internet"
+
+
+def test_hundred_thousand_subscribers_stream():
+    collection = FakeCollection()
+    subscribers = provision_subscribers.imsi_range("208930000000000", 100000, {"key": KEY, "opc": OPC})
+    report = run(collection, subscribers, batch_size=5000)
+    assert report.subscribers == len(collection.documents) == 100000
+    assert len(collection.calls) == 20
+
+
+def test_main_against_mongomock(tmp_path, capsys):
+    mongomock = pytest.importorskip("mongomock")
+    pytest.importorskip("pymongo")
+    client = mongomock.MongoClient("mongodb://localhost/open5gs")
+    subscribers = client.get_default_database()["subscribers"]
+    records = tmp_path / "subscribers.csv"
+    records.write_text(f"imsi,key,opc\n208930000000031,{KEY},{OPC}\n")
+    argv = ["--db-uri", "mongodb://localhost/open5gs", "--file", str(records), "--quiet",
+            "--imsi-range", "208930000001000", "10", "--key", KEY, "--opc", OPC]
+
+    assert provision_subscribers.main(argv, client=client) == 0
+    assert "11 subscribers" in capsys.readouterr().out
+    assert subscribers.count_documents({}) == 11
+    assert subscribers.find_one({"imsi": "208930000000031"})["security"]["sqn"] == 64
+    subscribers.update_one({"imsi": "208930000000031"}, {"$set": {"security.sqn": 1184}})
+
+    assert provision_subscribers.main(argv, client=client) == 0
+    assert "0 inserted, 11 updated" in capsys.readouterr().out
+    document = subscribers.find_one({"imsi": "208930000000031"})
+    assert document["security"] == {"k": KEY, "opc": OPC, "op": None, "amf": "8000", "sqn": 1184}
+    assert subscribers.count_documents({}) == 11
+
+
+def test_main_reports_bad_input(tmp_path, capsys):
+    pytest.importorskip("pymongo")
+    records = tmp_path / "subscribers.jsonl"
+    records.write_text('{"imsi": "1", "key": "k", "opc": "o"}\n')
+    collection = FakeCollection()
+    client = namedtuple("Client", "get_default_database")(lambda: {"subscribers": collection})
+    assert provision_subscribers.main(["--db-uri", "mongodb://x/open5gs", "--file", str(records)], client=client) == 1
+    assert "line 1: invalid IMSI" in capsys.readouterr().err
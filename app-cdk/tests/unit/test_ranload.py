@@ -0,0 +1,228 @@
+import json
+import os
+import stat
+import sys
+from datetime import datetime
+
+import pytest
+import yaml
+
+LOADTEST_DIR = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, os.pardir, "loadtest")
+VALUES = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, os.pardir,
+                      "helm_chart", "open5gs-helm-charts_nomultus", "values.yaml")
+sys.path.insert(0, LOADTEST_DIR)
+
+from ranload import config, logs  # noqa: E402
+from ranload.__main__ import default_kill_command, main  # noqa: E402
+from ranload.histogram import Histogram  # noqa: E402
+from ranload.runner import Failover, LoadTest, LoadTestError  # noqa: E402
+
+# Prints UERANSIM-style logs. nr-ue registers -n UEs from the config's SUPI,
+# -t ms apart; FAIL_IMSI is rejected once before it registers. With KILLED
+# set the UEs start in real time, and the first one to start after that file
+# appears (the AMF kill) is rejected once too.
+FAKE_GNB = """#!/usr/bin/env python3
+import os, sys, time
+if os.environ.get("GNB_FAIL"):
+    print("[2023-08-02 10:00:00.000] [ngap] [error] SCTP connection failed", flush=True)
+    sys.exit(1)
+print("[2023-08-02 10:00:00.000] [ngap] [info] NG Setup procedure is successful", flush=True)
+time.sleep(60)
+"""
+FAKE_UE = """#!/usr/bin/env python3
+import datetime, os, sys, time
+args = sys.argv[1:]
+config = open(args[args.index("-c") + 1]).read()
+first = int(config.split("supi: imsi-")[1].split()[0])
+count, tempo = int(args[args.index("-n") + 1]), int(args[args.index("-t") + 1])
+with open(os.environ["STATE"], "w") as state:
+    state.write(" ".join(args))
+def log(ue, component, level, message, offset_ms):
+    stamp = (datetime.datetime(2023, 8, 2, 10, 0, 1) + datetime.timedelta(milliseconds=offset_ms))
+    print(f"[{stamp:%Y-%m-%d %H:%M:%S}.{stamp.microsecond // 1000:03d}] [imsi-{ue}|{component}] [{level}] {message}", flush=True)
+killed, failed_over = os.environ.get("KILLED"), False
+for i in range(count):
+    if killed:
+        time.sleep(tempo / 1000)
+    lost = bool(killed) and os.path.exists(killed) and not failed_over
+    failed_over = failed_over or lost
+    ue, t = first + i, i * tempo
+    log(ue, "nas", "debug", "Sending Initial Registration", t)
+    if str(ue) == os.environ.get("FAIL_IMSI") or lost:
+        log(ue, "nas", "error", "Initial Registration failed [PLMN_NOT_ALLOWED]", t + 5)
+    elif str(ue) == os.environ.get("STUCK_IMSI"):
+        continue
+    log(ue, "nas", "info", "Initial Registration is successful", t + 40 + i)
+    log(ue, "nas", "debug", "Sending PDU Session Establishment Request", t + 41 + i)
+    log(ue, "nas", "info", "PDU Session establishment is successful PSI[1]", t + 61 + i)
+time.sleep(60)
+"""
+
+
+@pytest.fixture
+def ueransim(tmp_path, monkeypatch):
+    build = tmp_path / "build"
+    build.mkdir()
+    for name, script in (("nr-gnb", FAKE_GNB), ("nr-ue", FAKE_UE)):
+        path = build / name
+        path.write_text(script)
+        path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("STATE", str(tmp_path / "nr-ue.args"))
+    return build
+
+
+def test_profile_from_chart_values():
+    profile = config.load_profile(VALUES)
+    assert (profile.mcc, profile.mnc, profile.tac, profile.sst, profile.dnn) == ("208", "93", 7, 1, "internet")
+    assert profile.key == "0C0A34601D4F07677303652C0462535B"
+    assert profile.opc == "63bfa50ee6523365ff14c1f45f88737d"
+    assert profile.imsi_start == "208930000001000"
+
+
+def test_rendered_configs(tmp_path):
+    profile = config.load_profile(VALUES)
+    gnb_path, ue_path = config.render(profile, str(tmp_path), "10.0.0.5", ["10.1.30.171"])
+    gnb = yaml.safe_load(open(gnb_path))
+    ue = yaml.safe_load(open(ue_path))
+    assert (gnb["mcc"], gnb["mnc"], gnb["tac"]) == ("208", "93", 7)
+    assert gnb["linkIp"] == gnb["ngapIp"] == gnb["gtpIp"] == "10.0.0.5"
+    assert gnb["amfConfigs"] == [{"address": "10.1.30.171", "port": 38412}]
+    assert gnb["nci"] == "0x000000010"
+    assert ue["supi"] == "imsi-208930000001000"
+    assert (ue["key"], ue["op"], ue["opType"]) == (profile.key, profile.opc, "OPC")
+    assert ue["gnbSearchList"] == ["10.0.0.5"]
+    assert ue["sessions"] == [{"type": "IPv4", "apn": "internet", "slice": {"sst": 1}}]
+
+
+def test_gnb_fleet_spreads_over_the_amfs(tmp_path):
+    profile = config.load_profile(VALUES)
+    amfs = ["10.1.30.171", "10.1.30.172", "10.1.30.173"]
+    firsts, ncis = [], set()
+    for index in range(6):
+        gnb_path, _ = config.render(profile, str(tmp_path / str(index)), "10.0.0.5", amfs, gnb_index=index)
+        gnb = yaml.safe_load(open(gnb_path))
+        addresses = [amf["address"] for amf in gnb["amfConfigs"]]
+        assert sorted(addresses) == amfs
+        firsts.append(addresses[0])
+        ncis.add(gnb["nci"])
+    assert firsts == amfs * 2
+    assert len(ncis) == 6
+    with pytest.raises(ValueError):
+        config.amf_order([], 0)
+
+
+def test_parse_lines():
+    event = logs.parse("[2023-08-02 10:00:00.123] [imsi-208930000001000|nas] [info] "
+                       "Initial Registration is successful\n")
+    assert event == logs.Event(datetime(2023, 8, 2, 10, 0, 0, 123000), "imsi-208930000001000",
+                               logs.REGISTERED, "Initial Registration is successful")
+    single = logs.parse("[2023-08-02 10:00:00.123] [nas] [debug] Sending Initial Registration", "imsi-1")
+    assert (single.ue, single.kind) == ("imsi-1", logs.REGISTRATION_START)
+    assert logs.parse("[2023-08-02 10:00:00.123] [rrc] [debug] RRC connection established") is None
+    assert logs.parse("UERANSIM v3.2.6") is None
+
+
+def test_histogram_percentiles_and_buckets():
+    histogram = Histogram()
+    for value in [5, 1, 3, 2, 4, 100, 6, 7, 8, 9]:
+        histogram.record(value)
+    assert histogram.percentile(50) == 5
+    assert histogram.percentile(90) == 9
+    assert histogram.percentile(99) == 100
+    assert histogram.summary() == {"count": 10, "p50": 5, "p90": 9, "p95": 100, "p99": 100, "max": 100}
+    assert histogram.buckets() == {"<=1ms": 1, "<=2ms": 1, "<=4ms": 2, "<=8ms": 4, "<=16ms": 1, "<=128ms": 1}
+    assert Histogram().summary() == {"count": 0}
+
+
+def test_ramp_collects_latencies(ueransim, tmp_path):
+    profile = config.load_profile(VALUES)
+    results = LoadTest(str(ueransim), str(tmp_path / "run"), profile, ["127.0.0.1"], ues=5, rate=50,
+                       gnb_ip="127.0.0.1", timeout=10).run()
+    assert open(tmp_path / "nr-ue.args").read().split()[-4:] == ["-n", "5", "-t", "20"]
+    assert results.registration.samples == [40, 41, 42, 43, 44]
+    assert results.session.samples == [20] * 5
+    assert results.failures == {}
+    assert results.as_dict()["registration_ms"]["p50"] == 42
+    assert (tmp_path / "run" / "nr-ue.log").read_text().count("PDU Session establishment is successful") == 5
+
+
+def test_failures_and_timeouts_are_counted(ueransim, tmp_path, monkeypatch):
+    monkeypatch.setenv("FAIL_IMSI", "208930000001001")
+    monkeypatch.setenv("STUCK_IMSI", "208930000001002")
+    profile = config.load_profile(VALUES)
+    results = LoadTest(str(ueransim), str(tmp_path / "run"), profile, ["127.0.0.1"], ues=4, rate=100,
+                       gnb_ip="127.0.0.1", timeout=0.5).run()
+    assert len(results.registration) == 3
+    assert results.failures == {"registration_failed": 1, "registration_timeout": 1}
+    assert "registration_failed=1" in results.text()
+
+
+def test_gnb_failure_is_reported(ueransim, tmp_path, monkeypatch):
+    monkeypatch.setenv("GNB_FAIL", "1")
+    profile = config.load_profile(VALUES)
+    with pytest.raises(LoadTestError, match="nr-gnb exited"):
+        LoadTest(str(ueransim), str(tmp_path / "run"), profile, ["127.0.0.1"], ues=1, rate=1,
+                 gnb_ip="127.0.0.1").run()
+
+
+def test_cli_writes_json(ueransim, tmp_path, capsys):
+    results_path = tmp_path / "results.json"
+    code = main(["run", "--values", VALUES, "--amf-address", "127.0.0.1", "--gnb-ip", "127.0.0.1",
+                 "--ueransim-dir", str(ueransim), "--out", str(tmp_path / "run"), "--ues", "3", "--rate", "100",
+                 "--imsi-start", "001010000000001", "--json", str(results_path)])
+    assert code == 0
+    assert "3 UEs at 100/s" in capsys.readouterr().out
+    results = json.loads(results_path.read_text())
+    assert results["pdu_session_ms"]["count"] == 3 and results["failures"] == {}
+    assert "supi: imsi-001010000000001" in (tmp_path / "run" / "ue.yaml").read_text()
+
+
+def test_failover_run(ueransim, tmp_path, monkeypatch):
+    killed = tmp_path / "amf-1.killed"
+    monkeypatch.setenv("KILLED", str(killed))
+    profile = config.load_profile(VALUES)
+    results = LoadTest(str(ueransim), str(tmp_path / "run"), profile, ["127.0.0.1", "127.0.0.2"], ues=10, rate=20,
+                       gnb_ip="127.0.0.1", timeout=10, failover=Failover(["touch", str(killed)], 0.1)).run()
+    assert killed.exists()
+    assert len(results.registration) == 10
+    assert results.failures == {"registration_failed": 1}
+    failover = results.as_dict()["failover"]
+    assert failover["killed_at_seconds"] >= 0.1
+    assert failover["failures_after_kill"] == {"registration_failed": 1}
+    assert failover["registered_after_kill"] >= 1 and failover["recovery_ms"] is not None
+    assert "failover      killed at" in results.text()
+    gnb = yaml.safe_load((tmp_path / "run" / "gnb.yaml").read_text())
+    assert [amf["address"] for amf in gnb["amfConfigs"]] == ["127.0.0.1", "127.0.0.2"]
+
+
+def test_failover_errors(ueransim, tmp_path):
+    profile = config.load_profile(VALUES)
+    with pytest.raises(LoadTestError, match="failover command exited with 1"):
+        LoadTest(str(ueransim), str(tmp_path / "run"), profile, ["127.0.0.1"], ues=3, rate=100,
+                 gnb_ip="127.0.0.1", failover=Failover(["false"], 0)).run()
+    with pytest.raises(LoadTestError, match="ended before the failover command was due at 30s"):
+        LoadTest(str(ueransim), str(tmp_path / "run"), profile, ["127.0.0.1"], ues=3, rate=100,
+                 gnb_ip="127.0.0.1", failover=Failover(["true"], 30)).run()
+
+
+def test_cli_failover(ueransim, tmp_path, monkeypatch, capsys):
+    killed = tmp_path / "amf-1.killed"
+    monkeypatch.setenv("KILLED", str(killed))
+    results_path = tmp_path / "failover.json"
+    code = main(["failover", "--values", VALUES, "--amf-address", "127.0.0.1", "--amf-address", "127.0.0.2",
+                 "--gnb-ip", "127.0.0.1", "--ueransim-dir", str(ueransim), "--out", str(tmp_path / "run"),
+                 "--ues", "6", "--rate", "20", "--kill-after", "0.1", "--kill-command", f"touch {killed}",
+                 "--json", str(results_path)])
+    assert code == 0
+    assert "registered after" in capsys.readouterr().out
+    assert json.loads(results_path.read_text())["failover"]["failures_after_kill"] == {"registration_failed": 1}
+
+
+def test_default_kill_command_targets_the_gnbs_first_amf():
+    assert default_kill_command(0, 2) == "kubectl -n open5gs delete pod -l epc-mode=amf-1 --wait=false"
+    assert default_kill_command(1, 2) == "kubectl -n open5gs delete pod -l epc-mode=amf-2 --wait=false"
+    assert default_kill_command(3, 2) == "kubectl -n open5gs delete pod -l epc-mode=amf-2 --wait=false"
+    assert default_kill_command(1, 1) == "kubectl -n open5gs delete pod -l epc-mode=amf-1 --wait=false"
+    for gnb_index in range(4):
+        first = config.amf_order(["10.1.30.171", "10.1.30.172", "10.1.30.173"], gnb_index)[0]
+        assert default_kill_command(gnb_index, 3).endswith(f"amf-{first[-1]} --wait=false")
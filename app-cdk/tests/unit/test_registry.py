@@ -0,0 +1,83 @@
+import ast
+import importlib.util
+
+import aws_cdk as cdk
+import aws_cdk.assertions as assertions
+import pytest
+
+from app_cdk import lookups, registry
+
+
+def names(specs):
+    return [spec.name for spec in specs]
+
+
+def test_resolve_pulls_in_producers():
+    assert names(registry.resolve(["no-multus-nodegroup-stack"])) == [
+        "eks-vpc-cdk-stack", "eks-infra-cf-stack", "no-multus-nodegroup-stack"]
+    assert names(registry.resolve(["vpn-route-cdk-stack"])) == [
+        "eks-vpc-cdk-stack", "customer-vpc-cdk-stack", "tgw-vpn-cdk-stack", "vpn-route-cdk-stack"]
+    assert names(registry.resolve(["ecr-cdk-stack"])) == ["ecr-cdk-stack"]
+
+
+def test_resolve_without_selection_skips_alternatives():
+    assert registry.resolve() == [spec for spec in registry.STACKS if spec.name != "multus-nodegroup-stack"]
+
+
+def test_alternatives_are_mutually_exclusive():
+    assert names(registry.resolve(["multus-nodegroup-stack"])) == [
+        "eks-vpc-cdk-stack", "eks-infra-cf-stack", "multus-nodegroup-stack"]
+    with pytest.raises(ValueError, match="multus-nodegroup-stack replaces no-multus-nodegroup-stack"):
+        registry.resolve(["no-multus-nodegroup-stack", "multus-nodegroup-stack"])
+
+
+def test_unknown_stack_is_rejected():
+    with pytest.raises(ValueError, match="no-such-stack"):
+        registry.resolve(["no-such-stack"])
+
+
+def test_selection_from_context_and_env(monkeypatch):
+    monkeypatch.delenv(registry.STACKS_ENV, raising=False)
+    assert registry.selected_stack_names(cdk.App()) is None
+    app = cdk.App(context={registry.STACKS_CONTEXT_KEY: "ecr-cdk-stack, pipeline-cdk-stack"})
+    assert registry.selected_stack_names(app) == ["ecr-cdk-stack", "pipeline-cdk-stack"]
+    monkeypatch.setenv(registry.STACKS_ENV, "eks-vpc-cdk-stack")
+    assert registry.selected_stack_names(cdk.App()) == ["eks-vpc-cdk-stack"]
+
+
+@pytest.mark.parametrize("spec", registry.STACKS, ids=names(registry.STACKS))
+def test_declared_edges_match_stack(monkeypatch, spec):
+    monkeypatch.setenv("CDK_DEFAULT_REGION", "us-west-2")
+    consumed = []
+    string_parameter = lookups.string_parameter
+
+    def recording_string_parameter(scope, name):
+        consumed.append(name)
+        return string_parameter(scope, name)
+
+    monkeypatch.setattr(lookups, "string_parameter", recording_string_parameter)
+    app = cdk.App(context={lookups.OFFLINE_CONTEXT_KEY: "true"})
+    env = lookups.offline_environment()
+    lookups.prime_offline_context(app, env)
+
+    stack = registry.build(app, env, [spec])[spec.name]
+
+    parameters = assertions.Template.from_stack(stack).find_resources("AWS::SSM::Parameter")
+    produced = {resource["Properties"]["Name"] for resource in parameters.values()}
+    assert produced == set(spec.produces)
+    assert set(consumed) == set(spec.consumes)
+
+
+# multus-nodegroup-stack is no-multus-nodegroup-stack plus the Multus ENIs.
+SUBCLASSED = {"app_cdk.multus_eks_nodegroup_stack": {"app_cdk.nomultus_eks_nodegroup_stack"}}
+
+
+@pytest.mark.parametrize("spec", registry.STACKS, ids=names(registry.STACKS))
+def test_stacks_do_not_import_each_other(spec):
+    # Values both sides need live in app_cdk.shared.
+    stack_modules = {other.module for other in registry.STACKS} - SUBCLASSED.get(spec.module, set())
+    with open(importlib.util.find_spec(spec.module).origin) as source:
+        tree = ast.parse(source.read())
+    imported = {node.module for node in ast.walk(tree) if isinstance(node, ast.ImportFrom)}
+    imported |= {alias.name for node in ast.walk(tree) if isinstance(node, ast.Import) for alias in node.names}
+    assert not imported & (stack_modules - {spec.module})
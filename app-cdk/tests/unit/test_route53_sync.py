@@ -0,0 +1,150 @@
+import pytest
+
+from functions.route53_sync.controller import Controller, Target, WatchExpired, label_selector
+
+from .route53 import FakeRoute53
+
+AMF = Target("amf.open5gs.service", "ZAMF", (("epc-mode", "amf-1"),))
+UPF = Target("upf.open5gs.service", "ZUPF", (("epc-mode", "upf"),))
+
+
+def pod(uid, mode, ip, ready=True, phase="Running", version="1"):
+    return {
+        "metadata": {"uid": uid, "labels": {"epc-mode": mode}, "resourceVersion": version},
+        "status": {
+            "phase": phase,
+            "podIP": ip,
+            "conditions": [{"type": "Ready", "status": "True" if ready else "False"}],
+        },
+    }
+
+
+class FakeKube:
+    """Serves one pod list, then one batch of watch events per watch call."""
+
+    def __init__(self, pods, watches=()):
+        self.pods = pods
+        self.watches = list(watches)
+        self.list_calls = 0
+        self.selectors = []
+
+    def list_pods(self, namespace, selector):
+        self.list_calls += 1
+        self.selectors.append(selector)
+        return list(self.pods), "100"
+
+    def watch_pods(self, namespace, selector, resource_version, timeout_seconds):
+        events = self.watches.pop(0) if self.watches else []
+        for event in events:
+            if isinstance(event, Exception):
+                raise event
+            yield event
+
+
+class FakeClock:
+    """Advances one second per reading, so a run of N seconds makes about N watch calls."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        self.now += 1
+        return self.now
+
+
+def records(call):
+    zone_id, batch = call
+    return zone_id, {c["ResourceRecordSet"]["Name"]: [r["Value"] for r in c["ResourceRecordSet"]["ResourceRecords"]]
+                     for c in batch["Changes"]}
+
+
+def controller(kube, route53):
+    return Controller(kube, route53, "open5gs", [AMF, UPF], clock=FakeClock())
+
+
+def test_selector_covers_all_targets():
+    assert label_selector([AMF, UPF]) == "epc-mode in (amf-1,upf)"
+
+
+def test_every_amf_instance_in_one_record():
+    amfs = Target("amf.open5gs.service", "ZAMF", (("epc-nf", "amf"),))
+    assert label_selector([amfs, UPF]) == ""
+    assert label_selector([amfs]) == "epc-nf in (amf)"
+    pods = [pod(f"a{n}", f"amf-{n}", f"10.1.30.{n}") for n in (1, 2, 3)] + [pod("u", "upf", "10.1.30.210")]
+    for amf in pods[:3]:
+        amf["metadata"]["labels"]["epc-nf"] = "amf"
+    pods[1]["status"]["conditions"][0]["status"] = "False"
+    route53 = FakeRoute53()
+    Controller(FakeKube(pods), route53, "open5gs", [amfs, UPF], clock=FakeClock()).relist()
+    assert sorted(records(call) for call in route53.calls) == [
+        ("ZAMF", {"amf.open5gs.service": ["10.1.30.1", "10.1.30.3"]}),
+        ("ZUPF", {"upf.open5gs.service": ["10.1.30.210"]}),
+    ]
+
+
+def test_initial_list_upserts_both_zones():
+    route53 = FakeRoute53()
+    kube = FakeKube([pod("a", "amf-1", "10.1.30.138"), pod("u", "upf", "10.1.30.210")])
+    controller(kube, route53).relist()
+    assert sorted(records(call) for call in route53.calls) == [
+        ("ZAMF", {"amf.open5gs.service": ["10.1.30.138"]}),
+        ("ZUPF", {"upf.open5gs.service": ["10.1.30.210"]}),
+    ]
+    assert route53.calls[0][1]["Changes"][0]["ResourceRecordSet"]["TTL"] == 30
+
+
+def test_pod_restart_moves_record_once_new_pod_is_ready():
+    route53 = FakeRoute53()
+    kube = FakeKube([pod("u1", "upf", "10.1.30.210"), pod("a", "amf-1", "10.1.30.138")], watches=[[
+        {"type": "DELETED", "object": pod("u1", "upf", "10.1.30.210", version="101")},
+        {"type": "ADDED", "object": pod("u2", "upf", "10.1.30.77", ready=False, phase="Pending", version="102")},
+        {"type": "MODIFIED", "object": pod("u2", "upf", "10.1.30.77", version="103")},
+        {"type": "BOOKMARK", "object": {"metadata": {"resourceVersion": "104"}}},
+    ]])
+    sync = controller(kube, route53)
+    sync.run(seconds=3)
+    # Initial upserts for both zones, then exactly one for the new UPF address:
+    # no update while no UPF pod was ready, and none for the untouched AMF.
+    assert len(route53.calls) == 3
+    assert records(route53.calls[-1]) == ("ZUPF", {"upf.open5gs.service": ["10.1.30.77"]})
+    assert route53.zones["ZUPF"] == {"upf.open5gs.service": ["10.1.30.77"]}
+
+
+def test_unchanged_events_do_not_call_route53():
+    route53 = FakeRoute53()
+    amf = pod("a", "amf-1", "10.1.30.138")
+    kube = FakeKube([amf], watches=[[{"type": "MODIFIED", "object": amf}] * 5])
+    controller(kube, route53).run(seconds=3)
+    assert len(route53.calls) == 1
+
+
+def test_records_already_in_the_zone_are_not_pushed():
+    route53 = FakeRoute53({"ZAMF": {"amf.open5gs.service": ["10.1.30.138"]}})
+    kube = FakeKube([pod("a", "amf-1", "10.1.30.138"), pod("u", "upf", "10.1.30.210")])
+    controller(kube, route53).relist()
+    assert [records(call) for call in route53.calls] == [("ZUPF", {"upf.open5gs.service": ["10.1.30.210"]})]
+
+
+def test_replicas_share_one_record():
+    route53 = FakeRoute53()
+    kube = FakeKube([pod("u1", "upf", "10.1.40.9"), pod("u2", "upf", "10.1.30.5")])
+    controller(kube, route53).relist()
+    assert records(route53.calls[0]) == ("ZUPF", {"upf.open5gs.service": ["10.1.30.5", "10.1.40.9"]})
+
+
+def test_expired_watch_relists():
+    route53 = FakeRoute53()
+    kube = FakeKube([pod("a", "amf-1", "10.1.30.138")], watches=[[WatchExpired("too old")]])
+    controller(kube, route53).run(seconds=3)
+    assert kube.list_calls == 2
+
+
+def test_target_from_dict():
+    target = Target.from_dict({"record_name": "upf.open5gs.service", "hosted_zone_id": "Z1",
+                               "labels": {"epc-mode": "upf"}})
+    assert target == Target("upf.open5gs.service", "Z1", (("epc-mode", "upf"),), 30)
+
+
+def test_watch_error_event_raises():
+    with pytest.raises(WatchExpired):
+        controller(FakeKube([]), FakeRoute53()).apply({"type": "ERROR", "object": {"message": "gone"}})
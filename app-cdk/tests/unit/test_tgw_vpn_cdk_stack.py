@@ -0,0 +1,75 @@
+import ipaddress
+import json
+
+import aws_cdk as cdk
+import aws_cdk.assertions as assertions
+import pytest
+
+from app_cdk import lookups
+from app_cdk.config import VPN_RESERVED_INSIDE_CIDRS, load_config
+from app_cdk.tgw_vpn_cdk_stack import TransitGatewayVPNStack
+
+
+@pytest.fixture(scope="module")
+def template():
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("CDK_DEFAULT_REGION", "us-west-2")
+        app = cdk.App(context={lookups.OFFLINE_CONTEXT_KEY: "true"})
+        env = lookups.offline_environment()
+        lookups.prime_offline_context(app, env)
+        stack = TransitGatewayVPNStack(app, "tgw-vpn-cdk-stack", env=env)
+        return assertions.Template.from_stack(stack)
+
+
+def test_transit_gateway_spreads_over_the_vpns(template):
+    template.has_resource_properties("AWS::EC2::TransitGateway", {
+        "AmazonSideAsn": 64512,
+        "VpnEcmpSupport": "enable",
+        "DefaultRouteTableAssociation": "enable",
+        "DefaultRouteTablePropagation": "enable",
+    })
+    template.has_resource_properties("AWS::EC2::CustomerGateway", {"BgpAsn": 65016})
+    template.resource_count_is("AWS::EC2::CustomerGateway", 1)
+
+
+def test_vpn_connections_and_inside_cidrs(template):
+    connections = load_config("us-west-2").vpn_connections
+    vpns = template.find_resources("AWS::EC2::VPNConnection")
+    assert len(vpns) == connections > 1
+    inside = []
+    for vpn in vpns.values():
+        properties = vpn["Properties"]
+        # BGP, so every tunnel advertises the routes ECMP spreads over.
+        assert properties["StaticRoutesOnly"] is False
+        assert properties["CustomerGatewayId"] == {"Ref": "CustomerGW"}
+        tunnels = properties["VpnTunnelOptionsSpecifications"]
+        assert len(tunnels) == 2
+        inside += [ipaddress.ip_network(tunnel["TunnelInsideCidr"]) for tunnel in tunnels]
+    assert len(inside) == 2 * connections
+    for i, cidr in enumerate(inside):
+        assert cidr.prefixlen == 30 and cidr.subnet_of(ipaddress.ip_network("169.254.0.0/16"))
+        assert not any(cidr.overlaps(reserved) for reserved in VPN_RESERVED_INSIDE_CIDRS)
+        assert not any(cidr.overlaps(other) for other in inside[i + 1:])
+
+
+def test_pre_shared_keys_come_from_secrets_manager(template):
+    secrets = template.find_resources("AWS::SecretsManager::Secret")
+    assert len(secrets) == 2 * load_config("us-west-2").vpn_connections
+    for secret in secrets.values():
+        generator = secret["Properties"]["GenerateSecretString"]
+        assert generator["ExcludePunctuation"] and "0" in generator["ExcludeCharacters"]
+    for vpn in template.find_resources("AWS::EC2::VPNConnection").values():
+        for tunnel in vpn["Properties"]["VpnTunnelOptionsSpecifications"]:
+            key = tunnel["PreSharedKey"]["Fn::Join"][1]
+            assert key[0] == "{{resolve:secretsmanager:" and key[1]["Ref"] in secrets
+    assert "strongswan_awsvpn" not in json.dumps(template.to_json())
+
+
+def test_vpn_connections_parameter(template):
+    (parameter,) = [p for p in template.find_resources("AWS::SSM::Parameter").values()
+                    if p["Properties"]["Name"] == "VpnConnections"]
+    value = "".join(part if isinstance(part, str) else "REF" for part in parameter["Properties"]["Value"]["Fn::Join"][1])
+    parameter = json.loads(value)
+    assert (parameter["amazon_side_asn"], parameter["customer_side_asn"]) == (64512, 65016)
+    assert [[t["inside_cidr"] for t in c["tunnels"]] for c in parameter["connections"]] == \
+        [list(cidrs) for cidrs in load_config("us-west-2").vpn_tunnel_inside_cidrs]
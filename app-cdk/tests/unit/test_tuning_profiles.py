@@ -0,0 +1,74 @@
+import subprocess
+
+import pytest
+
+from app_cdk import node_user_data, tuning_profiles
+from app_cdk.tuning_profiles import PROFILES
+
+
+def render(profile_name):
+    return node_user_data.render(
+        cluster_name="EKSCluster", bootstrap_arguments="--kubelet-extra-args '--node-labels=a=b'",
+        stack_name="no-multus-nodegroup-stack", resource="UpfNodeGroup", region="us-west-2",
+        tuning=PROFILES[profile_name])
+
+
+@pytest.mark.parametrize("name", sorted(PROFILES))
+def test_user_data_is_valid_bash(name):
+    subprocess.run(["bash", "-n"], input=render(name), text=True, check=True)
+
+
+def test_default_profile_only_disables_rp_filter():
+    user_data = render("default")
+    assert "net.ipv4.conf.all.rp_filter = 0" in user_data
+    assert "netdev_max_backlog" not in user_data
+    assert "no interface tuning" in user_data
+    assert "irqbalance" not in user_data
+
+
+def test_upf_profile_tunes_data_plane():
+    user_data = render("upf-dataplane")
+    assert "# tuning profile upf-dataplane v2" in user_data
+    assert "net.core.netdev_max_backlog = 250000" in user_data
+    assert "vm.nr_hugepages = 512" in user_data
+    assert "rps_cpus" in user_data and "xps_cpus" in user_data
+    assert "smp_affinity_list" in user_data
+    assert "ethtool -L" in user_data
+    # Tuning runs after the interfaces are up and before the node joins the cluster.
+    assert user_data.index("ifconfig $line up") < user_data.index("rps_cpus") < user_data.index("/etc/eks/bootstrap.sh")
+
+
+@pytest.mark.parametrize("cpus, mask", [
+    ("0 1 2 3", "0000000f"),
+    ("33", "00000002,00000000"),
+    ("0 31 32", "00000001,80000001"),
+])
+def test_cpumask(cpus, mask):
+    script = f"{tuning_profiles._CPUMASK_FUNCTION}\ncpumask {cpus}"
+    result = subprocess.run(["bash", "-c", script], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == mask
+
+
+@pytest.mark.parametrize("name, ncpu, reserved", [
+    ("upf-dataplane", 8, "0,1,2,3"),
+    ("upf-dataplane", 16, ",".join(str(cpu) for cpu in range(12))),
+    # Too few CPUs to isolate any: the static policy still needs one reserved CPU.
+    ("upf-dataplane", 4, "0"),
+    ("nf-pinned", 8, "0"),
+])
+def test_static_cpu_manager_reserves_housekeeping_cpus(name, ncpu, reserved):
+    script = (f"nproc() {{ echo {ncpu}; }}\n{tuning_profiles.render_kubelet_cpu_args(PROFILES[name])}\n"
+              "echo $kubelet_cpu_args")
+    result = subprocess.run(["bash", "-c", script], capture_output=True, text=True, check=True)
+    assert result.stdout.split() == ["--cpu-manager-policy=static", f"--reserved-cpus={reserved}"]
+
+
+def test_default_profile_keeps_default_cpu_manager():
+    script = f"{tuning_profiles.render_kubelet_cpu_args(PROFILES['default'])}\necho -n $kubelet_cpu_args"
+    assert subprocess.run(["bash", "-c", script], capture_output=True, text=True, check=True).stdout == ""
+
+
+def test_profile_version_changes_user_data():
+    profile = PROFILES["default"]
+    bumped = tuning_profiles.TuningProfile(name=profile.name, version=profile.version + 1, sysctls=profile.sysctls)
+    assert tuning_profiles.render_sysctl(profile) != tuning_profiles.render_sysctl(bumped)
@@ -0,0 +1,158 @@
+import os
+import subprocess
+
+import pytest
+
+UPF_DIR = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, os.pardir, "my_open5gs", "upf")
+
+# Stand-ins for ip, iptables, sysctl, ss, curl and open5gs-upfd that keep their state in $STATE.
+# n3 and n6 are the Multus interfaces in 10.1.50.0/24 and 10.1.60.0/24.
+FAKES = {
+    "ip": """#!/bin/bash
+case "$*" in
+  "-4 -o addr show dev n3") echo "5: n3    inet 10.1.50.130/24 brd 10.1.50.255 scope global n3" ;;
+  "-4 -o addr show dev n6") echo "6: n6    inet 10.1.60.130/24 brd 10.1.60.255 scope global n6" ;;
+  "-4 route show dev n3 scope link") echo "10.1.50.0/24 proto kernel scope link src 10.1.50.130" ;;
+  "-4 route show dev n6 scope link") echo "10.1.60.0/24 proto kernel scope link src 10.1.60.130" ;;
+  "-o link show dev n3") echo "5: n3@if3: <BROADCAST,UP> mtu 9001 link/ether 02:00:00:00:00:03 brd ff:ff:ff:ff:ff:ff" ;;
+  "-o link show dev n6") echo "6: n6@if4: <BROADCAST,UP> mtu 9001 link/ether 02:00:00:00:00:06 brd ff:ff:ff:ff:ff:ff" ;;
+  "rule show") cat $STATE/rules 2>/dev/null ;;
+  "rule add "*) echo "0:	${*#rule add }" >> $STATE/rules; echo "$*" >> $STATE/log ;;
+  "link show "*) [ -e $STATE/link ] ;;
+  "tuntap add "*) touch $STATE/link; echo "$*" >> $STATE/log ;;
+  "addr show "*) cat $STATE/addr 2>/dev/null ;;
+  "addr add "*) echo "    inet $3 scope global" >> $STATE/addr; echo "$*" >> $STATE/log ;;
+  *) echo "$*" >> $STATE/log ;;
+esac
+""",
+    "iptables": """#!/bin/bash
+case "$*" in
+  *" -C "*) [ -e $STATE/nat ] ;;
+  *" -A "*) touch $STATE/nat; echo "iptables $*" >> $STATE/log ;;
+esac
+""",
+    "sysctl": """#!/bin/bash
+echo "sysctl $*" >> $STATE/log
+""",
+    "ss": """#!/bin/bash
+[ -e $STATE/listening ] && echo "UNCONN 0 0 0.0.0.0:8805 0.0.0.0:*"
+exit 0
+""",
+    "curl": """#!/bin/bash
+echo "curl $*" >> $STATE/curl
+case "$*" in
+  *api/token*) echo token ;;
+  *placement/region) echo us-west-2 ;;
+  *security-credentials/) echo node-role ;;
+  *security-credentials/node-role) printf '{\\n  "AccessKeyId" : "AKID",\\n  "SecretAccessKey" : "SECRET",\\n  "Token" : "TOKEN"\\n}\\n' ;;
+  *macs/02:00:00:00:00:03/interface-id) echo eni-n3 ;;
+  *macs/02:00:00:00:00:06/interface-id) echo eni-n6 ;;
+esac
+""",
+    "upf-claim-ips": """#!/bin/bash
+echo "upf-claim-ips $UPF_N3_DEV $UPF_N6_DEV" >> $STATE/log
+""",
+    "open5gs-upfd": """#!/bin/bash
+sleep 0.3; touch $STATE/listening; sleep 0.3; exit ${UPFD_EXIT:-0}
+""",
+}
+
+
+@pytest.fixture
+def env(tmp_path):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    for name, script in FAKES.items():
+        path = bin_dir / name
+        path.write_text(script)
+        path.chmod(0o755)
+    state = tmp_path / "state"
+    state.mkdir()
+    return dict(os.environ, PATH=f"{bin_dir}:{os.environ['PATH']}", STATE=str(state),
+                UPF_TIMING=str(tmp_path / "start-ms"), UPF_READY_FILE=str(tmp_path / "run" / "pfcp-ready"))
+
+
+def run(script, env):
+    return subprocess.run(["bash", os.path.join(UPF_DIR, script)], env=env, capture_output=True, text=True, check=False)
+
+
+def test_net_init_is_idempotent(env):
+    for _ in range(3):
+        assert run("upf-net-init.sh", env).returncode == 0
+    with open(os.path.join(env["STATE"], "log")) as log:
+        lines = log.read().splitlines()
+    assert lines.count("tuntap add name ogstun mode tun") == 1
+    assert lines.count("addr add 10.45.0.1/16 dev ogstun") == 1
+    assert sum(line.startswith("iptables -t nat -A POSTROUTING -s 10.45.0.0/16") for line in lines) == 1
+    assert lines.count("link set ogstun up") == 3
+
+
+def test_start_reports_pfcp_ready_time(env):
+    run("upf-net-init.sh", env)
+    result = run("upf-start.sh", env)
+    assert result.returncode == 0, result.stderr
+    (line,) = [line for line in result.stdout.splitlines() if "pfcp_ready_ms=" in line]
+    ready_ms = int(line.split("=")[1])
+    assert 300 <= ready_ms < 5000
+    with open(env["UPF_READY_FILE"]) as ready_file:
+        assert int(ready_file.read()) == ready_ms
+
+
+def test_start_passes_upfd_exit_status(env):
+    env["UPFD_EXIT"] = "3"
+    assert run("upf-start.sh", env).returncode == 3
+
+
+def test_net_init_takes_the_subnet_from_the_environment(env):
+    env.update(UPF_TUN_ADDR="10.46.128.1/20", UPF_SUBNET="10.46.128.0/20", UPF_N6_DEV="n6")
+    assert run("upf-net-init.sh", env).returncode == 0
+    with open(os.path.join(env["STATE"], "log")) as log:
+        lines = log.read().splitlines()
+    assert "addr add 10.46.128.1/20 dev ogstun" in lines
+    assert any(line.startswith("iptables -t nat -A POSTROUTING -s 10.46.128.0/20") for line in lines)
+    assert "rule add from 10.46.128.0/20 lookup 106" in lines
+
+
+def test_net_init_routes_the_data_plane_interfaces(env):
+    env.update(UPF_N3_DEV="n3", UPF_N6_DEV="n6")
+    for _ in range(2):
+        result = run("upf-net-init.sh", env)
+        assert result.returncode == 0, result.stderr
+    with open(os.path.join(env["STATE"], "log")) as log:
+        lines = log.read().splitlines()
+    assert lines.count("route replace default via 10.1.50.1 dev n3 table 103") == 2
+    assert lines.count("route replace default via 10.1.60.1 dev n6 table 106") == 2
+    # Replies leave by the interface they came in on; UE traffic leaves by N6.
+    assert [line for line in lines if line.startswith("rule add")] == [
+        "rule add from 10.1.50.130 lookup 103",
+        "rule add from 10.1.60.130 lookup 106",
+        "rule add from 10.45.0.0/16 lookup 106",
+    ]
+    assert lines.count("upf-claim-ips n3 n6") == 2
+
+
+def test_net_init_leaves_eth0_alone_without_multus(env):
+    assert run("upf-net-init.sh", env).returncode == 0
+    with open(os.path.join(env["STATE"], "log")) as log:
+        log = log.read()
+    assert "rule add" not in log and "upf-claim-ips" not in log
+
+
+def test_claim_ips_assigns_pod_addresses_to_the_enis(env):
+    env.update(UPF_N3_DEV="n3", UPF_N6_DEV="n6")
+    result = run("upf-claim-ips.sh", env)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.splitlines() == ["upf-claim-ips: 10.1.50.130 on eni-n3 (n3)",
+                                          "upf-claim-ips: 10.1.60.130 on eni-n6 (n6)"]
+    with open(os.path.join(env["STATE"], "curl")) as curl:
+        assigns = [line for line in curl.read().splitlines() if "--aws-sigv4" in line]
+    assert len(assigns) == 2
+    assert "--aws-sigv4 aws:amz:us-west-2:ec2 --user AKID:SECRET -H x-amz-security-token: TOKEN" in assigns[0]
+    assert "https://ec2.us-west-2.amazonaws.com/" in assigns[0]
+    assert "NetworkInterfaceId=eni-n3&PrivateIpAddress.1=10.1.50.130&AllowReassignment=true" in assigns[0]
+
+
+def test_claim_ips_does_nothing_without_multus(env):
+    result = run("upf-claim-ips.sh", env)
+    assert result.returncode == 0, result.stderr
+    assert not os.path.exists(os.path.join(env["STATE"], "curl"))
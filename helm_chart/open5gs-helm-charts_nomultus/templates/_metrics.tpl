@@ -0,0 +1,17 @@
+{{/*
+Open5GS metrics server block for an NF's section of its config, e.g.
+
+    amf:
+        ...
+        {{- include "open5gs.metrics" . | nindent 8 }}
+
+Renders nothing when metrics.enabled is false. Only the NFs with a metrics
+server in Open5GS (AMF, SMF, UPF, PCF) include it.
+*/}}
+{{- define "open5gs.metrics" -}}
+{{- if .Values.metrics.enabled -}}
+metrics:
+- addr: 0.0.0.0
+  port: {{ .Values.metrics.port }}
+{{- end -}}
+{{- end -}}
@@ -0,0 +1,39 @@
+{{/*
+Startup and readiness probes on an NF's own SBI server, e.g.
+
+    {{- include "open5gs.sbiProbes" (dict "root" . "nf" "ausf") | nindent 10 }}
+
+The SBI server only speaks HTTP/2, so the probes run curl with prior
+knowledge instead of an httpGet probe. Any HTTP answer means the server is
+up; the NRF must also list its NF instances. The NFs start in parallel and
+retry their NRF registration, so the probes gate traffic, not start order.
+*/}}
+{{- define "open5gs.sbiProbes" -}}
+{{- $command := `"curl", "-s", "--http2-prior-knowledge", "-o", "/dev/null", "--max-time", "1", "http://127.0.0.1/"` -}}
+{{- if eq .nf "nrf" -}}
+{{- $command = `"curl", "-sf", "--http2-prior-knowledge", "-o", "/dev/null", "--max-time", "1", "http://127.0.0.1/nnrf-nfm/v1/nf-instances"` -}}
+{{- end -}}
+startupProbe:
+  exec:
+    command: [{{ $command }}]
+  periodSeconds: 1
+  failureThreshold: {{ .root.Values.probes.startupSeconds }}
+readinessProbe:
+  exec:
+    command: [{{ $command }}]
+  periodSeconds: 5
+  timeoutSeconds: 2
+{{- end -}}
+
+{{/*
+Init container that waits until the MongoDB Service accepts connections. It
+has endpoints only once the mongo readiness probe passes, so this needs no
+API server access. For the NFs that open the database at start (UDR, PCF)
+and exit if it is not there.
+*/}}
+{{- define "open5gs.waitForMongo" -}}
+- name: wait-for-mongo
+  image: "{{ .Values.open5gs.image.repository }}:{{ .Values.open5gs.image.tag }}"
+  imagePullPolicy: {{ .Values.open5gs.image.pullPolicy }}
+  command: ["bash", "-c", "until (exec 3<>/dev/tcp/{{ .Release.Name }}-mongodb-svc/27017) 2>/dev/null; do sleep 1; done"]
+{{- end -}}
@@ -0,0 +1,15 @@
+{{/*
+Container resources of an NF from .Values.resources, e.g.
+
+    {{- include "open5gs.resources" (dict "root" . "nf" "smf") | nindent 8 }}
+
+Renders nothing when the NF has no entry. A pod is Guaranteed only if all of
+its containers, init containers included, have requests equal to limits, so
+the SMF and UPF init containers include their NF's resources too.
+*/}}
+{{- define "open5gs.resources" -}}
+{{- with index .root.Values.resources .nf -}}
+resources:
+  {{- toYaml . | nindent 2 }}
+{{- end -}}
+{{- end -}}
@@ -0,0 +1,23 @@
+{{/*
+UE addressing of the UPF StatefulSet.
+
+Every UPF serves the whole .Values.upf.subnet (the DNN subnet): the SMF
+allocates UE addresses from it without regard to the UPF it selects, so each
+UPF puts the subnet's first address on ogstun and NATs and routes all of it.
+*/}}
+
+{{/*
+The subnet's first host with the subnet's prefix, the ogstun address of every UPF.
+  {{ include "upf.gateway" . }}
+*/}}
+{{- define "upf.gateway" -}}
+{{- $cidr := splitList "/" .Values.upf.subnet -}}
+{{- $octets := splitList "." (index $cidr 0) -}}
+{{- $addr := add (mul (atoi (index $octets 0)) 16777216) (mul (atoi (index $octets 1)) 65536) (mul (atoi (index $octets 2)) 256) (atoi (index $octets 3)) 1 -}}
+{{- printf "%d.%d.%d.%d/%s" (div $addr 16777216) (mod (div $addr 65536) 256) (mod (div $addr 256) 256) (mod $addr 256) (index $cidr 1) -}}
+{{- end -}}
+
+{{/* PFCP address of UPF ordinal "index", through the headless service. */}}
+{{- define "upf.pfcpHost" -}}
+{{ .root.Release.Name }}-upf-{{ .index }}.{{ .root.Release.Name }}-upf-pfcp.{{ .root.Release.Namespace }}.svc.cluster.local
+{{- end -}}
@@ -0,0 +1,6 @@
+"""UERANSIM load generation against the Open5GS core.
+
+``config`` renders gNB/UE configs from the helm chart's values, ``runner``
+starts ``nr-gnb`` and ramps ``nr-ue`` at a given attach rate, and ``logs``
+turns their output into latency histograms and failure counts.
+"""
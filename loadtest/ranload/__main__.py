@@ -0,0 +1,198 @@
+"""Command line:
+
+    python -m ranload render --amf-address 10.1.30.171 --out configs/
+    python -m ranload run --amf-address 10.1.30.171 \\
+        --ues 1000 --rate 50 --ueransim-dir ~/UERANSIM/build --json results.json
+    python -m ranload failover --amf-address 10.1.30.171 --amf-address 10.1.30.172 \\
+        --ues 1000 --rate 50 --kill-after 10 --json failover.json
+    python -m ranload throughput --flows 8 --protocol udp --length 1200 --duration 30 \\
+        --label instance=c5n.2xlarge --label tuning=upf-dataplane --json gtpu.json
+    python -m ranload deploy-time --label chart=probes --json deploy.json
+    sudo python3 -m ranload ipsec-bench --proposal aes128gcm16 --tunnels 1 --tunnels 4 --json ipsec.json
+
+``render`` only writes gnb.yaml and ue.yaml. ``run`` also starts nr-gnb,
+ramps the UEs and prints the latency percentiles and failure counts.
+``failover`` is a ``run`` that kills the gNB's first AMF (``--kill-command``,
+by default ``amf-N`` for the AMF ``--gnb-index`` puts first)
+``--kill-after`` seconds into the ramp; it fails unless a UE registers after
+the kill.
+``throughput`` runs iperf3 flows over the uesimtun interfaces of UEs that
+are already up (see ``ranload.throughput``). ``deploy-time`` reinstalls the
+chart and times it until every pod is Ready (see ``ranload.deploytime``).
+``ipsec-bench`` measures the customer gateway's IPsec tunnels between two
+local network namespaces (see ``ranload.ipsecbench``).
+"""
+import argparse
+import json
+import os
+import shlex
+import subprocess
+import sys
+from dataclasses import replace
+from typing import Optional, Sequence
+
+from . import config, deploytime, ipsecbench, throughput
+from .runner import Failover, LoadTest, LoadTestError, local_address
+
+DEFAULT_CHART = os.path.join(os.path.dirname(os.path.realpath(__file__)), os.pardir, os.pardir,
+                             "helm_chart", "open5gs-helm-charts_nomultus")
+DEFAULT_VALUES = os.path.join(DEFAULT_CHART, "values.yaml")
+# {amf} is the chart's 1-based AMF instance the gNB lists first.
+DEFAULT_KILL_COMMAND = "kubectl -n open5gs delete pod -l epc-mode=amf-{amf} --wait=false"
+
+
+def default_kill_command(gnb_index: int, amf_count: int) -> str:
+    """Deletes the AMF ``config.amf_order`` puts first for gNB ``gnb_index``."""
+    return DEFAULT_KILL_COMMAND.format(amf=gnb_index % amf_count + 1)
+
+
+def _parse_labels(pairs: Sequence[str]) -> dict:
+    labels = {}
+    for pair in pairs:
+        key, sep, value = pair.partition("=")
+        if not sep:
+            raise SystemExit(f"--label expects KEY=VALUE, got {pair!r}")
+        labels[key] = value
+    return labels
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--values", default=DEFAULT_VALUES, help="helm chart values.yaml")
+    common.add_argument("--json", help="also write the results to this file")
+
+    ran = argparse.ArgumentParser(add_help=False)
+    ran.add_argument("--amf-address", action="append", required=True, dest="amf_addresses",
+                     help="AMF NGAP address (repeat for each AMF)")
+    ran.add_argument("--gnb-ip", help="gNB address (default: the local IP that routes to the first AMF)")
+    ran.add_argument("--gnb-index", type=int, default=0,
+                     help="this gNB's place in a fleet: sets its gNB ID and which AMF it lists first")
+    ran.add_argument("--imsi-start", help="first UE's IMSI (default: ueImport.provision.imsiRange.start)")
+    ran.add_argument("--out", default="ranload-run", help="directory for the configs and logs")
+
+    parser = argparse.ArgumentParser(prog="python -m ranload")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("render", parents=[common, ran])
+    load = argparse.ArgumentParser(add_help=False)
+    load.add_argument("--ueransim-dir", default=os.path.expanduser("~/UERANSIM/build"),
+                      help="directory with nr-gnb and nr-ue")
+    load.add_argument("--ues", type=int, default=10, help="number of UEs")
+    load.add_argument("--rate", type=float, default=10.0, help="UE attaches started per second")
+    load.add_argument("--timeout", type=float, default=120.0, help="seconds to wait after the last UE started")
+    commands.add_parser("run", parents=[common, ran, load])
+    failover = commands.add_parser("failover", parents=[common, ran, load])
+    failover.add_argument("--kill-command",
+                          help="kills the AMF listed first (default: " + DEFAULT_KILL_COMMAND.format(amf="N") +
+                               ", N = gnb-index mod the number of --amf-address, plus 1)")
+    failover.add_argument("--kill-after", type=float, default=10.0, help="seconds into the ramp")
+    tput = commands.add_parser("throughput", parents=[common])
+    tput.add_argument("--flows", type=int, default=1, help="number of concurrent iperf3 flows")
+    tput.add_argument("--protocol", choices=("udp", "tcp"), default="udp")
+    tput.add_argument("--duration", type=int, default=10, help="seconds per flow")
+    tput.add_argument("--length", type=int, help="iperf3 -l: UDP datagram / TCP write size in bytes")
+    tput.add_argument("--bandwidth", help="iperf3 -b per flow, e.g. 500M (UDP default: unlimited)")
+    tput.add_argument("--reverse", action="store_true", help="downlink: the UPF side sends")
+    tput.add_argument("--server", help="iperf3 server address (default: the UPFs' ogstun address)")
+    tput.add_argument("--base-port", type=int, default=throughput.DEFAULT_BASE_PORT)
+    tput.add_argument("--upf-stat-command", help="command printing the UPF node's /proc/stat")
+    tput.add_argument("--label", action="append", default=[], metavar="KEY=VALUE",
+                      help="recorded in the results, e.g. instance=c5n.2xlarge (repeatable)")
+    deploy = commands.add_parser("deploy-time")
+    deploy.add_argument("--json", help="also write the results to this file")
+    deploy.add_argument("--chart", default=DEFAULT_CHART)
+    deploy.add_argument("--release", default="core5g")
+    deploy.add_argument("--namespace", default="open5gs")
+    deploy.add_argument("--set", action="append", default=[], dest="set_values", metavar="KEY=VALUE",
+                        help="passed to helm (repeatable)")
+    deploy.add_argument("--timeout", type=float, default=900.0, help="seconds to wait for every pod")
+    deploy.add_argument("--warm", action="store_true", help="upgrade in place instead of uninstalling first")
+    deploy.add_argument("--label", action="append", default=[], metavar="KEY=VALUE",
+                        help="recorded in the results, e.g. chart=probes (repeatable)")
+    ipsec = commands.add_parser("ipsec-bench")
+    ipsec.add_argument("--json", help="also write the results to this file")
+    ipsec.add_argument("--proposal", action="append", dest="proposals", metavar="ESP_PROPOSAL",
+                       help=f"one of {', '.join(ipsecbench.PROPOSALS)} (repeatable; default: aes128gcm16)")
+    ipsec.add_argument("--tunnels", action="append", type=int, dest="tunnel_counts",
+                       help="tunnels per case (repeatable; default: 1 2 4)")
+    ipsec.add_argument("--duration", type=int, default=10, help="seconds per case")
+    ipsec.add_argument("--label", action="append", default=[], metavar="KEY=VALUE",
+                       help="recorded in the results, e.g. instance=c5.2xlarge (repeatable)")
+    args = parser.parse_args(argv)
+
+    if args.command == "ipsec-bench":
+        try:
+            report = ipsecbench.run(args.proposals or ["aes128gcm16"], args.tunnel_counts or [1, 2, 4],
+                                    args.duration, labels=_parse_labels(args.label))
+        except (ValueError, subprocess.CalledProcessError) as e:
+            print(f"ranload: {getattr(e, 'stderr', None) or e}", file=sys.stderr)
+            return 1
+        print(ipsecbench.text(report))
+        if args.json:
+            with open(args.json, "w") as results_file:
+                json.dump(report, results_file, indent=2)
+        return 0 if not any(case["failed_tunnels"] for case in report["cases"]) else 2
+
+    if args.command == "deploy-time":
+        try:
+            report = deploytime.measure(args.release, args.namespace, args.chart, args.set_values,
+                                        timeout=args.timeout, warm=args.warm, labels=_parse_labels(args.label))
+        except deploytime.DeployTimeError as e:
+            print(f"ranload: {e}", file=sys.stderr)
+            return 1
+        print(deploytime.text(report))
+        if args.json:
+            with open(args.json, "w") as results_file:
+                json.dump(report, results_file, indent=2)
+        return 0
+
+    profile = config.load_profile(args.values)
+
+    if args.command == "throughput":
+        addresses = throughput.tun_addresses(
+            subprocess.run(["ip", "-j", "-4", "addr", "show"], capture_output=True, text=True, check=True).stdout)
+        try:
+            flows = throughput.plan_flows(addresses, args.flows, profile.upf_subnet,
+                                          server=args.server, base_port=args.base_port)
+        except ValueError as e:
+            print(f"ranload: {e}", file=sys.stderr)
+            return 1
+        report = throughput.run(flows, args.protocol, args.duration, args.length, args.bandwidth, args.reverse,
+                                upf_stat_command=args.upf_stat_command, labels=_parse_labels(args.label))
+        print(json.dumps(report["total"]))
+        if args.json:
+            with open(args.json, "w") as results_file:
+                json.dump(report, results_file, indent=2)
+        return 0 if not report["total"]["failed_flows"] else 2
+
+    if args.imsi_start:
+        profile = replace(profile, imsi_start=args.imsi_start)
+
+    if args.command == "render":
+        paths = config.render(profile, args.out, args.gnb_ip or local_address(args.amf_addresses[0]),
+                              args.amf_addresses, args.gnb_index)
+        print("wrote " + " and ".join(paths))
+        return 0
+
+    kill = None
+    if args.command == "failover":
+        kill_command = args.kill_command or default_kill_command(args.gnb_index, len(args.amf_addresses))
+        kill = Failover(shlex.split(kill_command), args.kill_after)
+    load_test = LoadTest(args.ueransim_dir, args.out, profile, args.amf_addresses, args.ues, args.rate,
+                         gnb_ip=args.gnb_ip, timeout=args.timeout, gnb_index=args.gnb_index, failover=kill)
+    try:
+        results = load_test.run()
+    except LoadTestError as e:
+        print(f"ranload: {e}", file=sys.stderr)
+        return 1
+    print(results.text())
+    if args.json:
+        with open(args.json, "w") as results_file:
+            json.dump(results.as_dict(), results_file, indent=2)
+    if kill:
+        # UEs caught mid-procedure on the killed AMF are expected to fail.
+        return 0 if results.failover["recovery_ms"] is not None else 2
+    return 0 if not results.failures else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
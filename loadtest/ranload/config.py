@@ -0,0 +1,141 @@
+"""gNB and UE configs for UERANSIM, taken from the helm chart's values.
+
+The PLMN and TAC come from ``amf1``, the slice from ``nssf`` and the DNN
+from ``dnn``. The UEs use ``ueImport.provision.imsiRange``: its key/OPc
+(default ``simulator.ue1``'s) and its first IMSI. These are the subscribers
+the mongo-ue-import job provisions, so every UE ramped by the runner exists
+in the core.
+
+With several AMFs (the chart's ``amf.instances``) each gNB lists all of them
+in ``amfConfigs``. UERANSIM sets up an NG association with every AMF but
+sends new UEs to the first, so gNB ``i`` of a fleet lists them starting
+from AMF ``i``: the UEs of a fleet spread over the AMFs, and every gNB falls
+back on the others when its first AMF goes away.
+"""
+import os
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+import yaml
+
+NGAP_PORT = 38412
+# Same defaults as UERANSIM's config/open5gs-gnb.yaml and open5gs-ue.yaml.
+DEFAULT_NCI = "0x000000010"
+DEFAULT_AMF_FIELD = "8000"
+DEFAULT_IMEI = "356938035643803"
+DEFAULT_IMEISV = "4370816125816151"
+
+
+@dataclass(frozen=True)
+class RanProfile:
+    mcc: str
+    mnc: str
+    tac: int
+    sst: int
+    dnn: str
+    key: str
+    opc: str
+    imsi_start: str
+    # The DNN subnet every UPF serves, with its first host on ogstun (templates/_upf.tpl).
+    upf_subnet: str = "10.45.0.0/16"
+
+
+def load_profile(values_path: str) -> RanProfile:
+    with open(values_path) as values_file:
+        values = yaml.safe_load(values_file)
+    amf = values["amf1"]
+    ue = values["simulator"]["ue1"]
+    imsi_range = values.get("ueImport", {}).get("provision", {}).get("imsiRange") or {}
+    nssf = values.get("nssf") or {}
+    upf = values.get("upf") or {}
+    return RanProfile(
+        mcc=str(amf["mcc"]).zfill(3),
+        mnc=str(amf["mnc"]).zfill(2),
+        tac=int(amf["tac"]),
+        sst=int(nssf.get("sst", 1)),
+        dnn=values["dnn"],
+        key=imsi_range.get("key") or ue["secKey"],
+        opc=imsi_range.get("opc") or ue["op"],
+        imsi_start=str(imsi_range.get("start") or ue["imsi"]),
+        upf_subnet=upf.get("subnet", "10.45.0.0/16"),
+    )
+
+
+def amf_order(amf_addresses: Sequence[str], gnb_index: int = 0) -> List[str]:
+    """``amf_addresses`` rotated so gNB ``gnb_index`` of a fleet starts with its own AMF."""
+    if not amf_addresses:
+        raise ValueError("at least one AMF address is needed")
+    start = gnb_index % len(amf_addresses)
+    return list(amf_addresses[start:]) + list(amf_addresses[:start])
+
+
+def gnb_nci(gnb_index: int = 0) -> str:
+    """NR cell identity of gNB ``gnb_index``: gNB ID ``gnb_index + 1`` (idLength 32), cell 0.
+
+    Index 0 gives UERANSIM's default. The AMFs tell the gNBs of a fleet apart by their IDs.
+    """
+    return f"0x{(gnb_index + 1) << 4:09x}"
+
+
+def gnb_config(profile: RanProfile, gnb_ip: str, amf_addresses: Sequence[str], nci: str = DEFAULT_NCI) -> dict:
+    return {
+        "mcc": profile.mcc,
+        "mnc": profile.mnc,
+        "nci": nci,
+        "idLength": 32,
+        "tac": profile.tac,
+        "linkIp": gnb_ip,
+        "ngapIp": gnb_ip,
+        "gtpIp": gnb_ip,
+        "amfConfigs": [{"address": address, "port": NGAP_PORT} for address in amf_addresses],
+        "slices": [_nssai(profile)],
+        "ignoreStreamIds": True,
+    }
+
+
+def ue_config(profile: RanProfile, gnb_ip: str, imsi: Optional[str] = None) -> dict:
+    """Config of the first UE; ``nr-ue -n`` counts the IMSI up from it."""
+    return {
+        "supi": f"imsi-{imsi or profile.imsi_start}",
+        "mcc": profile.mcc,
+        "mnc": profile.mnc,
+        "protectionScheme": 0,
+        "homeNetworkPublicKey": "5a8d38864820197c3394b92613b20b91633cbd897119273bf8e4a6f4eec0a650",
+        "homeNetworkPublicKeyId": 1,
+        "routingIndicator": "0000",
+        "key": profile.key,
+        "op": profile.opc,
+        "opType": "OPC",
+        "amf": DEFAULT_AMF_FIELD,
+        "imei": DEFAULT_IMEI,
+        "imeiSv": DEFAULT_IMEISV,
+        "gnbSearchList": [gnb_ip],
+        "uacAic": {"mps": False, "mcs": False},
+        "uacAcc": {"normalClass": 0, "class11": False, "class12": False, "class13": False,
+                   "class14": False, "class15": False},
+        "sessions": [{"type": "IPv4", "apn": profile.dnn, "slice": _nssai(profile)}],
+        "configured-nssai": [_nssai(profile)],
+        "default-nssai": [_nssai(profile)],
+        "integrity": {"IA1": True, "IA2": True, "IA3": True},
+        "ciphering": {"EA1": True, "EA2": True, "EA3": True},
+        "integrityMaxRate": {"uplink": "full", "downlink": "full"},
+    }
+
+
+def _nssai(profile: RanProfile) -> dict:
+    return {"sst": profile.sst}
+
+
+def write_config(config: dict, path: str) -> None:
+    with open(path, "w") as config_file:
+        yaml.safe_dump(config, config_file, sort_keys=False)
+
+
+def render(profile: RanProfile, workdir: str, gnb_ip: str, amf_addresses: Sequence[str], gnb_index: int = 0):
+    """Write ``gnb.yaml`` and ``ue.yaml`` into ``workdir``; returns their paths."""
+    os.makedirs(workdir, exist_ok=True)
+    gnb_path = os.path.join(workdir, "gnb.yaml")
+    ue_path = os.path.join(workdir, "ue.yaml")
+    write_config(gnb_config(profile, gnb_ip, amf_order(amf_addresses, gnb_index), gnb_nci(gnb_index)), gnb_path)
+    write_config(ue_config(profile, gnb_ip), ue_path)
+    return gnb_path, ue_path
@@ -0,0 +1,134 @@
+"""Cold-deploy time: from ``helm upgrade --install`` to every pod Ready.
+
+The release is uninstalled first and its pods are waited out, unless
+``warm`` is set. The clock starts when helm is invoked. The run ends when
+every Deployment, StatefulSet and DaemonSet in the namespace has observed
+its current spec and has all its replicas updated and ready. Job pods (the UE import) are not waited for.
+
+Each pod's time is its Ready condition's ``lastTransitionTime`` (one second
+resolution, API server clock) relative to the start. Its restart count is recorded too, since
+an NF that gave up before its peers were up shows up as restarts, not as
+a slower start. Run it on both chart versions with a ``--label`` to compare:
+
+    python -m ranload deploy-time --label chart=k8s-wait-for --json before.json
+    python -m ranload deploy-time --label chart=probes --json after.json
+"""
+import json
+import subprocess
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+WORKLOAD_KINDS = "deployments,statefulsets,daemonsets"
+
+
+class DeployTimeError(Exception):
+    pass
+
+
+def _timestamp(value: str) -> float:
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc).timestamp()
+
+
+def _workload_ready(item: dict) -> bool:
+    status = item.get("status", {})
+    # Until the controller has seen the spec helm just applied, the status describes the previous one.
+    if status.get("observedGeneration", 0) < item.get("metadata", {}).get("generation", 0):
+        return False
+    if item["kind"] == "DaemonSet":
+        desired = status.get("desiredNumberScheduled", 0)
+        counts = status.get("updatedNumberScheduled", 0), status.get("numberReady", 0)
+    else:
+        desired = item["spec"].get("replicas", 1)
+        counts = status.get("updatedReplicas", 0), status.get("readyReplicas", 0)
+    return all(count == desired for count in counts)
+
+
+def workloads_ready(workloads: dict) -> Tuple[int, int]:
+    """``(ready, total)`` workloads in ``kubectl get deployments,statefulsets,daemonsets -o json`` output.
+
+    A workload is ready once its status is for its current generation and all its
+    replicas (none, if it is scaled to zero) are updated and ready.
+    """
+    items = workloads.get("items", [])
+    return sum(_workload_ready(item) for item in items), len(items)
+
+
+def pod_times(pods: dict, started: float) -> Dict[str, dict]:
+    """Seconds from ``started`` to Ready, and restarts, of every non-Job pod in ``kubectl get pods -o json``."""
+    times = {}
+    for pod in pods.get("items", []):
+        metadata = pod["metadata"]
+        if any(owner.get("kind") == "Job" for owner in metadata.get("ownerReferences", [])):
+            continue
+        status = pod.get("status", {})
+        ready = next((condition for condition in status.get("conditions", [])
+                      if condition["type"] == "Ready" and condition["status"] == "True"), None)
+        times[metadata["name"]] = {
+            "ready_seconds": round(max(0.0, _timestamp(ready["lastTransitionTime"]) - started), 1) if ready else None,
+            "restarts": sum(container.get("restartCount", 0) for container in status.get("containerStatuses", [])),
+        }
+    return dict(sorted(times.items()))
+
+
+def _run(command: List[str]) -> str:
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode:
+        raise DeployTimeError(f"{' '.join(command[:3])} failed: {result.stderr.strip()}")
+    return result.stdout
+
+
+def _get(kinds: str, namespace: str) -> dict:
+    return json.loads(_run(["kubectl", "get", kinds, "-n", namespace, "-o", "json"]))
+
+
+def measure(release: str, namespace: str, chart: str, set_values: Sequence[str] = (), timeout: float = 900.0,
+            warm: bool = False, poll: float = 1.0, labels: Optional[Dict[str, str]] = None,
+            clock: Callable[[], float] = time.time, sleep: Callable[[float], None] = time.sleep) -> dict:
+    """Install ``chart`` as ``release`` and wait for it; returns the JSON-ready report."""
+    if not warm:
+        subprocess.run(["helm", "uninstall", release, "-n", namespace], capture_output=True, text=True)
+        try:
+            _run(["kubectl", "wait", "--for=delete", "pod", "--all", "-n", namespace, f"--timeout={int(timeout)}s"])
+        except DeployTimeError as e:
+            # Nothing left to wait for (or no namespace yet) is what a cold start wants.
+            if "no matching resources" not in str(e) and "not found" not in str(e):
+                raise
+
+    install = ["helm", "upgrade", "--install", release, chart, "-n", namespace, "--create-namespace"]
+    for value in set_values:
+        install += ["--set", value]
+    started = clock()
+    _run(install)
+    deadline = started + timeout
+    while True:
+        ready, total = workloads_ready(_get(WORKLOAD_KINDS, namespace))
+        now = clock()
+        if total and ready == total:
+            break
+        if now >= deadline:
+            raise DeployTimeError(f"{ready}/{total} workloads ready after {timeout:g}s")
+        sleep(poll)
+
+    pods = pod_times(_get("pods", namespace), started)
+    ready_pods = [name for name, pod in pods.items() if pod["ready_seconds"] is not None]
+    return {
+        "started": started,
+        "labels": dict(labels or {}),
+        "release": release,
+        "cold": not warm,
+        "seconds": round(now - started, 1),
+        "workloads": total,
+        "restarts": sum(pod["restarts"] for pod in pods.values()),
+        "slowest": max(ready_pods, key=lambda name: pods[name]["ready_seconds"]) if ready_pods else None,
+        "pods": pods,
+    }
+
+
+def text(report: dict) -> str:
+    lines = [f"{report['workloads']} workloads Ready in {report['seconds']:.1f}s "
+             f"({'cold' if report['cold'] else 'warm'}, {report['restarts']} restarts)"]
+    for name, pod in sorted(report["pods"].items(), key=lambda item: item[1]["ready_seconds"] or 0):
+        seconds = "-" if pod["ready_seconds"] is None else f"{pod['ready_seconds']:.1f}s"
+        lines.append(f"  {name:<48} {seconds:>7}  restarts={pod['restarts']}")
+    return "\n".join(lines)
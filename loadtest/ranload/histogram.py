@@ -0,0 +1,51 @@
+"""Latency samples with exact percentiles and a power-of-two bucket view."""
+import math
+from typing import Dict, List, Sequence
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+class Histogram:
+
+    def __init__(self):
+        self.samples: List[float] = []
+        self._sorted = True
+
+    def record(self, value_ms: float) -> None:
+        if self.samples and value_ms < self.samples[-1]:
+            self._sorted = False
+        self.samples.append(value_ms)
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+    def _values(self) -> List[float]:
+        if not self._sorted:
+            self.samples.sort()
+            self._sorted = True
+        return self.samples
+
+    def percentile(self, percent: float) -> float:
+        """Nearest-rank percentile; 0 when there are no samples."""
+        values = self._values()
+        if not values:
+            return 0.0
+        rank = max(1, math.ceil(percent / 100 * len(values)))
+        return values[rank - 1]
+
+    def buckets(self) -> Dict[str, int]:
+        """Sample counts per ``<= 2^k`` ms bucket, e.g. ``{"<=64ms": 3}``."""
+        counts: Dict[str, int] = {}
+        for value in self._values():
+            bound = 1 << max(0, math.ceil(math.log2(value))) if value > 1 else 1
+            label = f"<={bound}ms"
+            counts[label] = counts.get(label, 0) + 1
+        return counts
+
+    def summary(self, percentiles: Sequence[int] = PERCENTILES) -> dict:
+        values = self._values()
+        summary = {"count": len(values)}
+        if values:
+            summary.update({f"p{p}": round(self.percentile(p), 1) for p in percentiles})
+            summary["max"] = round(values[-1], 1)
+        return summary
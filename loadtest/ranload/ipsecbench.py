@@ -0,0 +1,185 @@
+"""IPsec throughput of the customer gateway's tunnel setup, without AWS.
+
+Builds two network namespaces joined by a veth pair and, per tunnel, an
+XFRM interface pair with manually keyed ESP SAs in tunnel mode, the way
+``cgw-configure`` sets up each VPN tunnel (one SA pair, one interface,
+``if_id`` binding). iperf3 then runs one flow per tunnel, all at once, and
+the report sums them. Run it as root on the gateway's instance type, for
+every ``--proposal`` and ``--tunnels`` combination, to see how far one
+more VPN connection (two more tunnels) moves the bandwidth:
+
+    sudo python3 -m ranload ipsec-bench --proposal aes128gcm16 --proposal aes128-sha256 \\
+        --tunnels 1 --tunnels 2 --tunnels 4 --label instance=c5.2xlarge --json ipsec.json
+
+Host CPU comes from ``/proc/stat`` before and after each case.
+"""
+import binascii
+import os
+import subprocess
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Sequence
+
+from .throughput import Flow, FlowResult, cpu_usage, parse_iperf
+
+NAMESPACES = ("ipsecbench-a", "ipsecbench-b")
+OUTER = ("10.250.0.1", "10.250.0.2")
+DEFAULT_BASE_PORT = 5301
+
+
+@dataclass(frozen=True)
+class Proposal:
+    """An ESP proposal in strongSwan syntax and its kernel algorithms."""
+    name: str
+    aead: Optional[str] = None
+    encryption: Optional[str] = None
+    integrity: Optional[str] = None
+    # AEAD key bytes include the 4-byte salt.
+    key_bytes: int = 0
+    integrity_key_bytes: int = 0
+
+
+# The ESP algorithms AWS Site-to-Site VPN accepts that strongSwan proposes as these names.
+PROPOSALS = {
+    proposal.name: proposal for proposal in (
+        Proposal("aes128gcm16", aead="rfc4106(gcm(aes))", key_bytes=20),
+        Proposal("aes256gcm16", aead="rfc4106(gcm(aes))", key_bytes=36),
+        Proposal("aes128-sha256", encryption="cbc(aes)", integrity="hmac(sha256)", key_bytes=16,
+                 integrity_key_bytes=32),
+        Proposal("aes256-sha256", encryption="cbc(aes)", integrity="hmac(sha256)", key_bytes=32,
+                 integrity_key_bytes=32),
+    )
+}
+
+
+def inside_addresses(tunnel: int) -> tuple:
+    """Tunnel ``tunnel``'s (side A, side B) addresses, one /30 each."""
+    return f"10.251.{tunnel}.1", f"10.251.{tunnel}.2"
+
+
+def _key(length: int) -> str:
+    return "0x" + binascii.hexlify(os.urandom(length)).decode()
+
+
+def _state_algorithms(proposal: Proposal) -> List[str]:
+    if proposal.aead:
+        return ["aead", proposal.aead, _key(proposal.key_bytes), "128"]
+    return ["enc", proposal.encryption, _key(proposal.key_bytes),
+            "auth-trunc", proposal.integrity, _key(proposal.integrity_key_bytes), "128"]
+
+
+def setup_commands(proposal: Proposal, tunnels: int) -> List[List[str]]:
+    """``ip`` argument lists building both namespaces; each SA is installed on both sides."""
+    a, b = NAMESPACES
+    commands = [
+        ["netns", "add", a],
+        ["netns", "add", b],
+        ["link", "add", "veth-a", "netns", a, "type", "veth", "peer", "name", "veth-b", "netns", b],
+        ["-n", a, "addr", "add", f"{OUTER[0]}/30", "dev", "veth-a"],
+        ["-n", b, "addr", "add", f"{OUTER[1]}/30", "dev", "veth-b"],
+        ["-n", a, "link", "set", "veth-a", "up"],
+        ["-n", b, "link", "set", "veth-b", "up"],
+    ]
+    for tunnel in range(1, tunnels + 1):
+        # One SA per direction, shared by both namespaces.
+        states = [(OUTER[0], OUTER[1], 0x1000 + tunnel, _state_algorithms(proposal)),
+                  (OUTER[1], OUTER[0], 0x2000 + tunnel, _state_algorithms(proposal))]
+        for namespace, device, local, remote, inside in (
+            (a, "veth-a", OUTER[0], OUTER[1], inside_addresses(tunnel)[0]),
+            (b, "veth-b", OUTER[1], OUTER[0], inside_addresses(tunnel)[1]),
+        ):
+            interface = f"xfrm{tunnel}"
+            for src, dst, spi, algorithms in states:
+                commands.append(["-n", namespace, "xfrm", "state", "add", "src", src, "dst", dst,
+                                 "proto", "esp", "spi", hex(spi), "reqid", str(tunnel), "mode", "tunnel",
+                                 *algorithms, "if_id", str(tunnel)])
+            for direction, src, dst in (("out", local, remote), ("in", remote, local)):
+                commands.append(["-n", namespace, "xfrm", "policy", "add", "src", "0.0.0.0/0",
+                                 "dst", "0.0.0.0/0", "dir", direction, "tmpl", "src", src, "dst", dst,
+                                 "proto", "esp", "reqid", str(tunnel), "mode", "tunnel", "if_id", str(tunnel)])
+            commands += [
+                ["-n", namespace, "link", "add", interface, "type", "xfrm", "dev", device, "if_id", str(tunnel)],
+                ["-n", namespace, "addr", "add", f"{inside}/30", "dev", interface],
+                ["-n", namespace, "link", "set", interface, "up"],
+            ]
+    return commands
+
+
+def teardown_commands() -> List[List[str]]:
+    """Deleting the namespaces removes their links, SAs and policies."""
+    return [["netns", "del", namespace] for namespace in NAMESPACES]
+
+
+def _ip(args: Sequence[str], check: bool = True) -> None:
+    subprocess.run(["ip", *args], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=check)
+
+
+def _netns(namespace: str, command: Sequence[str]) -> List[str]:
+    return ["ip", "netns", "exec", namespace, *command]
+
+
+def _proc_stat() -> str:
+    with open("/proc/stat") as stat:
+        return stat.read()
+
+
+def run_case(proposal: Proposal, tunnels: int, duration: int, base_port: int = DEFAULT_BASE_PORT) -> dict:
+    """Set up ``tunnels`` tunnels with ``proposal``, run an iperf3 flow over each, tear down."""
+    a, b = NAMESPACES
+    for args in teardown_commands():
+        _ip(args, check=False)
+    try:
+        for args in setup_commands(proposal, tunnels):
+            _ip(args)
+        flows = [Flow(tunnel - 1, f"xfrm{tunnel}", *inside_addresses(tunnel), base_port + tunnel - 1)
+                 for tunnel in range(1, tunnels + 1)]
+        servers = [subprocess.Popen(_netns(b, ["iperf3", "-s", "-1", "-B", flow.server, "-p", str(flow.port)]),
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                   for flow in flows]
+        # Let the servers bind before the clients connect.
+        time.sleep(0.5)
+        before = _proc_stat()
+        clients = [
+            (flow, subprocess.Popen(_netns(a, ["iperf3", "-c", flow.server, "-B", flow.source, "-p", str(flow.port),
+                                               "-t", str(duration), "-J"]),
+                                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True))
+            for flow in flows
+        ]
+        results: List[FlowResult] = [parse_iperf(flow, client.communicate()[0], "tcp") for flow, client in clients]
+        after = _proc_stat()
+        for server in servers:
+            # -1 servers exit after their test; a failed client leaves one waiting.
+            if server.poll() is None:
+                server.kill()
+            server.wait()
+    finally:
+        for args in teardown_commands():
+            _ip(args, check=False)
+    ok = [result for result in results if result.error is None]
+    return {
+        "proposal": proposal.name,
+        "tunnels": tunnels,
+        "bits_per_second": sum(result.bits_per_second for result in ok),
+        "failed_tunnels": len(results) - len(ok),
+        "flows": [asdict(result) for result in results],
+        "cpu_percent": cpu_usage(before, after),
+    }
+
+
+def run(proposals: Sequence[str], tunnel_counts: Sequence[int], duration: int = 10,
+        labels: Optional[Dict[str, str]] = None) -> dict:
+    """Every proposal with every tunnel count; returns the JSON-ready report."""
+    unknown = [name for name in proposals if name not in PROPOSALS]
+    if unknown:
+        raise ValueError(f"unknown proposal {', '.join(unknown)}; choose from {', '.join(PROPOSALS)}")
+    started = time.time()
+    cases = [run_case(PROPOSALS[name], tunnels, duration) for name in proposals for tunnels in tunnel_counts]
+    return {"started": started, "labels": dict(labels or {}), "config": {"duration": duration}, "cases": cases}
+
+
+def text(report: dict) -> str:
+    lines = [f"{'proposal':<16}{'tunnels':>8}{'Gbit/s':>10}{'cpu %':>8}"]
+    for case in report["cases"]:
+        lines.append(f"{case['proposal']:<16}{case['tunnels']:>8}{case['bits_per_second'] / 1e9:>10.2f}"
+                     f"{case['cpu_percent'].get('cpu', 0.0):>8.1f}")
+    return "\n".join(lines)
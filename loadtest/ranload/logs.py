@@ -0,0 +1,122 @@
+"""UERANSIM log lines -> per-UE procedure timings.
+
+``nr-ue`` logs lines such as
+
+    [2023-08-02 10:00:00.123] [imsi-208930000001000|nas] [info] Initial Registration is successful
+
+(the ``imsi-...|`` prefix is only there when one process runs several UEs).
+The log's own timestamps are used, so pipe buffering does not skew the
+latencies.
+"""
+import re
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional
+
+from .histogram import Histogram
+
+LINE = re.compile(
+    r"^\[(?P<time>\d{4}-\d\d-\d\d \d\d:\d\d:\d\d\.\d{3})\] "
+    r"\[(?:(?P<ue>[^|\]]+)\|)?(?P<component>[^\]]+)\] "
+    r"\[(?P<level>\w+)\] (?P<message>.*)$"
+)
+
+REGISTRATION_START = "registration_start"
+REGISTERED = "registered"
+REGISTRATION_FAILED = "registration_failed"
+SESSION_START = "session_start"
+SESSION_UP = "session_up"
+SESSION_FAILED = "session_failed"
+
+# (message prefix, event), checked in order.
+EVENTS = (
+    ("Sending Initial Registration", REGISTRATION_START),
+    ("Initial Registration is successful", REGISTERED),
+    ("Initial Registration failed", REGISTRATION_FAILED),
+    ("Registration Reject", REGISTRATION_FAILED),
+    ("Sending PDU Session Establishment Request", SESSION_START),
+    ("PDU Session establishment is successful", SESSION_UP),
+    ("PDU Session Establishment Reject", SESSION_FAILED),
+    ("PDU Session establishment procedure failed", SESSION_FAILED),
+)
+
+
+@dataclass(frozen=True)
+class Event:
+    time: datetime
+    ue: str
+    kind: str
+    message: str
+
+
+def parse(line: str, default_ue: str = "ue") -> Optional[Event]:
+    match = LINE.match(line.strip())
+    if not match:
+        return None
+    message = match.group("message")
+    for prefix, kind in EVENTS:
+        if message.startswith(prefix):
+            return Event(
+                time=datetime.strptime(match.group("time"), "%Y-%m-%d %H:%M:%S.%f"),
+                ue=match.group("ue") or default_ue,
+                kind=kind,
+                message=message,
+            )
+    return None
+
+
+@dataclass
+class _UeState:
+    registration_start: Optional[datetime] = None
+    registered: bool = False
+    session_start: Optional[datetime] = None
+    session_up: bool = False
+
+
+class Tracker:
+    """Registration and PDU session latencies and failures across UEs.
+
+    A latency runs from the first request to the success, so retries after a
+    failure count against it. Every failure is counted, even if a retry later
+    succeeds.
+    """
+
+    def __init__(self):
+        self.ues: Dict[str, _UeState] = {}
+        self.registration = Histogram()
+        self.session = Histogram()
+        self.failures: Counter = Counter()
+
+    def feed(self, event: Event) -> None:
+        state = self.ues.setdefault(event.ue, _UeState())
+        if event.kind == REGISTRATION_START:
+            state.registration_start = state.registration_start or event.time
+        elif event.kind == REGISTERED and not state.registered:
+            state.registered = True
+            if state.registration_start:
+                self.registration.record(_ms(event.time - state.registration_start))
+        elif event.kind == SESSION_START:
+            state.session_start = state.session_start or event.time
+        elif event.kind == SESSION_UP and not state.session_up:
+            state.session_up = True
+            if state.session_start:
+                self.session.record(_ms(event.time - state.session_start))
+        elif event.kind in (REGISTRATION_FAILED, SESSION_FAILED):
+            self.failures[event.kind] += 1
+
+    def done(self, expected_ues: int) -> bool:
+        return sum(state.session_up for state in self.ues.values()) >= expected_ues
+
+    def finish(self, expected_ues: int) -> None:
+        """Count the UEs that never got registered or a session as timeouts."""
+        registered = sum(state.registered for state in self.ues.values())
+        sessions = sum(state.session_up for state in self.ues.values())
+        if expected_ues > registered:
+            self.failures["registration_timeout"] = expected_ues - registered
+        if registered > sessions:
+            self.failures["session_timeout"] = registered - sessions
+
+
+def _ms(delta) -> float:
+    return delta.total_seconds() * 1000
@@ -0,0 +1,226 @@
+"""Start ``nr-gnb``, ramp ``nr-ue`` and collect the results.
+
+With a ``Failover`` the run also kills an AMF part way through the ramp (any
+command, e.g. ``kubectl delete pod``) and reports how the registrations fared
+from then on: how long until the next UE registered and which failures
+followed the kill.
+"""
+import os
+import queue
+import socket
+import subprocess
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Sequence
+
+from . import config, logs
+from .histogram import Histogram
+
+GNB_READY = "NG Setup procedure is successful"
+GNB_READY_TIMEOUT_SECONDS = 30
+
+
+class LoadTestError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class Failover:
+    """Run ``command`` ``after`` seconds into the ramp."""
+    command: Sequence[str]
+    after: float
+
+
+@dataclass
+class Results:
+    ues: int
+    rate: float
+    seconds: float
+    registration: Histogram
+    session: Histogram
+    failures: Dict[str, int] = field(default_factory=dict)
+    # Set by a run with a Failover; see _FailoverState.as_dict.
+    failover: Optional[dict] = None
+
+    def as_dict(self) -> dict:
+        results = {
+            "ues": self.ues,
+            "attach_rate": self.rate,
+            "seconds": round(self.seconds, 3),
+            "registration_ms": dict(self.registration.summary(), buckets=self.registration.buckets()),
+            "pdu_session_ms": dict(self.session.summary(), buckets=self.session.buckets()),
+            "failures": dict(sorted(self.failures.items())),
+        }
+        if self.failover is not None:
+            results["failover"] = self.failover
+        return results
+
+    def text(self) -> str:
+        lines = [f"{self.ues} UEs at {self.rate:g}/s in {self.seconds:.1f}s"]
+        for name, histogram in (("registration", self.registration), ("pdu session", self.session)):
+            summary = histogram.summary()
+            percentiles = " ".join(f"{key}={value}" for key, value in summary.items() if key != "count")
+            lines.append(f"  {name:<13} {summary['count']:>6} ok  {percentiles} (ms)")
+        failures = ", ".join(f"{kind}={count}" for kind, count in sorted(self.failures.items()))
+        lines.append(f"  failures      {failures or 'none'}")
+        if self.failover is not None:
+            recovery = self.failover["recovery_ms"]
+            after_kill = ", ".join(f"{kind}={count}" for kind, count in self.failover["failures_after_kill"].items())
+            lines.append(f"  failover      killed at {self.failover['killed_at_seconds']:.1f}s, "
+                         f"{self.failover['registered_after_kill']} registered after, "
+                         f"first after {'never' if recovery is None else f'{recovery:g} ms'}, "
+                         f"failures {after_kill or 'none'}")
+        return "\n".join(lines)
+
+
+def local_address(remote: str, port: int = config.NGAP_PORT) -> str:
+    """The local IP that routes to ``remote`` (no packet is sent)."""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as probe:
+        probe.connect((remote, port))
+        return probe.getsockname()[0]
+
+
+def _pump(process: subprocess.Popen, name: str, lines: "queue.Queue", log_path: str) -> None:
+    with open(log_path, "w") as log_file:
+        for line in process.stdout:
+            log_file.write(line)
+            lines.put((name, line))
+    lines.put((name, None))
+
+
+class _FailoverState:
+    """Registrations and failures as of the kill, to tell what came after it."""
+
+    def __init__(self, tracker: logs.Tracker, started: float, killed: float):
+        self.killed_at = killed - started
+        self.killed = killed
+        self.registered = len(tracker.registration)
+        self.failures = Counter(tracker.failures)
+        self.recovered: Optional[float] = None
+
+    def follow(self, tracker: logs.Tracker, now: float) -> None:
+        if self.recovered is None and len(tracker.registration) > self.registered:
+            self.recovered = now
+
+    def as_dict(self, tracker: logs.Tracker) -> dict:
+        return {
+            "killed_at_seconds": round(self.killed_at, 3),
+            "registered_after_kill": len(tracker.registration) - self.registered,
+            "recovery_ms": None if self.recovered is None else round((self.recovered - self.killed) * 1000),
+            "failures_after_kill": dict(sorted((tracker.failures - self.failures).items())),
+        }
+
+
+class LoadTest:
+    """One run: ``ues`` UEs started ``rate`` per second from ``profile.imsi_start``."""
+
+    def __init__(self, ueransim_dir: str, workdir: str, profile: config.RanProfile, amf_addresses: Sequence[str],
+                 ues: int, rate: float, gnb_ip: Optional[str] = None, timeout: float = 120.0,
+                 gnb_index: int = 0, failover: Optional[Failover] = None):
+        if ues < 1 or rate <= 0:
+            raise ValueError("ues must be at least 1 and rate positive")
+        self.ueransim_dir = ueransim_dir
+        self.workdir = workdir
+        self.profile = profile
+        self.amf_addresses = list(amf_addresses)
+        self.ues = ues
+        self.rate = rate
+        self.gnb_ip = gnb_ip or local_address(self.amf_addresses[0])
+        self.timeout = timeout
+        self.gnb_index = gnb_index
+        self.failover = failover
+
+    def _start(self, name: str, args, lines: "queue.Queue") -> subprocess.Popen:
+        process = subprocess.Popen([os.path.join(self.ueransim_dir, name)] + args, stdout=subprocess.PIPE,
+                                   stderr=subprocess.STDOUT, text=True, bufsize=1)
+        threading.Thread(target=_pump, args=(process, name, lines, os.path.join(self.workdir, f"{name}.log")),
+                         daemon=True).start()
+        return process
+
+    def run(self) -> Results:
+        gnb_path, ue_path = config.render(self.profile, self.workdir, self.gnb_ip, self.amf_addresses,
+                                          self.gnb_index)
+        lines: "queue.Queue" = queue.Queue()
+        processes = [self._start("nr-gnb", ["-c", gnb_path], lines)]
+        try:
+            self._wait_for_gnb(lines)
+            tempo_ms = max(0, round(1000 / self.rate))
+            started = time.monotonic()
+            processes.append(self._start("nr-ue", ["-c", ue_path, "-n", str(self.ues), "-t", str(tempo_ms)], lines))
+            tracker, failover = self._follow(lines, started)
+            seconds = time.monotonic() - started
+        finally:
+            for process in processes:
+                _stop(process)
+        if self.failover and failover is None:
+            raise LoadTestError(f"the run ended before the failover command was due at {self.failover.after:g}s")
+        tracker.finish(self.ues)
+        return Results(self.ues, self.rate, seconds, tracker.registration, tracker.session, dict(tracker.failures),
+                       failover.as_dict(tracker) if failover else None)
+
+    def _wait_for_gnb(self, lines: "queue.Queue") -> None:
+        deadline = time.monotonic() + GNB_READY_TIMEOUT_SECONDS
+        while True:
+            try:
+                name, line = lines.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                raise LoadTestError(f"nr-gnb did not connect to an AMF at {', '.join(self.amf_addresses)} "
+                                    f"within {GNB_READY_TIMEOUT_SECONDS}s (see {self.workdir}/nr-gnb.log)")
+            if line is None:
+                raise LoadTestError(f"nr-gnb exited (see {self.workdir}/nr-gnb.log)")
+            if GNB_READY in line:
+                return
+
+    def _follow(self, lines: "queue.Queue", started: float):
+        tracker = logs.Tracker()
+        failover: Optional[_FailoverState] = None
+        kill_at = started + self.failover.after if self.failover else None
+        default_ue = f"imsi-{self.profile.imsi_start}"
+        deadline = started + self.ues / self.rate + self.timeout
+        while not tracker.done(self.ues):
+            now = time.monotonic()
+            if failover is None and kill_at is not None and now >= kill_at:
+                self._kill()
+                failover = _FailoverState(tracker, started, time.monotonic())
+            remaining = deadline - now
+            if remaining <= 0:
+                break
+            wait = remaining if failover is not None or kill_at is None else min(remaining, kill_at - now)
+            try:
+                name, line = lines.get(timeout=wait)
+            except queue.Empty:
+                if wait < remaining:
+                    continue
+                break
+            if line is None:
+                if name == "nr-ue":
+                    break
+                raise LoadTestError(f"nr-gnb exited during the run (see {self.workdir}/nr-gnb.log)")
+            if name == "nr-ue":
+                event = logs.parse(line, default_ue)
+                if event is not None:
+                    tracker.feed(event)
+                    if failover is not None:
+                        failover.follow(tracker, time.monotonic())
+        return tracker, failover
+
+    def _kill(self) -> None:
+        result = subprocess.run(list(self.failover.command), stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                text=True)
+        with open(os.path.join(self.workdir, "failover.log"), "w") as log_file:
+            log_file.write(result.stdout)
+        if result.returncode != 0:
+            raise LoadTestError(f"failover command exited with {result.returncode} "
+                                f"(see {self.workdir}/failover.log)")
+
+
+def _stop(process: subprocess.Popen) -> None:
+    if process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
@@ -0,0 +1,182 @@
+"""GTP-U throughput: iperf3 flows from the UEs' uesimtun interfaces through the UPF.
+
+Each flow binds to one uesimtun address (round robin over the UEs) and
+talks to an iperf3 server at the ogstun address. Every UPF has that address
+(templates/_upf.tpl), so a flow ends on the UPF serving its UE's session,
+whichever one the SMF selected. An iperf3 server runs one test at a time, so
+flow ``i`` uses port ``base_port + i``. Start the servers in every UPF pod
+first:
+
+    for pod in $(kubectl -n open5gs get po -l epc-mode=upf -o name); do
+        kubectl -n open5gs exec $pod -c upf -- sh -c \\
+            'for p in $(seq 5201 5208); do iperf3 -s -D -p $p; done'
+    done
+
+UPF CPU comes from two ``/proc/stat`` snapshots, taken before and after the
+flows by ``--upf-stat-command``, e.g. ``kubectl -n open5gs exec core5g-upf-0
+-c upf -- cat /proc/stat``. A container sees its node's CPUs, so this is the
+load of the dedicated UPF node.
+"""
+import ipaddress
+import json
+import shlex
+import subprocess
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_BASE_PORT = 5201
+TUN_PREFIX = "uesimtun"
+
+
+@dataclass(frozen=True)
+class Flow:
+    index: int
+    interface: str
+    source: str
+    server: str
+    port: int
+
+
+@dataclass
+class FlowResult:
+    flow: int
+    interface: str
+    source: str
+    server: str
+    port: int
+    bits_per_second: float = 0.0
+    # Packets per second; UDP only, since TCP segments are not counted by iperf3.
+    pps: Optional[float] = None
+    lost_percent: Optional[float] = None
+    jitter_ms: Optional[float] = None
+    retransmits: Optional[int] = None
+    error: Optional[str] = None
+
+
+def tun_addresses(ip_json: str) -> List[Tuple[str, str]]:
+    """``(interface, IPv4)`` of every uesimtun interface in ``ip -j -4 addr show`` output."""
+    addresses = []
+    for link in json.loads(ip_json):
+        if link.get("ifname", "").startswith(TUN_PREFIX):
+            for addr in link.get("addr_info", []):
+                if addr.get("family") == "inet":
+                    addresses.append((link["ifname"], addr["local"]))
+    return sorted(addresses, key=lambda item: int(item[0][len(TUN_PREFIX):] or 0))
+
+
+def upf_gateway(subnet: str) -> str:
+    """ogstun address of every UPF, the first host of the DNN subnet (see templates/_upf.tpl)."""
+    return str(ipaddress.ip_network(subnet).network_address + 1)
+
+
+def plan_flows(addresses: Sequence[Tuple[str, str]], flows: int, subnet: str,
+               server: Optional[str] = None, base_port: int = DEFAULT_BASE_PORT) -> List[Flow]:
+    if not addresses:
+        raise ValueError("no uesimtun interfaces; are the UEs' PDU sessions up?")
+    planned = []
+    for index in range(flows):
+        interface, source = addresses[index % len(addresses)]
+        planned.append(Flow(index, interface, source, server or upf_gateway(subnet), base_port + index))
+    return planned
+
+
+def iperf_command(flow: Flow, protocol: str, duration: int, length: Optional[int],
+                  bandwidth: Optional[str], reverse: bool) -> List[str]:
+    command = ["iperf3", "-c", flow.server, "-p", str(flow.port), "-B", flow.source,
+               "-t", str(duration), "-J"]
+    if protocol == "udp":
+        # UDP defaults to 1 Mbit/s; 0 is unlimited.
+        command += ["-u", "-b", bandwidth or "0"]
+    elif bandwidth:
+        command += ["-b", bandwidth]
+    if length:
+        command += ["-l", str(length)]
+    if reverse:
+        command.append("-R")
+    return command
+
+
+def parse_iperf(flow: Flow, output: str, protocol: str) -> FlowResult:
+    result = FlowResult(flow.index, flow.interface, flow.source, flow.server, flow.port)
+    try:
+        report = json.loads(output)
+    except ValueError:
+        result.error = output.strip()[-200:] or "no output"
+        return result
+    if report.get("error"):
+        result.error = report["error"]
+        return result
+    end = report["end"]
+    if protocol == "udp":
+        summary = end["sum"]
+        seconds = summary.get("seconds") or 0
+        result.bits_per_second = summary["bits_per_second"]
+        result.pps = round(summary["packets"] / seconds, 1) if seconds else 0.0
+        result.lost_percent = summary["lost_percent"]
+        result.jitter_ms = summary["jitter_ms"]
+    else:
+        result.bits_per_second = end["sum_received"]["bits_per_second"]
+        result.retransmits = end["sum_sent"].get("retransmits")
+    return result
+
+
+def cpu_usage(before: str, after: str) -> Dict[str, float]:
+    """Busy percent per CPU (and ``cpu`` overall) between two ``/proc/stat`` snapshots."""
+    def ticks(stat: str) -> Dict[str, Tuple[int, int]]:
+        counters = {}
+        for line in stat.splitlines():
+            fields = line.split()
+            if fields and fields[0].startswith("cpu"):
+                values = [int(value) for value in fields[1:]]
+                # idle + iowait
+                idle = values[3] + (values[4] if len(values) > 4 else 0)
+                counters[fields[0]] = (sum(values[:8]), idle)
+        return counters
+
+    start, end = ticks(before), ticks(after)
+    usage = {}
+    for cpu in start.keys() & end.keys():
+        total = end[cpu][0] - start[cpu][0]
+        idle = end[cpu][1] - start[cpu][1]
+        usage[cpu] = round(100.0 * (total - idle) / total, 1) if total > 0 else 0.0
+    return dict(sorted(usage.items(), key=lambda item: (item[0] != "cpu", len(item[0]), item[0])))
+
+
+def _shell(command: str) -> str:
+    return subprocess.run(shlex.split(command), capture_output=True, text=True, check=True).stdout
+
+
+def run(flows: Sequence[Flow], protocol: str = "udp", duration: int = 10, length: Optional[int] = None,
+        bandwidth: Optional[str] = None, reverse: bool = False, upf_stat_command: Optional[str] = None,
+        labels: Optional[Dict[str, str]] = None) -> dict:
+    """Run every flow at once; returns the JSON-ready report."""
+    before = _shell(upf_stat_command) if upf_stat_command else None
+    started = time.time()
+    processes = [
+        (flow, subprocess.Popen(iperf_command(flow, protocol, duration, length, bandwidth, reverse),
+                                stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True))
+        for flow in flows
+    ]
+    results = [parse_iperf(flow, process.communicate()[0], protocol) for flow, process in processes]
+    after = _shell(upf_stat_command) if upf_stat_command else None
+
+    ok = [result for result in results if result.error is None]
+    total = {
+        "flows": len(results),
+        "failed_flows": len(results) - len(ok),
+        "bits_per_second": sum(result.bits_per_second for result in ok),
+    }
+    if protocol == "udp" and ok:
+        total["pps"] = round(sum(result.pps for result in ok), 1)
+        total["lost_percent_max"] = max(result.lost_percent for result in ok)
+        total["jitter_ms_max"] = max(result.jitter_ms for result in ok)
+    return {
+        "started": started,
+        "labels": dict(labels or {}),
+        "config": {"protocol": protocol, "duration": duration, "length": length, "bandwidth": bandwidth,
+                   "direction": "downlink" if reverse else "uplink"},
+        "flows": [asdict(result) for result in results],
+        "total": total,
+        "upf_cpu_percent": cpu_usage(before, after) if before is not None else None,
+    }
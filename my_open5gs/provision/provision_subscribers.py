@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""Bulk subscriber provisioning for the Open5GS MongoDB.
+
+Writes subscribers in the document format of ``open5gs-dbctl
+add_ue_with_apn``. Instead of a few mongo shell processes per UE, it sends
+batched, unordered bulk upserts keyed by IMSI. Subscribers are streamed
+from CSV or JSONL files and/or generated from an IMSI range, so 100k UEs
+never sit in memory at once:
+
+    open5gs-provision --db-uri mongodb://core5g-mongodb-svc/open5gs \\
+        --file subscribers.jsonl \\
+        --imsi-range 208930000001000 100000 --key <K> --opc <OPc>
+
+A file record has ``imsi`` and ``key`` plus ``opc`` or ``op``. Optional
+fields are ``amf``, ``dnn``, ``sst``, ``sd`` and ``msisdn`` (a list in
+JSONL, space separated in CSV).
+
+An existing subscriber's security keys, slice and MSISDNs are replaced.
+Its SQN is kept, so a UE stays in sync across re-provisioning. A new one
+starts at SQN 64, as open5gs-dbctl's do.
+
+Needs pymongo (python3-pymongo in the ``provision`` image of
+my_open5gs/Dockerfile).
+"""
+import argparse
+import csv
+import itertools
+import json
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_BATCH_SIZE = 1000
+# Print progress every this many batches.
+PROGRESS_EVERY = 10
+DEFAULT_AMF = "8000"
+DEFAULT_DNN = "internet"
+# 1 Gbps, the AMBR open5gs-dbctl gives every subscriber and session.
+DEFAULT_AMBR = {"downlink": {"value": 1000000000, "unit": 0}, "uplink": {"value": 1000000000, "unit": 0}}
+# The SQN open5gs-dbctl gives a new subscriber, stored as a 64-bit integer.
+INITIAL_SQN = 64
+
+
+@dataclass(frozen=True)
+class Subscriber:
+    imsi: str
+    key: str
+    opc: Optional[str] = None
+    op: Optional[str] = None
+    amf: str = DEFAULT_AMF
+    dnn: str = DEFAULT_DNN
+    sst: int = 1
+    sd: Optional[str] = None
+    msisdn: Tuple[str, ...] = field(default_factory=tuple)
+
+    def __post_init__(self):
+        if not self.imsi.isdigit() or not 6 <= len(self.imsi) <= 15:
+            raise ValueError(f"invalid IMSI {self.imsi!r}")
+        if (self.opc is None) == (self.op is None):
+            raise ValueError(f"subscriber {self.imsi} needs exactly one of opc and op")
+
+    @classmethod
+    def from_record(cls, record: dict) -> "Subscriber":
+        msisdn = record.get("msisdn") or ()
+        if isinstance(msisdn, str):
+            msisdn = msisdn.split()
+        return cls(
+            imsi=str(record["imsi"]),
+            key=record["key"],
+            opc=record.get("opc") or None,
+            op=record.get("op") or None,
+            amf=record.get("amf") or DEFAULT_AMF,
+            dnn=record.get("dnn") or DEFAULT_DNN,
+            sst=int(record.get("sst") or 1),
+            sd=str(record["sd"]) if record.get("sd") else None,
+            msisdn=tuple(str(number) for number in msisdn),
+        )
+
+
+def read_jsonl(lines: Iterable[str]) -> Iterator[Subscriber]:
+    for number, line in enumerate(lines, 1):
+        if line.strip():
+            try:
+                yield Subscriber.from_record(json.loads(line))
+            except (ValueError, KeyError) as e:
+                raise ValueError(f"line {number}: {e}") from e
+
+
+def read_csv(lines: Iterable[str]) -> Iterator[Subscriber]:
+    for number, row in enumerate(csv.DictReader(lines), 2):
+        try:
+            yield Subscriber.from_record(row)
+        except (ValueError, KeyError) as e:
+            raise ValueError(f"line {number}: {e}") from e
+
+
+def read_file(path: str) -> Iterator[Subscriber]:
+    """Subscribers from a ``.csv`` file, or JSONL for any other name (``-`` is stdin)."""
+    if path == "-":
+        yield from read_jsonl(sys.stdin)
+        return
+    with open(path, newline="") as subscriber_file:
+        reader = read_csv if path.endswith(".csv") else read_jsonl
+        yield from reader(subscriber_file)
+
+
+def imsi_range(start: str, count: int, template: dict) -> Iterator[Subscriber]:
+    """``count`` subscribers from IMSI ``start`` on, keeping its width (leading zeros included)."""
+    first = int(start)
+    if len(str(first + count - 1)) > len(start):
+        raise ValueError(f"{count} IMSIs from {start} overflow {len(start)} digits")
+    for offset in range(count):
+        yield Subscriber.from_record(dict(template, imsi=str(first + offset).zfill(len(start))))
+
+
+def subscriber_update(subscriber: Subscriber, object_id: Callable[[], object]) -> dict:
+    """The ``$set`` that turns any (or no) document for the IMSI into this subscriber.
+
+    Security fields are set one by one, so ``security.sqn`` survives.
+    """
+    nssai = {"sst": subscriber.sst}
+    if subscriber.sd:
+        nssai["sd"] = subscriber.sd
+    session = {
+        "name": subscriber.dnn,
+        "type": 3,  # IPv4v6
+        "qos": {"index": 9, "arp": {"priority_level": 8, "pre_emption_capability": 1, "pre_emption_vulnerability": 1}},
+        "ambr": DEFAULT_AMBR,
+        "pcc_rule": [],
+        "_id": object_id(),
+    }
+    return {
+        "schema_version": 1,
+        "imsi": subscriber.imsi,
+        "msisdn": list(subscriber.msisdn),
+        "imeisv": [],
+        "mme_host": [],
+        "mme_realm": [],
+        "purge_flag": [],
+        "slice": [dict(nssai, default_indicator=True, session=[session], _id=object_id())],
+        "security.k": subscriber.key,
+        "security.opc": subscriber.opc,
+        "security.op": subscriber.op,
+        "security.amf": subscriber.amf,
+        "ambr": DEFAULT_AMBR,
+        "access_restriction_data": 32,
+        "network_access_mode": 0,
+        "subscriber_status": 0,
+        "operator_determined_barring": 0,
+        "subscribed_rau_tau_timer": 12,
+        "__v": 0,
+    }
+
+
+def batched(iterable: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+@dataclass
+class Report:
+    subscribers: int = 0
+    inserted: int = 0
+    updated: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        return self.subscribers / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        return (f"provisioned {self.subscribers} subscribers in {self.batches} batch(es), "
+                f"{self.seconds:.2f}s ({self.rate:.0f}/s): {self.inserted} inserted, {self.updated} updated")
+
+
+def provision(collection, subscribers: Iterable[Subscriber], batch_size: int = DEFAULT_BATCH_SIZE,
+              update_one=None, object_id=None, int64=None, clock=time.monotonic,
+              progress: Optional[Callable[[Report], None]] = None) -> Report:
+    """Upsert the subscribers into ``collection`` in unordered batches of ``batch_size``.
+
+    ``update_one``, ``object_id`` and ``int64`` default to pymongo's
+    ``UpdateOne``, ``ObjectId`` and ``Int64``. ``progress`` is called after
+    every batch.
+    """
+    if update_one is None:
+        from pymongo import UpdateOne as update_one
+    if object_id is None:
+        from bson import ObjectId as object_id
+    if int64 is None:
+        from bson import Int64 as int64
+    on_insert = {"security.sqn": int64(INITIAL_SQN)}
+    report = Report()
+    started = clock()
+    for batch in batched(subscribers, batch_size):
+        # Later duplicates of an IMSI win, as they would with sequential writes.
+        by_imsi = {subscriber.imsi: subscriber for subscriber in batch}
+        result = collection.bulk_write([
+            update_one({"imsi": imsi}, {"$set": subscriber_update(subscriber, object_id), "$setOnInsert": on_insert},
+                       upsert=True)
+            for imsi, subscriber in by_imsi.items()
+        ], ordered=False)
+        report.subscribers += len(by_imsi)
+        report.inserted += result.upserted_count
+        report.updated += result.matched_count
+        report.batches += 1
+        report.seconds = clock() - started
+        if progress is not None:
+            progress(report)
+    report.seconds = clock() - started
+    return report
+
+
+def main(argv: Optional[Sequence[str]] = None, client=None) -> int:
+    parser = argparse.ArgumentParser(prog="open5gs-provision", description="Bulk upsert Open5GS subscribers.")
+    parser.add_argument("--db-uri", required=True, help="MongoDB URI including the database, e.g. mongodb://host/open5gs")
+    parser.add_argument("--file", action="append", default=[], help="CSV or JSONL subscriber file (repeatable, - for stdin)")
+    parser.add_argument("--imsi-range", nargs=2, metavar=("START", "COUNT"),
+                        help="also generate COUNT subscribers from IMSI START, sharing the options below")
+    parser.add_argument("--key")
+    parser.add_argument("--opc")
+    parser.add_argument("--op")
+    parser.add_argument("--amf", default=DEFAULT_AMF)
+    parser.add_argument("--dnn", default=DEFAULT_DNN)
+    parser.add_argument("--sst", type=int, default=1)
+    parser.add_argument("--sd")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--quiet", action="store_true", help="only print the final report")
+    args = parser.parse_args(argv)
+    if not args.file and not args.imsi_range:
+        parser.error("nothing to provision: give --file and/or --imsi-range")
+    if args.imsi_range and not args.key:
+        parser.error("--imsi-range needs --key and --opc or --op")
+
+    sources = [read_file(path) for path in args.file]
+    if args.imsi_range:
+        start, count = args.imsi_range
+        template = {"key": args.key, "opc": args.opc, "op": args.op, "amf": args.amf,
+                    "dnn": args.dnn, "sst": args.sst, "sd": args.sd}
+        sources.append(imsi_range(start, int(count), template))
+
+    if client is None:
+        from pymongo import MongoClient
+        client = MongoClient(args.db_uri)
+    collection = client.get_default_database()["subscribers"]
+    # Each upsert looks the IMSI up; the same index templates/mongodb-initialization.yaml creates.
+    collection.create_index("imsi", unique=True)
+    def progress(report):
+        if not args.quiet and report.batches % PROGRESS_EVERY == 0:
+            print(report, file=sys.stderr)
+
+    try:
+        report = provision(collection, itertools.chain.from_iterable(sources), args.batch_size, progress=progress)
+    except ValueError as e:
+        print(f"open5gs-provision: {e}", file=sys.stderr)
+        return 1
+    print(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
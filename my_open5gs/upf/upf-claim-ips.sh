@@ -0,0 +1,34 @@
+#!/bin/bash
+# Assigns the UPF's Multus addresses to the node's ENIs, so the VPC delivers
+# their packets (app-cdk/app_cdk/multus.py). An ipvlan interface has its ENI's
+# MAC, which the instance metadata maps to the ENI. The call is signed with
+# the node role's credentials (curl --aws-sigv4) and moves the address over
+# from the ENI of the node the pod ran on before.
+#   UPF_N3_DEV, UPF_N6_DEV  pod interfaces to claim; nothing to do when unset
+#   IMDS_ENDPOINT           (default http://169.254.169.254)
+#   EC2_ENDPOINT            (default https://ec2.<region>.amazonaws.com)
+set -euo pipefail
+
+devs="${UPF_N3_DEV:-} ${UPF_N6_DEV:-}"
+[ -z "${devs// }" ] && exit 0
+
+imds=${IMDS_ENDPOINT:-http://169.254.169.254}
+token=$(curl -sf -X PUT "$imds/latest/api/token" -H 'X-aws-ec2-metadata-token-ttl-seconds: 300')
+meta() { curl -sf -H "X-aws-ec2-metadata-token: $token" "$imds/latest/meta-data/$1"; }
+
+region=$(meta placement/region)
+role=$(meta iam/security-credentials/)
+credentials=$(meta "iam/security-credentials/$role")
+field() { grep -o "\"$1\" *: *\"[^\"]*\"" <<< "$credentials" | cut -d'"' -f4; }
+endpoint=${EC2_ENDPOINT:-https://ec2.$region.amazonaws.com}
+
+for dev in $devs; do
+    addr=$(ip -4 -o addr show dev "$dev" | awk '{print $4}' | cut -d/ -f1)
+    mac=$(ip -o link show dev "$dev" | grep -o 'link/ether [0-9a-f:]*' | cut -d' ' -f2)
+    eni=$(meta "network/interfaces/macs/$mac/interface-id")
+    curl -sf --aws-sigv4 "aws:amz:$region:ec2" --user "$(field AccessKeyId):$(field SecretAccessKey)" \
+        -H "x-amz-security-token: $(field Token)" "$endpoint/" \
+        --data "Action=AssignPrivateIpAddresses&Version=2016-11-15&NetworkInterfaceId=$eni&PrivateIpAddress.1=$addr&AllowReassignment=true" \
+        > /dev/null
+    echo "upf-claim-ips: $addr on $eni ($dev)"
+done
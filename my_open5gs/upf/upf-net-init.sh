@@ -0,0 +1,49 @@
+#!/bin/sh
+# Sets up the UPF's tun device and NAT in the pod network namespace.
+# Safe to run again: every step checks before it changes anything, so an
+# init container re-run after a sandbox restart does not fail or duplicate rules.
+#   UPF_TUN      tun device name            (default ogstun)
+#   UPF_TUN_ADDR gateway address/prefix     (default 10.45.0.1/16)
+#   UPF_SUBNET   UE subnet to masquerade     (default 10.45.0.0/16)
+#   UPF_TIMING   file the start time is written to for upf-start.sh
+#   UPF_N3_DEV, UPF_N6_DEV
+#                Multus data-plane interfaces, if any. Replies leave by the
+#                interface the request came in on, UE traffic leaves by N6,
+#                and the addresses are claimed on the node's ENIs (upf-claim-ips).
+set -eu
+
+tun=${UPF_TUN:-ogstun}
+addr=${UPF_TUN_ADDR:-10.45.0.1/16}
+subnet=${UPF_SUBNET:-10.45.0.0/16}
+
+[ -n "${UPF_TIMING:-}" ] && date +%s%3N > "$UPF_TIMING"
+
+ip link show "$tun" >/dev/null 2>&1 || ip tuntap add name "$tun" mode tun
+ip addr show dev "$tun" | grep -q "inet $addr " || ip addr add "$addr" dev "$tun"
+ip link set "$tun" up
+
+sysctl -w net.ipv6.conf.all.disable_ipv6=1 || echo "upf-net-init: could not disable IPv6"
+sysctl -w net.ipv4.ip_forward=1 || echo "upf-net-init: could not enable ip_forward"
+
+iptables -t nat -C POSTROUTING -s "$subnet" ! -o "$tun" -j MASQUERADE 2>/dev/null ||
+    iptables -t nat -A POSTROUTING -s "$subnet" ! -o "$tun" -j MASQUERADE
+
+# Route from the interface's address via its subnet's VPC router (first host) in table $2.
+route_via() {
+    dev_addr=$(ip -4 -o addr show dev "$1" | awk '{print $4}' | cut -d/ -f1)
+    net=$(ip -4 route show dev "$1" scope link | awk '{print $1}' | cut -d/ -f1)
+    ip route replace default via "${net%.*}.$(( ${net##*.} + 1 ))" dev "$1" table "$2"
+    ip rule show | grep -q "from $dev_addr lookup $2" || ip rule add from "$dev_addr" lookup "$2"
+}
+if [ -n "${UPF_N3_DEV:-}" ]; then
+    route_via "$UPF_N3_DEV" 103
+fi
+if [ -n "${UPF_N6_DEV:-}" ]; then
+    route_via "$UPF_N6_DEV" 106
+    ip rule show | grep -q "from $subnet lookup 106" || ip rule add from "$subnet" lookup 106
+fi
+if [ -n "${UPF_N3_DEV:-}${UPF_N6_DEV:-}" ]; then
+    upf-claim-ips
+fi
+
+echo "upf-net-init: $tun $addr up, NAT for $subnet"
@@ -0,0 +1,40 @@
+#!/bin/bash
+# Runs open5gs-upfd and reports how long the pod took to get PFCP ready.
+#
+# Start time is read from $UPF_TIMING, written by upf-net-init.sh when the
+# pod's init container starts, falling back to this script's own start.
+# Once upfd listens on the PFCP port this prints
+#   upf-start: pfcp_ready_ms=<ms since start>
+# and creates $UPF_READY_FILE for the readiness probe.
+#   UPF_CONFIG      upfd config  (default /open5gs/configs/open5gs/upf.yaml)
+#   UPF_PFCP_PORT   PFCP port    (default 8805)
+#   UPF_READY_FILE  (default /run/upf/pfcp-ready)
+set -u
+
+now_ms() { date +%s%3N; }
+
+start=$(cat "${UPF_TIMING:-/nonexistent}" 2>/dev/null || now_ms)
+config=${UPF_CONFIG:-/open5gs/configs/open5gs/upf.yaml}
+port=${UPF_PFCP_PORT:-8805}
+ready_file=${UPF_READY_FILE:-/run/upf/pfcp-ready}
+
+rm -f "$ready_file"
+open5gs-upfd -c "$config" &
+pid=$!
+trap 'kill -TERM $pid' TERM INT
+
+while kill -0 $pid 2>/dev/null; do
+    if ss -Hlun "sport = :$port" | grep -q .; then
+        ready_ms=$(( $(now_ms) - start ))
+        mkdir -p "$(dirname "$ready_file")"
+        echo "$ready_ms" > "$ready_file"
+        echo "upf-start: pfcp_ready_ms=$ready_ms"
+        break
+    fi
+    sleep 0.1
+done
+
+# wait returns early when the trap fires; keep waiting until upfd has exited.
+wait $pid; status=$?
+while kill -0 $pid 2>/dev/null; do wait $pid; status=$?; done
+exit $status